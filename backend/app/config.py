@@ -13,18 +13,107 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
 
+    # Sessions: "database" rows, or "signed" tokens encrypted with SECRET_KEY
+    # that need no session row. Logging out a signed session stores a
+    # revocation row, checked whenever the session is not cached, so every
+    # process rejects it within SESSION_CACHE_SECONDS. Sessions and profiles
+    # are cached in memory for SESSION_CACHE_SECONDS.
+    SESSION_MODE: str = "database"
+    SESSION_CACHE_SECONDS: int = 300
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./gitpeek.db"
+    DATABASE_BUSY_TIMEOUT_MS: int = 5000
 
     # Cache
     CACHE_EXPIRE_MINUTES: int = 10
+    CACHE_STALE_MINUTES: int = 60
+    CACHE_RETENTION_HOURS: int = 24
+    # Most rows kept by the database backend; beyond it the least recently
+    # ("lru") or least frequently ("lfu") used entries are evicted
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_EVICTION_POLICY: str = "lru"
+    # Cached payloads at least this large are stored zlib-compressed
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+    CACHE_COMPRESS_LEVEL: int = 6
+    # Queue database cache writes and commit them in batches off the request
+    # path; a crash loses writes from the last CACHE_WRITE_BEHIND_DELAY
+    CACHE_WRITE_BEHIND: bool = False
+    CACHE_WRITE_BEHIND_DELAY: float = 0.05
+    CACHE_WRITE_BEHIND_BATCH_SIZE: int = 200
+    # Cached JSON responses at least this large are sent gzip-compressed to
+    # clients that accept it
+    RESPONSE_GZIP_MIN_BYTES: int = 1024
+    CACHE_MEMORY_MAX_ENTRIES: int = 1000
+    CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024
     REDIS_URL: Optional[str] = None
     USE_REDIS: bool = False
+    REDIS_MAX_CONNECTIONS: int = 50
+
+    # Server-side tokens for unauthenticated traffic: comma-separated
+    # personal access tokens and/or a GitHub App installation. They should
+    # only have public read access, since their results are shared.
+    GITHUB_TOKENS: str = ""
+    GITHUB_APP_ID: Optional[str] = None
+    GITHUB_APP_PRIVATE_KEY: Optional[str] = None
+    GITHUB_APP_INSTALLATION_ID: Optional[str] = None
 
     # API
     GITHUB_API_BASE_URL: str = "https://api.github.com"
     GITHUB_GRAPHQL_URL: str = "https://api.github.com/graphql"
 
+    # GitHub HTTP client (shared connection pool)
+    GITHUB_HTTP2: bool = True
+    GITHUB_MAX_CONNECTIONS: int = 100
+    GITHUB_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    GITHUB_KEEPALIVE_EXPIRY: float = 30.0
+    GITHUB_TIMEOUT: float = 30.0
+    GITHUB_CONNECT_TIMEOUT: float = 5.0
+    GITHUB_POOL_TIMEOUT: float = 10.0
+    GITHUB_WARMUP_CONNECTIONS: int = 2
+
+    # GitHub fetch concurrency
+    GITHUB_MAX_CONCURRENCY: int = 8
+    GITHUB_REPO_TIMEOUT: float = 20.0
+    GITHUB_PAGE_CONCURRENCY: int = 4
+    # Most repositories whose commits are fetched for one activity request
+    GITHUB_REPO_BUDGET: int = 50
+
+    # Incremental commit sync re-fetches this much before the high-water mark
+    # to pick up commits pushed with an older date
+    GITHUB_SYNC_OVERLAP_MINUTES: int = 60
+    # Stored commit history older than this is pruned by the janitor. It
+    # covers the year range with room to spare; older custom windows are
+    # fetched again when requested.
+    COMMIT_RETENTION_DAYS: int = 400
+
+    # Rate limit pacing and retries
+    GITHUB_MAX_RETRIES: int = 3
+    GITHUB_RETRY_BACKOFF: float = 1.0
+    GITHUB_RATE_LIMIT_MAX_WAIT: float = 120.0
+    GITHUB_RATE_LIMIT_PACE_FRACTION: float = 0.1
+    GITHUB_SECONDARY_RATE_LIMIT_WAIT: float = 60.0
+
+    # Partial activity is cached briefly so it is retried soon
+    CACHE_PARTIAL_EXPIRE_MINUTES: int = 1
+
+    # Periodic cleanup of expired cache rows, sessions, old commit history
+    # and finished jobs
+    JANITOR_INTERVAL_MINUTES: int = 15
+    JANITOR_BATCH_SIZE: int = 500
+
+    # Background activity jobs: worker count, longest long-poll and how long
+    # finished jobs and their results are kept before the janitor deletes them
+    JOB_WORKERS: int = 2
+    JOB_MAX_WAIT_SECONDS: float = 30.0
+    JOB_RETENTION_HOURS: int = 24
+
+    # Use GraphQL for contribution data when a token is available
+    GITHUB_USE_GRAPHQL: bool = True
+    GITHUB_GRAPHQL_BATCH_SIZE: int = 20
+    GITHUB_GRAPHQL_MIN_REMAINING: int = 100
+
     class Config:
         env_file = ".env"
         case_sensitive = True
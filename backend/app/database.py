@@ -1,6 +1,10 @@
+import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy import (
+    Column, String, Integer, Date, DateTime, LargeBinary, Text, UniqueConstraint, delete,
+    event, inspect, select, text
+)
 from datetime import datetime
 
 from app.config import settings
@@ -13,6 +17,26 @@ engine = create_async_engine(
     future=True
 )
 
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection
+
+    WAL lets readers continue while a write is in progress, NORMAL sync is
+    safe under WAL, and busy_timeout makes concurrent writers wait for the
+    lock instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.DATABASE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+
 # Session factory
 async_session_maker = async_sessionmaker(
     engine,
@@ -32,9 +56,18 @@ class CachedResponse(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     cache_key = Column(String, unique=True, index=True, nullable=False)
-    response_data = Column(Text, nullable=False)
+    # JSON text of rows written before codecs; newer rows leave it empty
+    response_data = Column(Text, default="", nullable=False)
+    # Encoded value, and the codec tag that decodes it (see cache_codecs)
+    payload = Column(LargeBinary, nullable=True)
+    codec = Column(String, nullable=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+    # Access statistics for eviction, flushed periodically by the janitor
+    last_accessed_at = Column(DateTime, nullable=True)
+    hit_count = Column(Integer, default=0, nullable=True)
 
 
 class UserSession(Base):
@@ -46,13 +79,122 @@ class UserSession(Base):
     github_token = Column(String, nullable=False)
     github_username = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+
+
+class RevokedSession(Base):
+    """Signed session logged out before it expired"""
+    __tablename__ = "revoked_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_hash = Column(String, unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+
+
+class CommitSegment(Base):
+    """
+    One UTC day of a repository's commit history stored for an author
+
+    A segment is complete once synced_until reaches the end of its day;
+    until then synced_until is the high-water mark for incremental sync.
+    """
+    __tablename__ = "commit_segments"
+    __table_args__ = (UniqueConstraint("repository", "author", "day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository = Column(String, nullable=False)
+    author = Column(String, nullable=False)
+    day = Column(Date, index=True, nullable=False)
+    synced_until = Column(DateTime, nullable=False)
+
+
+class StoredCommit(Base):
+    """Commit ingested by incremental sync"""
+    __tablename__ = "stored_commits"
+    __table_args__ = (UniqueConstraint("repository", "author", "sha"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository = Column(String, nullable=False)
+    author = Column(String, nullable=False)
+    sha = Column(String, nullable=False)
+    committed_at = Column(DateTime, index=True, nullable=False)
+    commit_data = Column(Text, nullable=False)
+
+
+class ActivityJob(Base):
+    """Activity computation run in the background for the job API"""
+    __tablename__ = "activity_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True, nullable=False)
+    # Identical submissions share the active job with the same key
+    job_key = Column(String, index=True, nullable=False)
+    status = Column(String, index=True, nullable=False)
+    username = Column(String, nullable=False)
+    time_range = Column(String, nullable=False)
+    since = Column(DateTime, nullable=True)
+    until = Column(DateTime, nullable=True)
+    done = Column(Integer, default=0, nullable=False)
+    total = Column(Integer, nullable=True)
+    result_data = Column(Text, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+def _add_missing_columns(connection):
+    """
+    Add columns introduced after a table was created
+
+    create_all never alters existing tables, so new nullable columns are
+    added here to keep older database files usable.
+    """
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            )
+
+
+def _add_missing_indexes(connection):
+    """Create indexes introduced after a table was created"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
 
 
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_add_missing_indexes)
+
+
+async def delete_in_batches(session: AsyncSession, model, *criteria, batch_size: int) -> int:
+    """
+    Delete rows matching criteria a batch at a time
+
+    Each batch is committed on its own so write locks are held briefly and
+    other requests can interleave. Returns the number of rows deleted.
+    """
+    deleted = 0
+    while True:
+        batch = select(model.id).where(*criteria).limit(batch_size)
+        result = await session.execute(delete(model).where(model.id.in_(batch)))
+        await session.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+        await asyncio.sleep(0)
 
 
 async def get_db():
@@ -5,6 +5,12 @@ import logging
 
 from app.routes import public, auth
 from app.database import init_db
+from app.services.cache_backends import close_cache_backend
+from app.services.cache_service import CacheService, cancel_refreshes
+from app.services.http_client import init_http_client, close_http_client
+from app.services.janitor import janitor
+from app.services.job_service import job_queue
+from app.services.singleflight import singleflight
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,11 +19,20 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
+    """Initialize database and shared HTTP client on startup"""
     logger.info("Starting GitPeek API...")
     await init_db()
+    await init_http_client()
+    await job_queue.start()
+    janitor.start()
     yield
     logger.info("Shutting down GitPeek API...")
+    await janitor.stop()
+    await job_queue.stop()
+    await cancel_refreshes()
+    await singleflight.cancel_all()
+    await close_http_client()
+    await close_cache_backend()
 
 
 app = FastAPI(
@@ -60,3 +75,8 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/health/cache")
+async def cache_stats():
+    """Cache hit/miss counters per tier and rows reclaimed by the janitor"""
+    return {**CacheService.stats(), "janitor": janitor.stats}
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -24,6 +24,10 @@ class Repository(BaseModel):
     stars: int = Field(alias="stargazers_count", default=0)
     forks: int = Field(alias="forks_count", default=0)
     updated_at: Optional[str] = None
+    pushed_at: Optional[str] = None
+    fork: bool = False
+    size: Optional[int] = None
+    archived: bool = False
 
 
 class Commit(BaseModel):
@@ -42,6 +46,13 @@ class CommitActivity(BaseModel):
     count: int
 
 
+class ContributionSummary(BaseModel):
+    """Commit contributions aggregated by GitHub GraphQL"""
+    total_commits: int
+    activity_chart: List[CommitActivity]
+    repositories: List[str]
+
+
 class UserActivity(BaseModel):
     """User activity summary"""
     username: str
@@ -51,12 +62,65 @@ class UserActivity(BaseModel):
     commits: List[Commit]
     activity_chart: List[CommitActivity]
     time_range: TimeRange
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    # Set when some repositories could not be fetched
+    partial: bool = False
+    missing_repositories: List[str] = Field(default_factory=list)
 
 
 class UserActivityRequest(BaseModel):
-    """Request model for user activity"""
+    """
+    Request model for user activity
+
+    since/until select an arbitrary window. A missing until means now; a
+    missing since means time_range before until.
+    """
     username: str
     time_range: TimeRange = TimeRange.WEEK
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    @field_validator("since", "until")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """Convert timezone-aware datetimes to naive UTC like the rest of the API"""
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @model_validator(mode="after")
+    def check_window(self) -> "UserActivityRequest":
+        if self.since and self.until and self.since >= self.until:
+            raise ValueError("since must be before until")
+        if self.since and self.until is None and self.since >= datetime.utcnow():
+            raise ValueError("since must be in the past")
+        return self
+
+
+class JobStatus(str, Enum):
+    """Activity job states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ActivityJobResponse(BaseModel):
+    """Status, progress and result of an activity job"""
+    job_id: str
+    status: JobStatus
+    username: str
+    time_range: TimeRange
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    # Repositories fetched so far out of total, once total is known
+    done: int = 0
+    total: Optional[int] = None
+    result: Optional[UserActivity] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
 
 
 class AuthResponse(BaseModel):
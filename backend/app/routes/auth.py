@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi import APIRouter, HTTPException, Query, Header, Request
 from fastapi.responses import RedirectResponse
-import httpx
 from typing import Optional
 
 from app.config import settings
 from app.models.schemas import (
     AuthResponse, UserActivity, TimeRange, UserActivityRequest
 )
+from app.routes.responses import cached_json_response
 from app.services.auth_service import AuthService
 from app.services.github_service import GitHubService
+from app.services.rate_limiter import RateLimitExceededError
+from app.services.http_client import get_http_client
 
 router = APIRouter()
 
@@ -48,31 +50,30 @@ async def github_callback(code: str = Query(...)):
 
     try:
         # Exchange code for access token
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                headers={"Accept": "application/json"},
-                data={
-                    "client_id": settings.GITHUB_CLIENT_ID,
-                    "client_secret": settings.GITHUB_CLIENT_SECRET,
-                    "code": code,
-                }
-            )
+        response = await get_http_client().post(
+            "https://github.com/login/oauth/access_token",
+            headers={"Accept": "application/json"},
+            data={
+                "client_id": settings.GITHUB_CLIENT_ID,
+                "client_secret": settings.GITHUB_CLIENT_SECRET,
+                "code": code,
+            }
+        )
 
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Failed to exchange code for token"
-                )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=400,
+                detail="Failed to exchange code for token"
+            )
 
-            token_data = response.json()
-            access_token = token_data.get("access_token")
+        token_data = response.json()
+        access_token = token_data.get("access_token")
 
-            if not access_token:
-                raise HTTPException(
-                    status_code=400,
-                    detail="No access token received"
-                )
+        if not access_token:
+            raise HTTPException(
+                status_code=400,
+                detail="No access token received"
+            )
 
         # Get user info
         github_service = GitHubService(access_token)
@@ -84,6 +85,9 @@ async def github_callback(code: str = Query(...)):
             github_token=access_token,
             github_username=user_info["login"]
         )
+        session = await auth_service.get_session(session_id)
+        if session is not None:
+            auth_service.cache_profile(session, user_info)
 
         return AuthResponse(
             session_id=session_id,
@@ -103,6 +107,7 @@ async def github_callback(code: str = Query(...)):
 @router.post("/activity", response_model=UserActivity)
 async def get_authenticated_activity(
     request: UserActivityRequest,
+    http_request: Request,
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -128,11 +133,19 @@ async def get_authenticated_activity(
     try:
         # Use authenticated GitHub service
         github_service = GitHubService(access_token=session.github_token)
-        activity = await github_service.get_user_activity(
+        entry = await github_service.get_user_activity_entry(
             request.username,
-            request.time_range
+            request.time_range,
+            since=request.since,
+            until=request.until
+        )
+        return cached_json_response(http_request, entry, public=False)
+    except RateLimitExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
         )
-        return activity
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -185,9 +198,14 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     if not session:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
 
+    user_info = auth_service.get_profile(session_id)
+    if user_info is not None:
+        return user_info
+
     try:
         github_service = GitHubService(access_token=session.github_token)
         user_info = await github_service.get_authenticated_user()
+        auth_service.cache_profile(session, user_info)
         return user_info
     except Exception as e:
         raise HTTPException(
@@ -1,31 +1,52 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, Optional
+import json
+import logging
 
+from app.config import settings
 from app.models.schemas import (
-    UserActivity, UserActivityRequest, TimeRange, ErrorResponse
+    ActivityJobResponse, UserActivity, UserActivityRequest, TimeRange, ErrorResponse
 )
+from app.routes.responses import cached_json_response
 from app.services.github_service import GitHubService
+from app.services.job_service import job_queue
+from app.services.rate_limiter import RateLimitExceededError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.post("/activity", response_model=UserActivity)
-async def get_user_activity(request: UserActivityRequest):
+async def get_user_activity(request: UserActivityRequest, http_request: Request):
     """
     Get public GitHub activity for a user
 
     - **username**: GitHub username to query
     - **time_range**: Time range (day, week, month, year)
+    - **since**: Optional start of a custom window (UTC)
+    - **until**: Optional end of a custom window (UTC), defaults to now
     """
     try:
         github_service = GitHubService()
-        activity = await github_service.get_user_activity(
+        entry = await github_service.get_user_activity_entry(
             request.username,
-            request.time_range
+            request.time_range,
+            since=request.since,
+            until=request.until
         )
-        return activity
+        return cached_json_response(http_request, entry)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except RateLimitExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -34,7 +55,7 @@ async def get_user_activity(request: UserActivityRequest):
 
 
 @router.get("/user/{username}")
-async def get_user_info(username: str):
+async def get_user_info(request: Request, username: str):
     """
     Get basic GitHub user information
 
@@ -42,10 +63,16 @@ async def get_user_info(username: str):
     """
     try:
         github_service = GitHubService()
-        user_info = await github_service.get_user_info(username)
-        return user_info
+        entry = await github_service.get_user_info_entry(username)
+        return cached_json_response(request, entry)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except RateLimitExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -53,26 +80,179 @@ async def get_user_info(username: str):
         )
 
 
-@router.get("/search/{username}")
+@router.get("/search/{username}", response_model=UserActivity)
 async def search_user(
+    request: Request,
     username: str,
-    time_range: TimeRange = Query(TimeRange.WEEK)
+    time_range: TimeRange = Query(TimeRange.WEEK),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None)
 ):
     """
     Quick search for user activity
 
     - **username**: GitHub username
     - **time_range**: Time range (day, week, month, year)
+    - **since**: Optional start of a custom window (UTC)
+    - **until**: Optional end of a custom window (UTC), defaults to now
     """
+    try:
+        params = UserActivityRequest(
+            username=username, time_range=time_range, since=since, until=until
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail="; ".join(error["msg"] for error in e.errors())
+        )
+
     try:
         github_service = GitHubService()
-        activity = await github_service.get_user_activity(username, time_range)
-        return activity
+        entry = await github_service.get_user_activity_entry(
+            username,
+            time_range,
+            since=params.since,
+            until=params.until
+        )
+        return cached_json_response(request, entry)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except RateLimitExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error searching user: {str(e)}"
         )
 
+
+def _format_event(event: Dict[str, Any], sse: bool) -> str:
+    """Encode an activity event as a server-sent event or an NDJSON line"""
+    if sse:
+        return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    return json.dumps(event) + "\n"
+
+
+@router.get("/stream/{username}")
+async def stream_user_activity(
+    request: Request,
+    username: str,
+    time_range: TimeRange = Query(TimeRange.WEEK),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None)
+):
+    """
+    Stream user activity as it is fetched
+
+    Emits "user" and "repositories" events first, then "commits" per
+    repository and "chart" updates, ending with a "summary" event holding
+    the full activity. Sent as server-sent events when the client accepts
+    text/event-stream, otherwise as newline-delimited JSON.
+
+    - **username**: GitHub username
+    - **time_range**: Time range (day, week, month, year)
+    - **since**: Optional start of a custom window (UTC)
+    - **until**: Optional end of a custom window (UTC), defaults to now
+    """
+    try:
+        params = UserActivityRequest(
+            username=username, time_range=time_range, since=since, until=until
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail="; ".join(error["msg"] for error in e.errors())
+        )
+
+    github_service = GitHubService()
+    events = github_service.stream_user_activity(
+        username,
+        time_range,
+        since=params.since,
+        until=params.until
+    )
+
+    # Wait for the first event so failures up front still get a status code
+    try:
+        first = await events.__anext__()
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RateLimitExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error streaming user activity: {str(e)}"
+        )
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def body() -> AsyncIterator[str]:
+        yield _format_event(first, sse)
+        try:
+            async for event in events:
+                yield _format_event(event, sse)
+        except Exception as e:
+            # Headers are already sent, so report the failure in the stream
+            logger.error(f"Error streaming activity for {username}: {e}")
+            yield _format_event({"event": "error", "data": {"detail": str(e)}}, sse)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.post("/jobs", response_model=ActivityJobResponse, status_code=202)
+async def submit_activity_job(request: UserActivityRequest):
+    """
+    Compute user activity in the background
+
+    Returns a job at once; poll GET /jobs/{job_id} for progress and the
+    result. Submitting the same request while a job for it is queued or
+    running returns that job.
+
+    - **username**: GitHub username to query
+    - **time_range**: Time range (day, week, month, year)
+    - **since**: Optional start of a custom window (UTC)
+    - **until**: Optional end of a custom window (UTC), defaults to now
+    """
+    try:
+        return await job_queue.submit(request)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error submitting activity job: {str(e)}"
+        )
+
+
+@router.get("/jobs/{job_id}", response_model=ActivityJobResponse)
+async def get_activity_job(
+    job_id: str,
+    wait: float = Query(0, ge=0)
+):
+    """
+    Get the status, progress and result of an activity job
+
+    - **job_id**: Job ID returned on submission
+    - **wait**: Seconds to wait for the job to change before returning (long polling)
+    """
+    try:
+        job = await job_queue.wait(job_id, min(wait, settings.JOB_MAX_WAIT_SECONDS))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error fetching activity job: {str(e)}"
+        )
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.services.cache_backends import CacheEntry
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Whether the client accepts gzip-encoded responses"""
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag, compared weakly as RFC 9110 requires"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def cached_json_response(request: Request, entry: CacheEntry, public: bool = True) -> Response:
+    """
+    Send a cache entry's JSON as is, with HTTP caching headers
+
+    The strong ETag is the SHA-256 of the entry's JSON, suffixed for the
+    gzip representation. max-age is the entry's lifetime and Age how long
+    ago it was cached, so downstream caches keep it exactly as long as we
+    do. A client already holding the entry gets 304 Not Modified.
+
+    Bypasses response_model validation and encoding; the entry's value must
+    already match the declared model.
+    """
+    now = datetime.utcnow()
+    gzipped = accepts_gzip(request) and len(entry.encoded()) >= settings.RESPONSE_GZIP_MIN_BYTES
+    etag = f'"{entry.hexdigest()}{"-gzip" if gzipped else ""}"'
+
+    if entry.created_at is not None and entry.created_at <= now < entry.expires_at:
+        max_age = int((entry.expires_at - entry.created_at).total_seconds())
+        age = int((now - entry.created_at).total_seconds())
+    else:
+        max_age = max(int((entry.expires_at - now).total_seconds()), 0)
+        age = None
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"{'public' if public else 'private'}, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+    if age is not None:
+        headers["Age"] = str(age)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=entry.gzip_encoded(), media_type="application/json", headers=headers)
+    return Response(content=entry.encoded(), media_type="application/json", headers=headers)
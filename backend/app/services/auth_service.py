@@ -1,26 +1,85 @@
+import base64
+import hashlib
+import json
 import secrets
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from cryptography.fernet import Fernet, InvalidToken
 from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
 import logging
 
 from app.config import settings
-from app.database import async_session_maker, UserSession
+from app.database import async_session_maker, delete_in_batches, RevokedSession, UserSession
+from app.services.memory_cache import MemoryCache
 
 logger = logging.getLogger(__name__)
 
 
+# Sessions and GitHub profiles by session ID, so authenticated requests
+# skip the session lookup and the profile fetch. Entries live at most
+# SESSION_CACHE_SECONDS; logout removes them from this process, and other
+# processes notice it once their entry expires.
+session_cache = MemoryCache(
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MEMORY_MAX_BYTES
+)
+profile_cache = MemoryCache(
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MEMORY_MAX_BYTES
+)
+
+
+def clear_session_caches() -> None:
+    """Forget cached sessions and profiles"""
+    session_cache.clear()
+    profile_cache.clear()
+
+
+@lru_cache(maxsize=4)
+def _fernet(secret_key: str) -> Fernet:
+    """Fernet keyed from SECRET_KEY; it both encrypts and authenticates"""
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret_key.encode()).digest()))
+
+
+def _session_hash(session_id: str) -> str:
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+
 class AuthService:
-    """Service for handling authentication"""
+    """
+    Service for handling authentication
+
+    With SESSION_MODE "database" sessions are rows in user_sessions, cached
+    in memory for SESSION_CACHE_SECONDS. With "signed" the session ID is
+    itself an encrypted token holding the GitHub token and username, so no
+    session row is needed. Logging out stores a revocation row, checked
+    along with the token whenever the session is not cached.
+    """
 
     SESSION_EXPIRE_HOURS = 24 * 7  # 7 days
 
+    @property
+    def signed(self) -> bool:
+        return settings.SESSION_MODE == "signed"
+
+    def _cache_expiry(self, expires_at: datetime) -> datetime:
+        return min(expires_at, datetime.utcnow() + timedelta(seconds=settings.SESSION_CACHE_SECONDS))
+
     async def create_session(
         self,
         github_token: str,
         github_username: str
     ) -> str:
         """Create a new user session"""
+        if self.signed:
+            payload = json.dumps({"token": github_token, "username": github_username})
+            session_id = _fernet(settings.SECRET_KEY).encrypt(payload.encode()).decode()
+            user_session = self._decrypt_signed(session_id)
+            session_cache.set(session_id, user_session, self._cache_expiry(user_session.expires_at))
+            return session_id
+
         try:
             session_id = secrets.token_urlsafe(32)
             expires_at = datetime.utcnow() + timedelta(hours=self.SESSION_EXPIRE_HOURS)
@@ -35,13 +94,64 @@ class AuthService:
                 session.add(user_session)
                 await session.commit()
 
+            session_cache.set(session_id, user_session, self._cache_expiry(expires_at))
             return session_id
         except Exception as e:
             logger.error(f"Error creating session: {e}")
             raise
 
+    def _decrypt_signed(self, session_id: str) -> Optional[UserSession]:
+        """Decrypt a signed session, or None if it is invalid or expired"""
+        fernet = _fernet(settings.SECRET_KEY)
+        ttl = self.SESSION_EXPIRE_HOURS * 3600
+        try:
+            data = json.loads(fernet.decrypt(session_id.encode(), ttl=ttl))
+            issued_at = fernet.extract_timestamp(session_id.encode())
+        except (InvalidToken, ValueError):
+            return None
+
+        # Not stored; built so callers handle both modes the same way
+        return UserSession(
+            session_id=session_id,
+            github_token=data["token"],
+            github_username=data["username"],
+            created_at=datetime.utcfromtimestamp(issued_at),
+            expires_at=datetime.utcfromtimestamp(issued_at + ttl)
+        )
+
+    async def _verify_signed(self, session_id: str) -> Optional[UserSession]:
+        """Decrypt a signed session, or None if it is invalid, expired or revoked"""
+        user_session = self._decrypt_signed(session_id)
+        if user_session is None:
+            return None
+
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(RevokedSession.id).where(
+                        RevokedSession.session_hash == _session_hash(session_id)
+                    )
+                )
+                revoked = result.first() is not None
+        except Exception as e:
+            logger.error(f"Error checking session revocation: {e}")
+            return None
+        return None if revoked else user_session
+
     async def get_session(self, session_id: str) -> Optional[UserSession]:
         """Get session by ID"""
+        cached = session_cache.get(session_id)
+        if cached is not None:
+            return cached
+
+        if self.signed:
+            user_session = await self._verify_signed(session_id)
+            if user_session is not None:
+                session_cache.set(
+                    session_id, user_session, self._cache_expiry(user_session.expires_at)
+                )
+            return user_session
+
         try:
             async with async_session_maker() as session:
                 result = await session.execute(
@@ -50,13 +160,46 @@ class AuthService:
                         UserSession.expires_at > datetime.utcnow()
                     )
                 )
-                return result.scalar_one_or_none()
+                user_session = result.scalar_one_or_none()
         except Exception as e:
             logger.error(f"Error getting session: {e}")
             return None
 
+        if user_session is not None:
+            session_cache.set(session_id, user_session, self._cache_expiry(user_session.expires_at))
+        return user_session
+
+    def get_profile(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get the cached GitHub profile of a session"""
+        return profile_cache.get(session_id)
+
+    def cache_profile(self, session: UserSession, profile: Dict[str, Any]) -> None:
+        """Cache the GitHub profile of a session"""
+        profile_cache.set(session.session_id, profile, self._cache_expiry(session.expires_at))
+
     async def delete_session(self, session_id: str) -> bool:
         """Delete a session"""
+        session_cache.delete(session_id)
+        profile_cache.delete(session_id)
+
+        if self.signed:
+            user_session = self._decrypt_signed(session_id)
+            if user_session is None:
+                return True
+            try:
+                async with async_session_maker() as session:
+                    session.add(RevokedSession(
+                        session_hash=_session_hash(session_id),
+                        expires_at=user_session.expires_at
+                    ))
+                    await session.commit()
+            except IntegrityError:
+                pass  # Already revoked
+            except Exception as e:
+                logger.error(f"Error revoking session: {e}")
+                return False
+            return True
+
         try:
             async with async_session_maker() as session:
                 await session.execute(
@@ -69,17 +212,22 @@ class AuthService:
             return False
 
     async def clear_expired_sessions(self) -> int:
-        """Clear expired sessions"""
+        """Clear expired sessions and revocations of expired signed sessions"""
+        now = datetime.utcnow()
         try:
             async with async_session_maker() as session:
-                result = await session.execute(
-                    delete(UserSession).where(
-                        UserSession.expires_at <= datetime.utcnow()
-                    )
+                await delete_in_batches(
+                    session,
+                    RevokedSession,
+                    RevokedSession.expires_at <= now,
+                    batch_size=settings.JANITOR_BATCH_SIZE
+                )
+                return await delete_in_batches(
+                    session,
+                    UserSession,
+                    UserSession.expires_at <= now,
+                    batch_size=settings.JANITOR_BATCH_SIZE
                 )
-                await session.commit()
-                return result.rowcount
         except Exception as e:
             logger.error(f"Error clearing sessions: {e}")
             return 0
-
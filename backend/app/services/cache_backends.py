@@ -0,0 +1,436 @@
+import asyncio
+import gzip
+import hashlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, select, update
+import logging
+
+from app.config import settings
+from app.database import async_session_maker, delete_in_batches, CachedResponse
+from app.services import cache_codecs
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with its expiry and HTTP validators"""
+    value: Any
+    expires_at: datetime
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: int = 0
+    # When the value was stored, if known
+    created_at: Optional[datetime] = None
+    # JSON encoding of value, its gzip compression and its hash, kept once computed
+    payload: Optional[bytes] = field(default=None, repr=False)
+    gzipped: Optional[bytes] = field(default=None, repr=False)
+    sha256: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= datetime.utcnow()
+
+    def encoded(self) -> bytes:
+        """The value as JSON bytes, encoded at most once"""
+        if self.payload is None:
+            self.payload = cache_codecs.dumps(self.value)
+        return self.payload
+
+    def gzip_encoded(self) -> bytes:
+        """The JSON bytes gzip-compressed, compressed at most once"""
+        if self.gzipped is None:
+            self.gzipped = gzip.compress(self.encoded(), mtime=0)
+        return self.gzipped
+
+    def hexdigest(self) -> str:
+        """SHA-256 of the JSON bytes, hashed at most once"""
+        if self.sha256 is None:
+            self.sha256 = hashlib.sha256(self.encoded()).hexdigest()
+        return self.sha256
+
+
+class CacheBackend(ABC):
+    """Storage behind CacheService's in-memory tier"""
+
+    name: str
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Get an entry by key, including expired entries still retained"""
+
+    async def get_many(self, keys: List[str]) -> Dict[str, CacheEntry]:
+        """Get several entries; backends override this with a batched read"""
+        entries = {}
+        for key in keys:
+            entry = await self.get(key)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    @abstractmethod
+    async def set(self, key: str, entry: CacheEntry, payload: bytes) -> None:
+        """Store an entry; payload is the JSON encoded value"""
+
+    async def set_many(self, items: Dict[str, Tuple[CacheEntry, bytes]]) -> None:
+        """Store several (entry, payload) pairs; backends override this with a batched write"""
+        for key, (entry, payload) in items.items():
+            await self.set(key, entry, payload)
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete an entry"""
+
+    @abstractmethod
+    async def clear_expired(self, cutoff: datetime) -> int:
+        """Delete entries that expired before cutoff"""
+
+    def touch(self, key: str) -> None:
+        """Record a cache hit for eviction; backends that evict themselves ignore it"""
+
+    async def evict(self, max_entries: int, policy: str) -> int:
+        """Delete the least valuable entries beyond max_entries"""
+        return 0
+
+    async def close(self) -> None:
+        """Release connections held by the backend"""
+
+
+# Columns replaced when a cache key is written again
+UPSERT_COLUMNS = (
+    "response_data", "payload", "codec", "etag", "last_modified", "created_at", "expires_at"
+)
+
+
+def _insert_for(dialect_name: str):
+    """INSERT construct supporting ON CONFLICT for the database dialect"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+class DatabaseCacheBackend(CacheBackend):
+    """
+    Cache stored in the cached_responses table
+
+    Hits are counted in memory and written to the rows by flush_accesses,
+    so reads stay reads; evict uses the flushed statistics.
+
+    Writes are single-statement upserts. With CACHE_WRITE_BEHIND they are
+    queued instead and committed together by a background task, so
+    requests do not wait on the database write lock; queued entries are
+    served by get until they are written.
+    """
+
+    name = "database"
+
+    def __init__(self, write_behind: Optional[bool] = None):
+        # cache key -> (hits since the last flush, last access)
+        self._accesses: Dict[str, Tuple[int, datetime]] = {}
+        self.write_behind = settings.CACHE_WRITE_BEHIND if write_behind is None else write_behind
+        # cache key -> (entry, row) waiting to be written
+        self._pending: Dict[str, Tuple[CacheEntry, dict]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _decode(cached: CachedResponse) -> CacheEntry:
+        if cached.codec is None:
+            # Written before payloads were encoded with a codec
+            data = cached.response_data.encode()
+        else:
+            data = cache_codecs.decompress(cached.payload, cached.codec)
+
+        return CacheEntry(
+            value=cache_codecs.loads(data),
+            expires_at=cached.expires_at,
+            etag=cached.etag,
+            last_modified=cached.last_modified,
+            size=len(data),
+            created_at=cached.created_at,
+            payload=data
+        )
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, CacheEntry]:
+        entries = {key: self._pending[key][0] for key in keys if key in self._pending}
+        stored = [key for key in keys if key not in entries]
+        if not stored:
+            return entries
+
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(CachedResponse).where(CachedResponse.cache_key.in_(stored))
+            )
+            for cached in result.scalars():
+                entries[cached.cache_key] = self._decode(cached)
+        return entries
+
+    async def set(self, key: str, entry: CacheEntry, payload: bytes) -> None:
+        await self.set_many({key: (entry, payload)})
+
+    async def set_many(self, items: Dict[str, Tuple[CacheEntry, bytes]]) -> None:
+        rows = {}
+        for key, (entry, payload) in items.items():
+            data, codec = cache_codecs.compress(payload)
+            rows[key] = {
+                "cache_key": key,
+                "response_data": "",
+                "payload": data,
+                "codec": codec,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "created_at": datetime.utcnow(),
+                "expires_at": entry.expires_at,
+            }
+        if not rows:
+            return
+        if not self.write_behind:
+            await self._write(list(rows.values()))
+            return
+
+        for key, row in rows.items():
+            self._pending[key] = (items[key][0], row)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def _write(self, rows: List[dict]) -> None:
+        """Upsert rows in one transaction"""
+        async with async_session_maker() as session:
+            table = CachedResponse.__table__
+            statement = _insert_for(session.bind.dialect.name)(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.cache_key],
+                set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+            )
+            await session.execute(statement, rows)
+            await session.commit()
+
+    async def _flush_later(self) -> None:
+        # Let writes from concurrent requests accumulate into one batch
+        await asyncio.sleep(settings.CACHE_WRITE_BEHIND_DELAY)
+        while self._pending:
+            try:
+                await self.flush()
+            except Exception:
+                # Logged by flush; the entries are retried with the next write
+                return
+
+    async def flush(self) -> int:
+        """Write queued entries now, in batches of CACHE_WRITE_BEHIND_BATCH_SIZE"""
+        keys = list(self._pending)[:settings.CACHE_WRITE_BEHIND_BATCH_SIZE]
+        batch = {key: self._pending.pop(key) for key in keys}
+        if not batch:
+            return 0
+
+        try:
+            await self._write([row for _, row in batch.values()])
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} queued cache entries: {e}")
+            # Keep them queued unless they were written again meanwhile
+            for key, pending in batch.items():
+                self._pending.setdefault(key, pending)
+            raise
+        return len(batch)
+
+    async def delete(self, key: str) -> None:
+        self._pending.pop(key, None)
+        async with async_session_maker() as session:
+            await session.execute(
+                delete(CachedResponse).where(CachedResponse.cache_key == key)
+            )
+            await session.commit()
+
+    async def clear_expired(self, cutoff: datetime) -> int:
+        async with async_session_maker() as session:
+            return await delete_in_batches(
+                session,
+                CachedResponse,
+                CachedResponse.expires_at <= cutoff,
+                batch_size=settings.JANITOR_BATCH_SIZE
+            )
+
+    def touch(self, key: str) -> None:
+        hits, _ = self._accesses.get(key, (0, None))
+        self._accesses[key] = (hits + 1, datetime.utcnow())
+
+    async def flush_accesses(self) -> int:
+        """Write the hits recorded since the last flush to their rows"""
+        accesses, self._accesses = self._accesses, {}
+        if not accesses:
+            return 0
+
+        # Executed against the table so the rows are matched by cache_key
+        table = CachedResponse.__table__
+        async with async_session_maker() as session:
+            await session.execute(
+                update(table)
+                .where(table.c.cache_key == bindparam("key"))
+                .values(
+                    hit_count=func.coalesce(table.c.hit_count, 0) + bindparam("hits"),
+                    last_accessed_at=bindparam("accessed_at")
+                ),
+                [
+                    {"key": key, "hits": hits, "accessed_at": accessed_at}
+                    for key, (hits, accessed_at) in accesses.items()
+                ]
+            )
+            await session.commit()
+        return len(accesses)
+
+    async def evict(self, max_entries: int, policy: str) -> int:
+        await self.flush_accesses()
+
+        recency = func.coalesce(CachedResponse.last_accessed_at, CachedResponse.created_at)
+        if policy == "lfu":
+            order = (func.coalesce(CachedResponse.hit_count, 0), recency)
+        else:
+            order = (recency,)
+
+        evicted = 0
+        async with async_session_maker() as session:
+            count = await session.scalar(select(func.count(CachedResponse.id)))
+            excess = count - max_entries
+            while excess > 0:
+                batch = (
+                    select(CachedResponse.id)
+                    .order_by(*order)
+                    .limit(min(excess, settings.JANITOR_BATCH_SIZE))
+                )
+                result = await session.execute(
+                    delete(CachedResponse).where(CachedResponse.id.in_(batch))
+                )
+                await session.commit()
+                if not result.rowcount:
+                    break
+                evicted += result.rowcount
+                excess -= result.rowcount
+                await asyncio.sleep(0)
+        return evicted
+
+    async def close(self) -> None:
+        """Write any queued entries before shutting down"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        while self._pending:
+            await self.flush()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache stored in Redis, shared by all workers and replicas
+
+    Keys expire natively once the retention period after their expiry has
+    passed, so clear_expired has nothing to do. Size is bounded by the
+    server's maxmemory-policy rather than evict.
+    """
+
+    name = "redis"
+    prefix = "gitpeek:cache:"
+
+    def __init__(self, client=None):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.Redis.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS
+            )
+        self.client = client
+
+    def _decode(self, raw: Optional[bytes]) -> Optional[CacheEntry]:
+        if raw is None:
+            return None
+        data = cache_codecs.loads(raw)
+        created_at = data.get("created_at")
+        return CacheEntry(
+            value=data["value"],
+            expires_at=datetime.fromisoformat(data["expires_at"]),
+            etag=data["etag"],
+            last_modified=data["last_modified"],
+            size=len(raw),
+            created_at=datetime.fromisoformat(created_at) if created_at else None
+        )
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return self._decode(await self.client.get(self.prefix + key))
+
+    async def get_many(self, keys: List[str]) -> Dict[str, CacheEntry]:
+        if not keys:
+            return {}
+        values = await self.client.mget([self.prefix + key for key in keys])
+
+        entries = {}
+        for key, raw in zip(keys, values):
+            entry = self._decode(raw)
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def _envelope(self, entry: CacheEntry, payload: bytes) -> Tuple[bytes, int]:
+        """Encode an entry with its metadata, returning it with its TTL in seconds"""
+        # Append the already encoded value to the metadata object
+        meta = cache_codecs.dumps({
+            "expires_at": entry.expires_at.isoformat(),
+            "created_at": entry.created_at.isoformat() if entry.created_at else None,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        })
+        envelope = meta[:-1] + b',"value":' + payload + b"}"
+
+        # Keep the key past its expiry so its validators can be revalidated
+        retain_until = entry.expires_at + timedelta(hours=settings.CACHE_RETENTION_HOURS)
+        ttl = max(int((retain_until - datetime.utcnow()).total_seconds()), 1)
+        return envelope, ttl
+
+    async def set(self, key: str, entry: CacheEntry, payload: bytes) -> None:
+        envelope, ttl = self._envelope(entry, payload)
+        await self.client.set(self.prefix + key, envelope, ex=ttl)
+
+    async def set_many(self, items: Dict[str, Tuple[CacheEntry, bytes]]) -> None:
+        if not items:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, (entry, payload) in items.items():
+                envelope, ttl = self._envelope(entry, payload)
+                pipe.set(self.prefix + key, envelope, ex=ttl)
+            await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def clear_expired(self, cutoff: datetime) -> int:
+        return 0
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    """Get the configured cache backend, Redis when USE_REDIS and REDIS_URL are set"""
+    global _backend
+    if _backend is None:
+        if settings.USE_REDIS and settings.REDIS_URL:
+            _backend = RedisCacheBackend()
+        else:
+            _backend = DatabaseCacheBackend()
+    return _backend
+
+
+async def close_cache_backend() -> None:
+    """Close the configured cache backend"""
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
@@ -0,0 +1,44 @@
+import json
+import zlib
+from typing import Any, Tuple, Union
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Codec tags stored with each cached payload
+JSON = "json"
+JSON_ZLIB = "json+zlib"
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON produced by dumps or any other JSON encoder"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compress(payload: bytes) -> Tuple[bytes, str]:
+    """Compress a JSON payload above CACHE_COMPRESS_MIN_BYTES, returning it with its codec tag"""
+    if len(payload) < settings.CACHE_COMPRESS_MIN_BYTES:
+        return payload, JSON
+    return zlib.compress(payload, settings.CACHE_COMPRESS_LEVEL), JSON_ZLIB
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    """Undo compress for a payload stored with codec"""
+    if codec == JSON_ZLIB:
+        return zlib.decompress(data)
+    if codec == JSON:
+        return data
+    raise ValueError(f"Unknown cache codec: {codec}")
@@ -1,91 +1,304 @@
-import json
+import asyncio
 from datetime import datetime, timedelta
-from typing import Optional, Any
-from sqlalchemy import select, delete
+from typing import Optional, Any, Awaitable, Callable, Dict, List, Set, Tuple
 import logging
 
 from app.config import settings
-from app.database import async_session_maker, CachedResponse
+from app.services import cache_codecs
+from app.services.cache_backends import CacheBackend, CacheEntry, get_cache_backend
+from app.services.memory_cache import MemoryCache
+from app.services.singleflight import singleflight
 
 logger = logging.getLogger(__name__)
 
 
+# In-process tier in front of the cache backend, shared by all CacheService instances
+memory_tier = MemoryCache(
+    max_entries=settings.CACHE_MEMORY_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MEMORY_MAX_BYTES
+)
+
+# Backend tier counters
+backend_stats = {"hits": 0, "misses": 0}
+
+# Background refreshes started for stale entries
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+async def cancel_refreshes() -> None:
+    """Cancel background refreshes that are still running"""
+    for task in list(_refresh_tasks):
+        task.cancel()
+    await asyncio.gather(*_refresh_tasks, return_exceptions=True)
+
+
 class CacheService:
     """Service for caching API responses"""
 
-    def __init__(self):
+    def __init__(self, backend: Optional[CacheBackend] = None):
         self.expire_minutes = settings.CACHE_EXPIRE_MINUTES
+        self.retention_hours = settings.CACHE_RETENTION_HOURS
+        self.stale_minutes = settings.CACHE_STALE_MINUTES
+        self.memory = memory_tier
+        self.backend = backend or get_cache_backend()
+
+    @staticmethod
+    def stats() -> dict:
+        """Hit/miss counters for each cache tier"""
+        return {
+            "memory": memory_tier.stats(),
+            "backend": {"name": get_cache_backend().name, **backend_stats},
+        }
 
     async def get(self, key: str) -> Optional[Any]:
         """Get cached value by key"""
+        entry = await self.get_entry(key)
+        if entry and not entry.is_expired:
+            return entry.value
+        return None
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get cached entry by key, including expired entries
+
+        Fresh entries are served from memory when possible. Expired entries
+        are kept by the backend for CACHE_RETENTION_HOURS so their validators
+        can be used to revalidate them.
+        """
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.backend.touch(key)
+            return entry
+
         try:
-            async with async_session_maker() as session:
-                result = await session.execute(
-                    select(CachedResponse).where(
-                        CachedResponse.cache_key == key,
-                        CachedResponse.expires_at > datetime.utcnow()
-                    )
-                )
-                cached = result.scalar_one_or_none()
-
-                if cached:
-                    return json.loads(cached.response_data)
-
-                return None
+            entry = await self.backend.get(key)
         except Exception as e:
             logger.error(f"Cache get error: {e}")
             return None
 
-    async def set(self, key: str, value: Any) -> bool:
-        """Set cached value with expiration"""
+        if entry is None:
+            backend_stats["misses"] += 1
+            return None
+
+        backend_stats["hits"] += 1
+        self.backend.touch(key)
+        if not entry.is_expired:
+            self.memory.set(key, entry, entry.expires_at, entry.size)
+        return entry
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get the fresh cached values among keys"""
+        entries = await self.get_entries(keys)
+        return {key: entry.value for key, entry in entries.items() if not entry.is_expired}
+
+    async def get_entries(self, keys: List[str]) -> Dict[str, CacheEntry]:
+        """
+        Get cached entries for several keys, including expired entries
+
+        Like get_entry, with the keys not held in memory read from the
+        backend in one batch.
+        """
+        entries = {}
+        for key in keys:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.backend.touch(key)
+                entries[key] = entry
+
+        missing = [key for key in dict.fromkeys(keys) if key not in entries]
+        if not missing:
+            return entries
+
+        try:
+            stored = await self.backend.get_many(missing)
+        except Exception as e:
+            logger.error(f"Cache get_many error: {e}")
+            return entries
+
+        backend_stats["hits"] += len(stored)
+        backend_stats["misses"] += len(missing) - len(stored)
+        for key, entry in stored.items():
+            self.backend.touch(key)
+            if not entry.is_expired:
+                self.memory.set(key, entry, entry.expires_at, entry.size)
+            entries[key] = entry
+        return entries
+
+    def is_servable_stale(self, entry: CacheEntry) -> bool:
+        """Whether an expired entry is still within the stale window"""
+        return datetime.utcnow() < entry.expires_at + timedelta(minutes=self.stale_minutes)
+
+    async def get_or_refresh(
+        self,
+        key: str,
+        compute: Callable[[Optional[CacheEntry]], Awaitable[Any]]
+    ) -> Any:
+        """
+        Get a cached value, computing it when needed
+
+        Entries past their expiry (soft TTL) but within CACHE_STALE_MINUTES
+        (hard TTL) are returned immediately while compute refreshes them in
+        the background. Older or missing entries are computed before
+        returning. Computations are coalesced per key. compute receives the
+        previous entry, if any, and must store and return the new value.
+        """
+        entry = await self.get_entry(key)
+        if entry is not None and not entry.is_expired:
+            return entry.value
+
+        if entry is not None and self.is_servable_stale(entry):
+            self._refresh_in_background(key, lambda: compute(entry))
+            return entry.value
+
+        return await singleflight.do(key, lambda: compute(entry))
+
+    async def get_or_refresh_entry(
+        self,
+        key: str,
+        entry: Optional[CacheEntry],
+        compute: Callable[[Optional[CacheEntry]], Awaitable[CacheEntry]]
+    ) -> CacheEntry:
+        """
+        Like get_or_refresh, for callers that already read the entry for key
+
+        entry is what is cached under key, or None. compute must store the
+        new entry and return it, so the result is always the entry as cached
+        and never read back. Servable stale entries are returned as they are
+        while they are refreshed.
+        """
+        if entry is not None and not entry.is_expired:
+            return entry
+
+        if entry is not None and self.is_servable_stale(entry):
+            self._refresh_in_background(key, lambda: compute(entry))
+            return entry
+
+        return await singleflight.do(key, lambda: compute(entry))
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        """Start a refresh for key unless one is already running"""
+        if singleflight.in_flight(key):
+            return
+
+        async def refresh():
+            try:
+                await singleflight.do(key, compute)
+            except Exception as e:
+                logger.error(f"Background refresh failed for {key}: {e}")
+
+        task = asyncio.create_task(refresh())
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        expire_minutes: Optional[int] = None
+    ) -> bool:
+        """Set cached value with expiration and optional HTTP validators"""
+        return await self.put(key, self.make_entry(value, etag, last_modified, expire_minutes))
+
+    def make_entry(
+        self,
+        value: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        expire_minutes: Optional[int] = None
+    ) -> CacheEntry:
+        """Build the entry set stores for value, encoding it once"""
+        if expire_minutes is None:
+            expire_minutes = self.expire_minutes
+        payload = cache_codecs.dumps(value)
+        now = datetime.utcnow()
+        return CacheEntry(
+            value=value,
+            expires_at=now + timedelta(minutes=expire_minutes),
+            etag=etag,
+            last_modified=last_modified,
+            size=len(payload),
+            created_at=now,
+            payload=payload
+        )
+
+    async def put(self, key: str, entry: CacheEntry) -> bool:
+        """Store an entry built by make_entry"""
+        self.memory.set(key, entry, entry.expires_at, entry.size)
+
         try:
-            async with async_session_maker() as session:
-                expires_at = datetime.utcnow() + timedelta(minutes=self.expire_minutes)
-
-                # Delete existing cache entry
-                await session.execute(
-                    delete(CachedResponse).where(CachedResponse.cache_key == key)
-                )
-
-                # Create new cache entry
-                cached = CachedResponse(
-                    cache_key=key,
-                    response_data=json.dumps(value),
-                    expires_at=expires_at
-                )
-                session.add(cached)
-                await session.commit()
-
-                return True
+            await self.backend.set(key, entry, entry.payload)
+            return True
         except Exception as e:
             logger.error(f"Cache set error: {e}")
             return False
 
+    async def set_many(
+        self,
+        values: Dict[str, Any],
+        validators: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+        expire_minutes: Optional[int] = None
+    ) -> bool:
+        """
+        Set several cached values in one backend write
+
+        validators optionally maps keys to their (etag, last_modified).
+        """
+        if expire_minutes is None:
+            expire_minutes = self.expire_minutes
+        validators = validators or {}
+        now = datetime.utcnow()
+        expires_at = now + timedelta(minutes=expire_minutes)
+
+        items = {}
+        for key, value in values.items():
+            payload = cache_codecs.dumps(value)
+            etag, last_modified = validators.get(key, (None, None))
+            entry = CacheEntry(
+                value=value,
+                expires_at=expires_at,
+                etag=etag,
+                last_modified=last_modified,
+                size=len(payload),
+                created_at=now,
+                payload=payload
+            )
+            self.memory.set(key, entry, entry.expires_at, entry.size)
+            items[key] = (entry, payload)
+
+        try:
+            await self.backend.set_many(items)
+            return True
+        except Exception as e:
+            logger.error(f"Cache set_many error: {e}")
+            return False
+
     async def delete(self, key: str) -> bool:
         """Delete cached value"""
+        self.memory.delete(key)
         try:
-            async with async_session_maker() as session:
-                await session.execute(
-                    delete(CachedResponse).where(CachedResponse.cache_key == key)
-                )
-                await session.commit()
-                return True
+            await self.backend.delete(key)
+            return True
         except Exception as e:
             logger.error(f"Cache delete error: {e}")
             return False
 
     async def clear_expired(self) -> int:
-        """Clear expired cache entries"""
+        """Clear entries that expired longer than the retention period ago"""
         try:
-            async with async_session_maker() as session:
-                result = await session.execute(
-                    delete(CachedResponse).where(
-                        CachedResponse.expires_at <= datetime.utcnow()
-                    )
-                )
-                await session.commit()
-                return result.rowcount
+            cutoff = datetime.utcnow() - timedelta(hours=self.retention_hours)
+            return await self.backend.clear_expired(cutoff)
         except Exception as e:
             logger.error(f"Cache clear error: {e}")
             return 0
 
+    async def evict(self) -> int:
+        """Evict entries beyond CACHE_MAX_ENTRIES by CACHE_EVICTION_POLICY"""
+        try:
+            return await self.backend.evict(
+                settings.CACHE_MAX_ENTRIES, settings.CACHE_EVICTION_POLICY
+            )
+        except Exception as e:
+            logger.error(f"Cache eviction error: {e}")
+            return 0
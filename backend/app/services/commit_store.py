@@ -0,0 +1,221 @@
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+import logging
+
+from app.config import settings
+from app.database import async_session_maker, delete_in_batches, CommitSegment, StoredCommit
+from app.models.schemas import Commit
+
+logger = logging.getLogger(__name__)
+
+
+def parse_commit_date(date: str) -> datetime:
+    """Parse a GitHub timestamp into a naive UTC datetime"""
+    parsed = datetime.fromisoformat(date.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _days(since: datetime, until: datetime) -> List[date]:
+    """UTC days overlapping since..until"""
+    days = []
+    day = since.date()
+    while _day_start(day) < until:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def missing_window(
+    segments: Dict[date, datetime],
+    since: datetime,
+    until: datetime,
+    overlap: timedelta
+) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Window that must be fetched so every day of since..until is stored
+
+    segments maps each stored day to its synced_until. Returns None when
+    nothing is missing. The window starts at the first incomplete day, or at
+    its high-water mark less overlap, and ends with the last incomplete day.
+    """
+    incomplete = []
+    for day in _days(since, until):
+        needed_until = min(_day_start(day + timedelta(days=1)), until)
+        synced_until = segments.get(day)
+        if synced_until is None or synced_until < needed_until:
+            incomplete.append(day)
+
+    if not incomplete:
+        return None
+
+    first, last = incomplete[0], incomplete[-1]
+    fetch_since = _day_start(first)
+    if first in segments:
+        fetch_since = max(fetch_since, segments[first] - overlap)
+    fetch_until = min(_day_start(last + timedelta(days=1)), until)
+    return fetch_since, fetch_until
+
+
+class CommitStore:
+    """
+    Commit history stored per repository, author and UTC day
+
+    Days that ended before they were fetched never change and are served
+    from the store until they are pruned; the current day is topped up from
+    its high-water mark. Any window is assembled from the stored days.
+    """
+
+    @staticmethod
+    def _author_key(author: Optional[str]) -> str:
+        return (author or "").lower()
+
+    async def get_segments(
+        self,
+        repositories: List[str],
+        author: Optional[str],
+        since: datetime,
+        until: datetime
+    ) -> Dict[str, Dict[date, datetime]]:
+        """Get the stored days within since..until for several repositories"""
+        if not repositories:
+            return {}
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(CommitSegment).where(
+                        CommitSegment.author == self._author_key(author),
+                        CommitSegment.repository.in_(repositories),
+                        CommitSegment.day >= since.date(),
+                        CommitSegment.day <= until.date()
+                    )
+                )
+                segments: Dict[str, Dict[date, datetime]] = {}
+                for row in result.scalars():
+                    segments.setdefault(row.repository, {})[row.day] = row.synced_until
+                return segments
+        except Exception as e:
+            logger.error(f"Error reading commit segments: {e}")
+            return {}
+
+    async def get_commits(
+        self,
+        repository: str,
+        author: Optional[str],
+        since: datetime,
+        until: datetime
+    ) -> List[Commit]:
+        """Get stored commits within a window, newest first"""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(StoredCommit.commit_data).where(
+                    StoredCommit.repository == repository,
+                    StoredCommit.author == self._author_key(author),
+                    StoredCommit.committed_at >= since,
+                    StoredCommit.committed_at <= until
+                ).order_by(StoredCommit.committed_at.desc())
+            )
+            return [Commit(**json.loads(data)) for data in result.scalars()]
+
+    async def save(
+        self,
+        repository: str,
+        author: Optional[str],
+        commits: List[Commit],
+        since: datetime,
+        until: datetime
+    ) -> bool:
+        """Store commits fetched for since..until and mark the days they cover"""
+        author_key = self._author_key(author)
+        days = _days(since, until)
+        try:
+            async with async_session_maker() as session:
+                # Overlapping fetches return commits that are already stored
+                known = set()
+                if commits:
+                    known = set((await session.execute(
+                        select(StoredCommit.sha).where(
+                            StoredCommit.repository == repository,
+                            StoredCommit.author == author_key,
+                            StoredCommit.sha.in_([c.sha for c in commits])
+                        )
+                    )).scalars())
+
+                for commit in commits:
+                    if commit.sha in known:
+                        continue
+                    known.add(commit.sha)
+                    session.add(StoredCommit(
+                        repository=repository,
+                        author=author_key,
+                        sha=commit.sha,
+                        committed_at=parse_commit_date(commit.date),
+                        commit_data=commit.model_dump_json()
+                    ))
+
+                segments = {}
+                if days:
+                    result = await session.execute(
+                        select(CommitSegment).where(
+                            CommitSegment.repository == repository,
+                            CommitSegment.author == author_key,
+                            CommitSegment.day >= days[0],
+                            CommitSegment.day <= days[-1]
+                        )
+                    )
+                    segments = {row.day: row for row in result.scalars()}
+
+                for day in days:
+                    synced_until = min(_day_start(day + timedelta(days=1)), until)
+                    segment = segments.get(day)
+                    if segment is None:
+                        # A day fetched from part way through is not stored
+                        if since > _day_start(day):
+                            continue
+                        session.add(CommitSegment(
+                            repository=repository,
+                            author=author_key,
+                            day=day,
+                            synced_until=synced_until
+                        ))
+                    elif since <= max(_day_start(day), segment.synced_until):
+                        segment.synced_until = max(segment.synced_until, synced_until)
+
+                await session.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error storing commits for {repository}: {e}")
+            return False
+
+    async def prune(self, before: datetime) -> int:
+        """
+        Delete stored history for days before the day of before
+
+        Segments go first, so a day is never marked stored without its
+        commits. Returns the number of commits deleted.
+        """
+        cutoff = before.date()
+        try:
+            async with async_session_maker() as session:
+                await delete_in_batches(
+                    session,
+                    CommitSegment,
+                    CommitSegment.day < cutoff,
+                    batch_size=settings.JANITOR_BATCH_SIZE
+                )
+                return await delete_in_batches(
+                    session,
+                    StoredCommit,
+                    StoredCommit.committed_at < _day_start(cutoff),
+                    batch_size=settings.JANITOR_BATCH_SIZE
+                )
+        except Exception as e:
+            logger.error(f"Error pruning stored commits: {e}")
+            return 0
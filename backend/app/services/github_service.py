@@ -1,25 +1,66 @@
+import asyncio
 import httpx
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
 
 from app.config import settings
 from app.models.schemas import (
-    TimeRange, Repository, Commit, CommitActivity, UserActivity
+    TimeRange, Repository, Commit, CommitActivity, UserActivity, ContributionSummary
 )
+from app.services.cache_backends import CacheEntry
 from app.services.cache_service import CacheService
+from app.services.commit_store import CommitStore, missing_window, parse_commit_date
+from app.services.http_client import get_http_client
+from app.services.rate_limiter import RateLimitExceededError, rate_limiter
+from app.services.singleflight import singleflight
+from app.services.token_pool import token_pool, token_scope
 
 logger = logging.getLogger(__name__)
 
+# Contribution nodes are grouped per repository and day, so windows of at
+# most 100 days never need pagination of contributions(first: 100)
+CONTRIBUTION_WINDOW_DAYS = 100
+
+CONTRIBUTIONS_FIELDS = """
+      totalCommitContributions
+      commitContributionsByRepository(maxRepositories: 100) {
+        repository { nameWithOwner }
+        contributions(first: 100) { nodes { occurredAt commitCount } }
+      }
+"""
+
+
+HISTORY_FIELDS = """
+        pageInfo { hasNextPage endCursor }
+        nodes { oid messageHeadline authoredDate url author { name } }
+"""
+
+# Time ranges from narrowest to widest; narrower views are sliced from wider ones
+TIME_RANGE_ORDER = [TimeRange.DAY, TimeRange.WEEK, TimeRange.MONTH, TimeRange.YEAR]
+
+
+class GraphQLError(Exception):
+    """Error returned by the GitHub GraphQL API"""
+    pass
+
 
 class GitHubService:
     """Service for interacting with GitHub API"""
 
-    def __init__(self, access_token: Optional[str] = None):
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
         self.access_token = access_token
         self.base_url = settings.GITHUB_API_BASE_URL
         self.graphql_url = settings.GITHUB_GRAPHQL_URL
         self.cache = CacheService()
+        self.commit_store = CommitStore()
+
+        # Shared pooled client, created in the app lifespan
+        self.client = client or get_http_client()
 
         # Setup headers
         self.headers = {
@@ -29,9 +70,64 @@ class GitHubService:
         if access_token:
             self.headers["Authorization"] = f"token {access_token}"
 
-    def _get_time_range_dates(self, time_range: TimeRange) -> tuple[datetime, datetime]:
-        """Get start and end dates for time range"""
-        end_date = datetime.utcnow()
+        # Set once the GraphQL point budget drops too low for batching
+        self._graphql_budget_exhausted = False
+
+        # Results that depend on the token are cached per token, without
+        # putting the token itself into cache keys
+        if access_token:
+            self.token_scope = token_scope(access_token)
+        else:
+            self.token_scope = "public"
+
+    @property
+    def authenticated(self) -> bool:
+        """Whether requests carry a token, the user's or one from the pool"""
+        return bool(self.access_token or len(token_pool))
+
+    async def _send(
+        self,
+        request: Callable[[Dict[str, str]], Awaitable[httpx.Response]],
+        resource: str = "core"
+    ) -> httpx.Response:
+        """
+        Send a request built from auth headers under the rate limiter
+
+        Without a user token the least loaded token of the server-side pool
+        is used, moving on to the next one if it runs out, whether tracked
+        locally or reported by GitHub. Once every pooled token is exhausted
+        requests go out unauthenticated.
+        """
+        if self.access_token:
+            return await rate_limiter.send(
+                self.token_scope, lambda: request(self.headers), resource
+            )
+
+        for _ in range(len(token_pool)):
+            pooled = token_pool.acquire(resource)
+            if pooled is None:
+                break
+            try:
+                headers = {**self.headers, "Authorization": f"token {await pooled.get_value()}"}
+                return await rate_limiter.send(pooled.scope, lambda: request(headers), resource)
+            except RateLimitExceededError:
+                logger.info("Pooled GitHub token exhausted, trying the next one")
+            finally:
+                token_pool.release(pooled)
+
+        return await rate_limiter.send(self.token_scope, lambda: request(self.headers), resource)
+
+    def _cache_key(self, prefix: str, username: str, *parts: Any) -> str:
+        """Build a canonical cache key; GitHub usernames are case-insensitive"""
+        return ":".join([prefix, username.lower(), *(str(part) for part in parts)])
+
+    def _get_time_range_dates(
+        self,
+        time_range: TimeRange,
+        end_date: Optional[datetime] = None
+    ) -> tuple[datetime, datetime]:
+        """Get start and end dates for time range, ending now by default"""
+        end_date = end_date or datetime.utcnow()
 
         if time_range == TimeRange.DAY:
             start_date = end_date - timedelta(days=1)
@@ -44,85 +140,376 @@ class GitHubService:
 
         return start_date, end_date
 
-    async def get_user_info(self, username: str) -> Dict[str, Any]:
-        """Get user information"""
-        cache_key = f"user_info:{username}"
+    async def _graphql(
+        self,
+        query: str,
+        variables: Dict[str, Any],
+        allow_partial: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run a GraphQL query and return its data
 
-        # Try cache first
-        cached = await self.cache.get(cache_key)
-        if cached:
-            return cached
+        With allow_partial, errors for individual fields (such as a missing
+        aliased repository) are logged and the remaining data is returned.
+        """
+        response = await self._send(
+            lambda headers: self.client.post(
+                self.graphql_url,
+                headers=headers,
+                json={"query": query, "variables": variables}
+            ),
+            resource="graphql"
+        )
+        response.raise_for_status()
+        body = response.json()
+
+        errors = body.get("errors")
+        if errors and allow_partial and body.get("data"):
+            for error in errors:
+                logger.warning(f"GraphQL error: {error.get('message')}")
+        elif errors:
+            if any(error.get("type") == "NOT_FOUND" for error in errors):
+                raise ValueError(errors[0].get("message", "Not found"))
+            raise GraphQLError("; ".join(error.get("message", "") for error in errors))
+
+        return body.get("data") or {}
+
+    async def get_contribution_summary(
+        self,
+        username: str,
+        since: datetime,
+        until: datetime
+    ) -> ContributionSummary:
+        """
+        Get daily commit counts from contributionsCollection in one request
+
+        The window is split into aliased collections of at most
+        CONTRIBUTION_WINDOW_DAYS days. Requires an access token or
+        pooled server-side tokens.
+        """
+        if not self.authenticated:
+            raise ValueError("Access token required")
+
+        windows = []
+        window_start = since
+        while window_start < until:
+            window_end = min(window_start + timedelta(days=CONTRIBUTION_WINDOW_DAYS), until)
+            windows.append((window_start, window_end))
+            window_start = window_end
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/users/{username}",
-                headers=self.headers
+        variable_defs = ["$login: String!"]
+        selections = []
+        variables: Dict[str, Any] = {"login": username}
+        for i, (window_start, window_end) in enumerate(windows):
+            variable_defs.append(f"$from{i}: DateTime!, $to{i}: DateTime!")
+            selections.append(
+                f"c{i}: contributionsCollection(from: $from{i}, to: $to{i}) {{{CONTRIBUTIONS_FIELDS}}}"
             )
+            variables[f"from{i}"] = window_start.isoformat() + "Z"
+            variables[f"to{i}"] = window_end.isoformat() + "Z"
+
+        selection_block = "\n    ".join(selections)
+        query = (
+            f"query({', '.join(variable_defs)}) {{\n"
+            f"  user(login: $login) {{\n    {selection_block}\n  }}\n}}"
+        )
+        data = await self._graphql(query, variables)
+
+        user = data.get("user")
+        if user is None:
+            raise ValueError(f"User {username} not found")
+
+        total_commits = 0
+        commit_dates: Dict[str, int] = {}
+        repositories: List[str] = []
+        for i in range(len(windows)):
+            collection = user[f"c{i}"]
+            total_commits += collection["totalCommitContributions"]
+            for by_repo in collection["commitContributionsByRepository"]:
+                name = by_repo["repository"]["nameWithOwner"]
+                if name not in repositories:
+                    repositories.append(name)
+                for node in by_repo["contributions"]["nodes"]:
+                    occurred_at = datetime.fromisoformat(node["occurredAt"].replace("Z", "+00:00"))
+                    date_key = occurred_at.strftime("%Y-%m-%d")
+                    commit_dates[date_key] = commit_dates.get(date_key, 0) + node["commitCount"]
+
+        return ContributionSummary(
+            total_commits=total_commits,
+            activity_chart=[
+                CommitActivity(date=date, count=count)
+                for date, count in sorted(commit_dates.items())
+            ],
+            repositories=repositories
+        )
+
+    async def _try_contribution_summary(
+        self,
+        username: str,
+        since: datetime,
+        until: datetime
+    ) -> Optional[ContributionSummary]:
+        """Get the GraphQL contribution summary, or None to fall back to REST"""
+        if not (settings.GITHUB_USE_GRAPHQL and self.authenticated):
+            return None
+        try:
+            return await self.get_contribution_summary(username, since, until)
+        except Exception as e:
+            logger.warning(f"GraphQL contributions unavailable for {username}, using REST: {e}")
+            return None
+
+    async def _get_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        cache_key: Optional[str] = None,
+        prefetched: Optional[Dict[str, CacheEntry]] = None,
+        writes: Optional[Dict[str, tuple[Any, Optional[str], Optional[str]]]] = None
+    ) -> Optional[tuple[Any, Optional[int]]]:
+        """
+        GET a JSON resource, returning (data, last_page) or None for 404/409
+
+        With a cache key the response is cached together with its ETag and
+        Last-Modified headers. Once the entry expires it is revalidated with
+        If-None-Match/If-Modified-Since; a 304, which GitHub does not count
+        against the rate limit, just refreshes the cached copy.
+
+        Callers fetching many resources pass the cache entries they read in
+        one batch as prefetched, and collect (value, etag, last_modified)
+        in writes to store them together with _store_writes.
+        """
+        entry = await self._get_json_entry(url, params, cache_key, prefetched, writes)
+        if entry is None:
+            return None
+        return entry.value["data"], entry.value["last_page"]
+
+    async def _get_json_entry(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        cache_key: Optional[str] = None,
+        prefetched: Optional[Dict[str, CacheEntry]] = None,
+        writes: Optional[Dict[str, tuple[Any, Optional[str], Optional[str]]]] = None
+    ) -> Optional[CacheEntry]:
+        """
+        Like _get_json, returning the entry holding {"data", "last_page"}
 
-            if response.status_code == 404:
-                raise ValueError(f"User {username} not found")
+        The entry is the one cached under cache_key; a response that is not
+        cached (yet) comes back in an entry that is already expired.
+        """
+        if not cache_key:
+            entry = None
+        elif prefetched is not None:
+            entry = prefetched.get(cache_key)
+        else:
+            entry = await self.cache.get_entry(cache_key)
+        if entry and not entry.is_expired:
+            return entry
+
+        conditional = {}
+        if entry and entry.etag:
+            conditional["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            conditional["If-Modified-Since"] = entry.last_modified
+
+        response = await self._send(
+            lambda headers: self.client.get(url, headers={**headers, **conditional}, params=params)
+        )
+
+        if response.status_code == 304 and entry:
+            value = entry.value
+            stored = await self._store(cache_key, value, entry.etag, entry.last_modified, writes)
+        else:
+            # 404: missing user, owner or repo, 409: empty repository
+            if response.status_code in (404, 409):
+                return None
 
             response.raise_for_status()
-            data = response.json()
+            value = {"data": response.json(), "last_page": self._last_page(response)}
+            stored = None
+            if cache_key:
+                stored = await self._store(
+                    cache_key,
+                    value,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    writes
+                )
+        return stored or CacheEntry(value=value, expires_at=datetime.utcnow())
 
-            # Cache the result
-            await self.cache.set(cache_key, data)
-            return data
+    async def _store(
+        self,
+        cache_key: str,
+        value: Any,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        writes: Optional[Dict[str, tuple[Any, Optional[str], Optional[str]]]]
+    ) -> Optional[CacheEntry]:
+        """
+        Cache a response now and return its entry, or add it to writes to be
+        stored in a batch
+        """
+        if writes is not None:
+            writes[cache_key] = (value, etag, last_modified)
+            return None
 
-    async def get_user_repos(self, username: str, include_private: bool = False) -> List[Repository]:
-        """Get user repositories"""
-        cache_key = f"user_repos:{username}:{include_private}"
+        entry = self.cache.make_entry(value, etag=etag, last_modified=last_modified)
+        await self.cache.put(cache_key, entry)
+        return entry
 
-        # Try cache first
-        cached = await self.cache.get(cache_key)
-        if cached:
-            return [Repository(**repo) for repo in cached]
+    async def _store_writes(
+        self,
+        writes: Dict[str, tuple[Any, Optional[str], Optional[str]]]
+    ) -> None:
+        """Cache responses collected by _get_json in one batch"""
+        if writes:
+            await self.cache.set_many(
+                {key: value for key, (value, _, _) in writes.items()},
+                validators={key: (etag, modified) for key, (_, etag, modified) in writes.items()}
+            )
 
-        repos = []
-        page = 1
-        per_page = 100
+    async def get_user_info(self, username: str) -> Dict[str, Any]:
+        """Get user information"""
+        return (await self._user_info_entry(username)).value["data"]
 
-        async with httpx.AsyncClient() as client:
-            while True:
-                params = {
-                    "per_page": per_page,
-                    "page": page,
-                    "sort": "updated",
-                    "direction": "desc"
-                }
+    async def _user_info_entry(self, username: str) -> CacheEntry:
+        """The entry holding user information, fetched once for concurrent callers"""
+        cache_key = self._cache_key("user", username)
+        return await singleflight.do(cache_key, lambda: self._fetch_user_info(username, cache_key))
 
-                # Use authenticated endpoint if token is available
-                if self.access_token and include_private:
-                    url = f"{self.base_url}/user/repos"
-                else:
-                    url = f"{self.base_url}/users/{username}/repos"
+    async def _fetch_user_info(self, username: str, cache_key: str) -> CacheEntry:
+        """Fetch user information, revalidating the cached copy"""
+        entry = await self._get_json_entry(f"{self.base_url}/users/{username}", cache_key=cache_key)
 
-                response = await client.get(url, headers=self.headers, params=params)
+        if entry is None:
+            raise ValueError(f"User {username} not found")
 
-                if response.status_code == 404:
-                    break
+        return entry
 
-                response.raise_for_status()
-                data = response.json()
+    async def _get_page(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        page: int,
+        cache_key: Optional[str] = None,
+        prefetched: Optional[Dict[str, CacheEntry]] = None,
+        writes: Optional[Dict[str, tuple[Any, Optional[str], Optional[str]]]] = None
+    ) -> Optional[tuple[List[Any], Optional[int]]]:
+        """Fetch one page of a paginated endpoint, or None if it has no content"""
+        return await self._get_json(
+            url,
+            params={**params, "page": page},
+            cache_key=self._page_key(cache_key, page) if cache_key else None,
+            prefetched=prefetched,
+            writes=writes
+        )
 
-                if not data:
-                    break
+    @staticmethod
+    def _page_key(cache_key: str, page: int) -> str:
+        return f"{cache_key}:page{page}"
 
-                repos.extend(data)
+    def _last_page(self, response: httpx.Response) -> Optional[int]:
+        """Read the last page number from the Link header"""
+        last = response.links.get("last")
+        if not last:
+            return None
+        page = httpx.URL(last["url"]).params.get("page")
+        return int(page) if page and page.isdigit() else None
 
-                # GitHub paginates at 100 per page
-                if len(data) < per_page:
-                    break
+    async def get_all_pages(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        per_page: int = 100,
+        cache_key: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Fetch every page of a paginated REST endpoint
+
+        The first page's Link header tells how many pages there are, so the
+        rest are fetched concurrently (GITHUB_PAGE_CONCURRENCY at a time) and
+        joined in page order. Without a Link header pages are walked serially.
+        With a cache key every page is cached and revalidated on its own;
+        the cache entries of the concurrent pages are read and written in
+        one batch each.
+        """
+        params = {**params, "per_page": per_page}
+
+        first = await self._get_page(url, params, 1, cache_key)
+        if first is None:
+            return []
+        items, last_page = first
+        items = list(items)
+        if len(items) < per_page:
+            return items
 
+        if last_page is None:
+            page = 2
+            while True:
+                result = await self._get_page(url, params, page, cache_key)
+                if result is None or not result[0]:
+                    break
+                items.extend(result[0])
+                if len(result[0]) < per_page:
+                    break
                 page += 1
+            return items
+
+        semaphore = asyncio.Semaphore(settings.GITHUB_PAGE_CONCURRENCY)
+        pages = range(2, last_page + 1)
+        prefetched, writes = None, None
+        if cache_key:
+            prefetched = await self.cache.get_entries([self._page_key(cache_key, page) for page in pages])
+            writes = {}
 
-        # Convert to Repository models
-        repo_models = [Repository(**repo) for repo in repos]
+        async def fetch(page: int) -> List[Any]:
+            async with semaphore:
+                result = await self._get_page(url, params, page, cache_key, prefetched, writes)
+            return result[0] if result else []
+
+        results = await asyncio.gather(*(fetch(page) for page in pages))
+        if writes:
+            await self._store_writes(writes)
+        for page_items in results:
+            items.extend(page_items)
+        return items
+
+    async def get_user_repos(self, username: str, include_private: bool = False) -> List[Repository]:
+        """Get user repositories"""
+        cache_key = self._cache_key("user_repos", username, include_private, self.token_scope)
+        cached = await self.cache.get_or_refresh(
+            cache_key,
+            lambda entry: self._fetch_user_repos(username, include_private, cache_key)
+        )
+        # Validated before they were cached, so skip validating them again
+        return [Repository.model_construct(**repo) for repo in cached]
+
+    async def _fetch_user_repos(
+        self,
+        username: str,
+        include_private: bool,
+        cache_key: str
+    ) -> List[Dict[str, Any]]:
+        """Fetch user repositories and cache them"""
+        # Use authenticated endpoint if token is available
+        if self.access_token and include_private:
+            url = f"{self.base_url}/user/repos"
+        else:
+            url = f"{self.base_url}/users/{username}/repos"
+
+        repos = await self.get_all_pages(
+            url,
+            {"sort": "updated", "direction": "desc"},
+            cache_key=self._cache_key("repos_page", username, include_private, self.token_scope)
+        )
+
+        # Validate once, then cache by alias so cached repos load back intact
+        repo_data = [Repository(**repo).model_dump(by_alias=True) for repo in repos]
 
         # Cache the result
-        await self.cache.set(cache_key, [repo.model_dump() for repo in repo_models])
+        await self.cache.set(cache_key, repo_data)
 
-        return repo_models
+        return repo_data
 
     async def get_repo_commits(
         self,
@@ -132,154 +519,747 @@ class GitHubService:
         until: datetime,
         author: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get commits for a repository within time range"""
-        commits = []
-        page = 1
-        per_page = 100
+        """
+        Get commits for a repository within time range
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            while True:
-                params = {
-                    "per_page": per_page,
-                    "page": page,
-                    "since": since.isoformat() + "Z",
-                    "until": until.isoformat() + "Z"
-                }
+        Errors are raised rather than returning a truncated list, so callers
+        can report the repository as missing.
+        """
+        params = {
+            "since": since.isoformat() + "Z",
+            "until": until.isoformat() + "Z"
+        }
 
-                if author:
-                    params["author"] = author
+        if author:
+            params["author"] = author
 
-                try:
-                    response = await client.get(
-                        f"{self.base_url}/repos/{owner}/{repo}/commits",
-                        headers=self.headers,
-                        params=params
-                    )
+        return await self.get_all_pages(f"{self.base_url}/repos/{owner}/{repo}/commits", params)
 
-                    if response.status_code == 409:  # Empty repository
-                        break
+    async def _fetch_repo_commits(
+        self,
+        repo: Repository,
+        since: datetime,
+        until: datetime,
+        author: Optional[str],
+        semaphore: asyncio.Semaphore
+    ) -> List[Commit]:
+        """
+        Fetch commits for one repository under the shared concurrency limit
 
-                    if response.status_code == 404:
-                        break
+        Rate limit waits that would outlast GITHUB_REPO_TIMEOUT raise
+        RateLimitExceededError at once instead of running into the timeout.
+        """
+        owner, repo_name = repo.full_name.split("/")
+        async with semaphore:
+            with rate_limiter.deadline(settings.GITHUB_REPO_TIMEOUT):
+                commits_data = await asyncio.wait_for(
+                    self.get_repo_commits(owner, repo_name, since, until, author=author),
+                    timeout=settings.GITHUB_REPO_TIMEOUT
+                )
+        return self._parse_commits(commits_data, repo, author)
 
-                    response.raise_for_status()
-                    data = response.json()
+    def _parse_history_nodes(
+        self,
+        nodes: List[Dict[str, Any]],
+        repo: Repository,
+        username: Optional[str]
+    ) -> List[Commit]:
+        """Convert GraphQL commit history nodes into Commit models"""
+        return [
+            Commit(
+                sha=node["oid"],
+                message=node.get("messageHeadline", "")[:100],
+                author=(node.get("author") or {}).get("name") or username or "",
+                # authoredDate keeps the author's offset; REST dates are UTC
+                date=parse_commit_date(node["authoredDate"]).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                html_url=node.get("url", ""),
+                repository=repo.full_name
+            )
+            for node in nodes
+        ]
 
-                    if not data:
-                        break
+    async def fetch_history_batch(
+        self,
+        repos: List[Repository],
+        since: datetime,
+        until: datetime,
+        author_id: str,
+        username: Optional[str] = None,
+        windows: Optional[Dict[str, Tuple[datetime, datetime]]] = None
+    ) -> List[Optional[List[Commit]]]:
+        """
+        Fetch commit history for several repositories in one GraphQL query
 
-                    commits.extend(data)
+        Each repository is an aliased field with its own since/until, taken
+        from windows by full name when given; later pages only query the
+        aliases that still have a next page. Returns commits in the order of
+        repos, or None for a repository whose field failed (it comes back
+        null with an error), so it is not mistaken for an empty one.
+        """
+        windows = windows or {}
+        results: List[Optional[List[Commit]]] = [[] for _ in repos]
+        cursors: Dict[int, Optional[str]] = {i: None for i in range(len(repos))}
 
-                    if len(data) < per_page:
-                        break
+        while cursors:
+            variable_defs = ["$authorId: ID!"]
+            selections = []
+            variables: Dict[str, Any] = {"authorId": author_id}
+            for i, cursor in cursors.items():
+                owner, name = repos[i].full_name.split("/")
+                repo_since, repo_until = windows.get(repos[i].full_name, (since, until))
+                variable_defs.append(
+                    f"$owner{i}: String!, $name{i}: String!, $since{i}: GitTimestamp!, "
+                    f"$until{i}: GitTimestamp!, $cursor{i}: String"
+                )
+                selections.append(
+                    f"r{i}: repository(owner: $owner{i}, name: $name{i}) {{ "
+                    f"defaultBranchRef {{ target {{ ... on Commit {{ "
+                    f"history(first: 100, since: $since{i}, until: $until{i}, "
+                    f"author: {{id: $authorId}}, after: $cursor{i}) {{{HISTORY_FIELDS}}} }} }} }} }}"
+                )
+                variables.update({
+                    f"owner{i}": owner,
+                    f"name{i}": name,
+                    f"since{i}": repo_since.isoformat() + "Z",
+                    f"until{i}": repo_until.isoformat() + "Z",
+                    f"cursor{i}": cursor,
+                })
 
-                    page += 1
+            selection_block = "\n  ".join(selections)
+            query = (
+                f"query({', '.join(variable_defs)}) {{\n"
+                f"  rateLimit {{ cost remaining resetAt }}\n"
+                f"  {selection_block}\n}}"
+            )
+            data = await self._graphql(query, variables, allow_partial=True)
+            self._check_graphql_budget(data.get("rateLimit"))
 
-                except httpx.HTTPError as e:
-                    logger.error(f"Error fetching commits for {owner}/{repo}: {e}")
-                    break
+            next_cursors: Dict[int, Optional[str]] = {}
+            for i in cursors:
+                repository = data.get(f"r{i}")
+                if repository is None:
+                    results[i] = None
+                    continue
+                ref = repository.get("defaultBranchRef")
+                # Empty repositories have no default branch, hence no history
+                if not ref:
+                    continue
+                history = ref["target"]["history"]
+                results[i].extend(self._parse_history_nodes(history["nodes"], repos[i], username))
+                if history["pageInfo"]["hasNextPage"]:
+                    next_cursors[i] = history["pageInfo"]["endCursor"]
+            cursors = next_cursors
+
+        return results
+
+    def _check_graphql_budget(self, rate_limit: Optional[Dict[str, Any]]) -> None:
+        """Stop batching through GraphQL once its point budget runs low"""
+        if not rate_limit:
+            return
+        if rate_limit["remaining"] < settings.GITHUB_GRAPHQL_MIN_REMAINING:
+            logger.warning(
+                f"GraphQL budget low ({rate_limit['remaining']} points left, "
+                f"resets {rate_limit.get('resetAt')}), using REST for remaining repos"
+            )
+            self._graphql_budget_exhausted = True
+
+    def _use_graphql_history(self, author_id: Optional[str]) -> bool:
+        """Whether commit lists can be fetched through batched GraphQL"""
+        return bool(
+            settings.GITHUB_USE_GRAPHQL
+            and self.authenticated
+            and author_id
+            and not self._graphql_budget_exhausted
+        )
+
+    async def iter_repos_commits(
+        self,
+        repos: List[Repository],
+        since: datetime,
+        until: datetime,
+        author: Optional[str] = None,
+        author_id: Optional[str] = None,
+        windows: Optional[Dict[str, Tuple[datetime, datetime]]] = None
+    ) -> AsyncIterator[tuple[int, Repository, List[Commit]]]:
+        """
+        Fetch commits for many repositories concurrently
+
+        Yields (index, repo, commits) as each repository completes. With a token
+        and the author's node ID, repositories are fetched in batched GraphQL
+        queries; batches, or repositories within a batch, that fail fall back
+        to REST. Repositories that fail or time out are logged and skipped.
+        windows overrides since/until for individual repositories by full
+        name.
+        """
+        windows = windows or {}
+        semaphore = asyncio.Semaphore(settings.GITHUB_MAX_CONCURRENCY)
+
+        async def fetch_rest(index: int, repo: Repository):
+            repo_since, repo_until = windows.get(repo.full_name, (since, until))
+            try:
+                commits = await self._fetch_repo_commits(
+                    repo, repo_since, repo_until, author, semaphore
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out fetching commits for {repo.full_name}")
+                commits = None
+            except Exception as e:
+                logger.error(f"Error processing repo {repo.full_name}: {e}")
+                commits = None
+            return [(index, repo, commits)]
+
+        async def fetch_batch(start: int, batch: List[Repository]):
+            batch_commits: List[Optional[List[Commit]]] = [None] * len(batch)
+            try:
+                async with semaphore:
+                    # Re-checked here since an earlier batch may have used up the budget
+                    if self._use_graphql_history(author_id):
+                        with rate_limiter.deadline(settings.GITHUB_REPO_TIMEOUT):
+                            batch_commits = await asyncio.wait_for(
+                                self.fetch_history_batch(
+                                    batch, since, until, author_id, author, windows
+                                ),
+                                timeout=settings.GITHUB_REPO_TIMEOUT
+                            )
+            except Exception as e:
+                logger.warning(f"GraphQL history batch failed, using REST: {e!r}")
+
+            # Repositories the batch did not return are fetched through REST
+            failed = [i for i, commits in enumerate(batch_commits) if commits is None]
+            results = await asyncio.gather(*(fetch_rest(start + i, batch[i]) for i in failed))
+            fetched = [
+                (start + i, repo, commits)
+                for i, (repo, commits) in enumerate(zip(batch, batch_commits))
+                if commits is not None
+            ]
+            return fetched + [item for result in results for item in result]
+
+        if self._use_graphql_history(author_id):
+            size = settings.GITHUB_GRAPHQL_BATCH_SIZE
+            coros = [fetch_batch(start, repos[start:start + size]) for start in range(0, len(repos), size)]
+        else:
+            coros = [fetch_rest(i, repo) for i, repo in enumerate(repos)]
+
+        tasks = [asyncio.create_task(coro) for coro in coros]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for index, repo, commits in await next_done:
+                    if commits is not None:
+                        yield index, repo, commits
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _schedule_repos(self, repos: List[Repository], since: datetime) -> List[Repository]:
+        """
+        Pick the repositories worth fetching commits from
+
+        Skips empty repositories and those last pushed before since, orders
+        the rest by push recency and keeps at most GITHUB_REPO_BUDGET.
+        Repositories without pushed_at are kept after the others.
+        """
+        candidates = [
+            repo for repo in repos
+            if repo.size != 0
+            and (repo.pushed_at is None or parse_commit_date(repo.pushed_at) >= since)
+        ]
+        candidates.sort(key=lambda repo: repo.pushed_at or "", reverse=True)
+
+        scheduled = candidates[:settings.GITHUB_REPO_BUDGET]
+        logger.info(
+            f"Fetching commits from {len(scheduled)} of {len(repos)} repos "
+            f"({len(repos) - len(candidates)} inactive or empty)"
+        )
+        return scheduled
+
+    async def iter_synced_commits(
+        self,
+        repos: List[Repository],
+        since: datetime,
+        until: datetime,
+        author: Optional[str] = None,
+        author_id: Optional[str] = None
+    ) -> AsyncIterator[tuple[int, Repository, List[Commit]]]:
+        """
+        Fetch commits for many repositories, reusing stored day segments
+
+        Each repository only fetches the days of since..until that are not
+        stored yet, starting from the high-water mark (less an overlap) of a
+        partially stored day, and the result is merged into the store.
+        Repositories with every day stored make no request. Yields like
+        iter_repos_commits.
+        """
+        names = [repo.full_name for repo in repos]
+        segments = await self.commit_store.get_segments(names, author, since, until)
+        overlap = timedelta(minutes=settings.GITHUB_SYNC_OVERLAP_MINUTES)
+
+        to_fetch: List[int] = []
+        windows: Dict[str, Tuple[datetime, datetime]] = {}
+        for index, repo in enumerate(repos):
+            window = missing_window(segments.get(repo.full_name, {}), since, until, overlap)
+            if window is None:
+                yield index, repo, await self.commit_store.get_commits(
+                    repo.full_name, author, since, until
+                )
+            else:
+                to_fetch.append(index)
+                windows[repo.full_name] = window
+
+        async for position, repo, commits in self.iter_repos_commits(
+            [repos[index] for index in to_fetch],
+            since,
+            until,
+            author=author,
+            author_id=author_id,
+            windows=windows
+        ):
+            fetch_since, fetch_until = windows[repo.full_name]
+            if await self.commit_store.save(
+                repo.full_name, author, commits, fetch_since, fetch_until
+            ):
+                commits = await self.commit_store.get_commits(repo.full_name, author, since, until)
+            else:
+                commits = [
+                    commit for commit in commits
+                    if since <= parse_commit_date(commit.date) <= until
+                ]
+            yield to_fetch[position], repo, commits
+
+    def _parse_commits(
+        self,
+        commits_data: List[Dict[str, Any]],
+        repo: Repository,
+        username: Optional[str]
+    ) -> List[Commit]:
+        """Convert raw GitHub commit payloads into Commit models"""
+        commits = []
+        for commit_data in commits_data:
+            # Extract commit info
+            commit_info = commit_data.get("commit", {})
+            author_info = commit_info.get("author", {})
 
+            # Check if commit is by the user
+            if not (author_info.get("name") or author_info.get("email")):
+                continue
+
+            commit_date_str = author_info.get("date", "")
+            if not commit_date_str:
+                continue
+
+            commits.append(Commit(
+                sha=commit_data.get("sha", ""),
+                message=commit_info.get("message", "").split("\n")[0][:100],
+                author=author_info.get("name", username),
+                date=commit_date_str,
+                html_url=commit_data.get("html_url", ""),
+                repository=repo.full_name
+            ))
         return commits
 
+    def _build_activity_chart(self, commits: List[Commit]) -> List[CommitActivity]:
+        """Count commits per day"""
+        commit_dates: Dict[str, int] = {}
+        for commit in commits:
+            commit_date = datetime.fromisoformat(commit.date.replace("Z", "+00:00"))
+            date_key = commit_date.strftime("%Y-%m-%d")
+            commit_dates[date_key] = commit_dates.get(date_key, 0) + 1
+
+        return [
+            CommitActivity(date=date, count=count)
+            for date, count in sorted(commit_dates.items())
+        ]
+
+    def _activity_window(
+        self,
+        time_range: TimeRange,
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> tuple[Optional[datetime], str]:
+        """Resolve an activity request to its since and cache key suffix"""
+        if since is None and until is None:
+            return None, time_range.value
+        if since is None:
+            since, _ = self._get_time_range_dates(time_range, until)
+        if until is not None and since >= until:
+            raise ValueError("since must be before until")
+        if until is None and since >= datetime.utcnow():
+            raise ValueError("since must be in the past")
+        return since, f"{since.isoformat()}:{until.isoformat() if until else 'now'}"
+
+    async def _cached_activity(
+        self,
+        username: str,
+        time_range: TimeRange,
+        cache_key: str,
+        custom_window: bool
+    ) -> Tuple[Optional[CacheEntry], Optional[CacheEntry]]:
+        """
+        Read the entry for cache_key once, with the activity it can serve
+
+        Returns the entry cached under cache_key (fresh or not) and the
+        entry to serve: that entry when fresh, otherwise a slice of a wider
+        cached time range in an entry that is already expired, since it is
+        not cached under cache_key. The second item is None when neither
+        exists.
+        """
+        if custom_window:
+            entry = await self.cache.get_entry(cache_key)
+            return entry, entry if entry is not None and not entry.is_expired else None
+
+        # Read the requested range and every wider one together
+        wider_keys = self._wider_activity_keys(username, time_range)
+        entries = await self.cache.get_entries([cache_key, *wider_keys.values()])
+        entry = entries.get(cache_key)
+        if entry is not None and not entry.is_expired:
+            return entry, entry
+
+        fresh = {key: wider.value for key, wider in entries.items() if not wider.is_expired}
+        activity = await self._roll_up_activity(username, time_range, wider_keys, fresh)
+        if activity is None:
+            return entry, None
+        return entry, CacheEntry(value=activity, expires_at=datetime.utcnow())
+
+    async def _activity_entry(
+        self,
+        username: str,
+        time_range: TimeRange,
+        cache_key: str,
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> CacheEntry:
+        """Activity as cached: fresh, rolled up from a wider range, or computed"""
+        entry, cached = await self._cached_activity(
+            username, time_range, cache_key, since is not None
+        )
+        if cached is not None:
+            return cached
+        return await self.cache.get_or_refresh_entry(
+            cache_key,
+            entry,
+            lambda previous: self._fetch_user_activity(username, time_range, cache_key, since, until)
+        )
+
     async def get_user_activity(
         self,
         username: str,
-        time_range: TimeRange
+        time_range: TimeRange,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
     ) -> UserActivity:
-        """Get user activity including repos and commits"""
-        cache_key = f"user_activity:{username}:{time_range.value}:{self.access_token or 'public'}"
+        """
+        Get user activity including repos and commits
 
-        # Try cache first
-        cached = await self.cache.get(cache_key)
-        if cached:
-            return UserActivity(**cached)
+        since/until (naive UTC) select an arbitrary window instead of
+        time_range ending now; a missing since means time_range before until.
+        """
+        since, window = self._activity_window(time_range, since, until)
+        cache_key = self._cache_key("user_activity", username, window, self.token_scope)
+        entry = await self._activity_entry(username, time_range, cache_key, since, until)
+        return UserActivity(**entry.value)
 
-        # Get time range
-        start_date, end_date = self._get_time_range_dates(time_range)
+    async def get_user_activity_entry(
+        self,
+        username: str,
+        time_range: TimeRange,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> CacheEntry:
+        """
+        Get user activity as a cache entry, ready to send
 
-        # Get user info
-        user_info = await self.get_user_info(username)
+        A fresh cache hit is returned as is, with the bytes it was cached as,
+        without decoding or validating anything. Otherwise the activity is
+        computed and the entry it was cached under is returned; stale
+        activity comes back in its expired entry, and activity rolled up
+        from a wider range in an entry that is already expired.
+        """
+        since, window = self._activity_window(time_range, since, until)
+        cache_key = self._cache_key("user_activity", username, window, self.token_scope)
+        return await self._activity_entry(username, time_range, cache_key, since, until)
 
-        # Get repositories
-        repos = await self.get_user_repos(username, include_private=bool(self.access_token))
+    async def get_user_info_entry(self, username: str) -> CacheEntry:
+        """Get user information as a cache entry, with the expiry of its cached copy"""
+        entry = await self._user_info_entry(username)
 
-        # Get commits from all repos
-        all_commits: List[Commit] = []
-        commit_dates: Dict[str, int] = {}
+        # Cached with its pagination; only the user itself is sent
+        return CacheEntry(
+            value=entry.value["data"],
+            expires_at=entry.expires_at,
+            created_at=entry.created_at
+        )
 
-        for repo in repos[:50]:  # Limit to 50 most recent repos to avoid rate limits
-            try:
-                owner, repo_name = repo.full_name.split("/")
-                commits_data = await self.get_repo_commits(
-                    owner,
-                    repo_name,
-                    start_date,
-                    end_date,
-                    author=username
+    async def stream_user_activity(
+        self,
+        username: str,
+        time_range: TimeRange,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Get user activity as progress events while it is computed
+
+        Yields the events of _iter_user_activity. The computation is
+        registered with singleflight under the cache key, so other requests
+        for the same activity join it rather than starting their own.
+        Cached activity, or activity another request is already computing,
+        is yielded as a single summary event.
+        """
+        since, window = self._activity_window(time_range, since, until)
+        cache_key = self._cache_key("user_activity", username, window, self.token_scope)
+
+        _, cached = await self._cached_activity(username, time_range, cache_key, since is not None)
+        if cached is None and not singleflight.in_flight(cache_key):
+            events: asyncio.Queue = asyncio.Queue()
+
+            async def compute() -> CacheEntry:
+                try:
+                    return await self._fetch_user_activity(
+                        username, time_range, cache_key, since, until, events
+                    )
+                finally:
+                    # Marks the end of the events, however the computation ended
+                    events.put_nowait(None)
+
+            task = singleflight.start(cache_key, compute)
+            while (event := await events.get()) is not None:
+                yield event
+            # Raises the computation's error, if any
+            await asyncio.shield(task)
+            return
+
+        if cached is None:
+            cached = await singleflight.do(
+                cache_key,
+                lambda: self._fetch_user_activity(username, time_range, cache_key, since, until)
+            )
+        yield {"event": "summary", "data": cached.value}
+
+    def _wider_activity_keys(self, username: str, time_range: TimeRange) -> Dict[TimeRange, str]:
+        """Activity cache keys of the ranges wider than time_range, narrowest first"""
+        wider_ranges = TIME_RANGE_ORDER[TIME_RANGE_ORDER.index(time_range) + 1:]
+        return {
+            wider: self._cache_key("user_activity", username, wider.value, self.token_scope)
+            for wider in wider_ranges
+        }
+
+    async def _roll_up_activity(
+        self,
+        username: str,
+        time_range: TimeRange,
+        wider_keys: Dict[TimeRange, str],
+        cached: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Slice activity for time_range out of a wider range's activity
+
+        Uses the narrowest wider range among the fresh cached values, or
+        waits for one that is being computed. Returns None when neither
+        exists.
+        """
+        for key in wider_keys.values():
+            if key in cached:
+                return self._slice_activity(cached[key], time_range)
+
+        for wider, key in wider_keys.items():
+            if singleflight.in_flight(key):
+                logger.debug(f"Waiting for {key} to slice {time_range.value} activity")
+                entry = await singleflight.do(
+                    key, lambda: self._fetch_user_activity(username, wider, key)
                 )
+                return self._slice_activity(entry.value, time_range)
 
-                for commit_data in commits_data:
-                    # Extract commit info
-                    commit_info = commit_data.get("commit", {})
-                    author_info = commit_info.get("author", {})
-
-                    # Check if commit is by the user
-                    if author_info.get("name") or author_info.get("email"):
-                        commit_date_str = author_info.get("date", "")
-                        if commit_date_str:
-                            commit_date = datetime.fromisoformat(commit_date_str.replace("Z", "+00:00"))
-                            date_key = commit_date.strftime("%Y-%m-%d")
-                            commit_dates[date_key] = commit_dates.get(date_key, 0) + 1
-
-                            commit = Commit(
-                                sha=commit_data.get("sha", ""),
-                                message=commit_info.get("message", "").split("\n")[0][:100],
-                                author=author_info.get("name", username),
-                                date=commit_date_str,
-                                html_url=commit_data.get("html_url", ""),
-                                repository=repo.full_name
-                            )
-                            all_commits.append(commit)
+        return None
 
-            except Exception as e:
-                logger.error(f"Error processing repo {repo.full_name}: {e}")
-                continue
+    def _slice_activity(self, activity: Dict[str, Any], time_range: TimeRange) -> Dict[str, Any]:
+        """
+        Narrow cached activity to time_range, recounting its totals
+
+        When the wider activity lists every commit, the slice starts at the
+        exact start of time_range and commits are counted directly. Otherwise
+        only the chart covers every commit, so the slice starts at midnight
+        of the first day and totals are summed from the chart.
+        """
+        start_date, _ = self._get_time_range_dates(time_range)
+        start_day = start_date.strftime("%Y-%m-%d")
+        complete = len(activity["commits"]) >= activity["total_commits"]
+        if not complete:
+            start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        commits = [
+            commit for commit in activity["commits"]
+            if parse_commit_date(commit["date"]) >= start_date
+        ]
+        activity_chart = [day for day in activity["activity_chart"] if day["date"] >= start_day]
+        return {
+            **activity,
+            "total_commits": (
+                len(commits) if complete else sum(day["count"] for day in activity_chart)
+            ),
+            "commits": commits,
+            "activity_chart": activity_chart,
+            "time_range": time_range.value,
+            "since": start_date.isoformat(),
+        }
+
+    async def _fetch_user_activity(
+        self,
+        username: str,
+        time_range: TimeRange,
+        cache_key: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        events: Optional[asyncio.Queue] = None
+    ) -> CacheEntry:
+        """
+        Compute user activity and cache it, returning the entry cached
+
+        The progress events of _iter_user_activity are put on events when
+        given. Partial results are cached only briefly so they are retried.
+        """
+        activity_data: Dict[str, Any] = {}
+        async for event in self._iter_user_activity(username, time_range, since, until):
+            if events is not None:
+                events.put_nowait(event)
+            if event["event"] == "summary":
+                activity_data = event["data"]
+
+        entry = self.cache.make_entry(
+            activity_data,
+            expire_minutes=(
+                settings.CACHE_PARTIAL_EXPIRE_MINUTES if activity_data.get("partial") else None
+            )
+        )
+        await self.cache.put(cache_key, entry)
+        return entry
+
+    async def _iter_user_activity(
+        self,
+        username: str,
+        time_range: TimeRange,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Compute user activity, yielding progress events as it goes
+
+        Events are dicts with "event" and "data": "user" and "repositories"
+        first, "chart" whenever the activity chart changes, "commits" for
+        each repository as it completes (with done/total progress), and
+        finally "summary" with the full UserActivity.
+        """
+        # Get time range
+        if since is None:
+            start_date, end_date = self._get_time_range_dates(time_range)
+        else:
+            start_date, end_date = since, min(until or datetime.utcnow(), datetime.utcnow())
+
+        # Get user info, repositories and the contribution chart in parallel
+        user_info, repos, contributions = await asyncio.gather(
+            self.get_user_info(username),
+            self.get_user_repos(username, include_private=bool(self.access_token)),
+            self._try_contribution_summary(username, start_date, end_date)
+        )
+        top_repos = repos[:20]  # Return top 20 repos
+
+        yield {
+            "event": "user",
+            "data": {"username": username, "avatar_url": user_info.get("avatar_url")},
+        }
+        yield {
+            "event": "repositories",
+            "data": [repo.model_dump(mode="json", by_alias=True) for repo in top_repos],
+        }
+
+        # The contribution summary tells which repos have commits in the window
+        commit_repos = repos
+        if contributions is not None:
+            active = set(contributions.repositories)
+            commit_repos = [repo for repo in repos if repo.full_name in active]
+            yield {
+                "event": "chart",
+                "data": [day.model_dump() for day in contributions.activity_chart],
+            }
+
+        # Get commits from all repos concurrently
+        scheduled = self._schedule_repos(commit_repos, start_date)
+        repo_commits: Dict[int, List[Commit]] = {}
+        async for index, repo, commits in self.iter_synced_commits(
+            scheduled,
+            start_date,
+            end_date,
+            author=username,
+            author_id=user_info.get("node_id")
+        ):
+            repo_commits[index] = commits
+            yield {
+                "event": "commits",
+                "data": {
+                    "repository": repo.full_name,
+                    "commits": [commit.model_dump() for commit in commits],
+                    "done": len(repo_commits),
+                    "total": len(scheduled),
+                },
+            }
+            if contributions is None and commits:
+                yield {
+                    "event": "chart",
+                    "data": [
+                        day.model_dump() for day in self._build_activity_chart(
+                            [c for repo_list in repo_commits.values() for c in repo_list]
+                        )
+                    ],
+                }
+
+        # Repositories that failed or timed out are reported, not hidden
+        missing_repositories = [
+            repo.full_name for index, repo in enumerate(scheduled) if index not in repo_commits
+        ]
+        if missing_repositories:
+            logger.warning(
+                f"Activity for {username} is missing {len(missing_repositories)} repos"
+            )
+
+        # Merge in repository order so ties sort deterministically
+        all_commits: List[Commit] = []
+        for index in sorted(repo_commits):
+            all_commits.extend(repo_commits[index])
 
         # Sort commits by date (newest first)
         all_commits.sort(key=lambda c: c.date, reverse=True)
 
-        # Create activity chart
-        activity_chart = [
-            CommitActivity(date=date, count=count)
-            for date, count in sorted(commit_dates.items())
-        ]
+        if contributions is not None:
+            total_commits = contributions.total_commits
+            activity_chart = contributions.activity_chart
+        else:
+            total_commits = len(all_commits)
+            activity_chart = self._build_activity_chart(all_commits)
 
         # Create user activity response
         activity = UserActivity(
             username=username,
             avatar_url=user_info.get("avatar_url"),
-            total_commits=len(all_commits),
-            repositories=repos[:20],  # Return top 20 repos
+            total_commits=total_commits,
+            repositories=top_repos,
             commits=all_commits[:100],  # Return latest 100 commits
             activity_chart=activity_chart,
-            time_range=time_range
+            time_range=time_range,
+            since=start_date,
+            until=end_date,
+            partial=bool(missing_repositories),
+            missing_repositories=missing_repositories
         )
 
-        # Cache the result
-        await self.cache.set(cache_key, activity.model_dump())
-
-        return activity
+        yield {"event": "summary", "data": activity.model_dump(mode="json", by_alias=True)}
 
     async def get_authenticated_user(self) -> Dict[str, Any]:
         """Get authenticated user information"""
         if not self.access_token:
             raise ValueError("Access token required")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/user",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await rate_limiter.send(
+            self.token_scope,
+            lambda: self.client.get(f"{self.base_url}/user", headers=self.headers)
+        )
+        response.raise_for_status()
+        return response.json()
 
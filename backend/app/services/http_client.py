@@ -0,0 +1,79 @@
+import asyncio
+import importlib.util
+import httpx
+from typing import Optional
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client shared by every GitHubService instance
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package is installed"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create a pooled HTTP client configured from settings"""
+    http2 = settings.GITHUB_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("h2 package not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.GITHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GITHUB_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.GITHUB_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.GITHUB_TIMEOUT,
+            connect=settings.GITHUB_CONNECT_TIMEOUT,
+            pool=settings.GITHUB_POOL_TIMEOUT,
+        ),
+        headers={"User-Agent": "GitPeek-App"},
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it lazily outside the app lifespan"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def warm_up(client: httpx.AsyncClient) -> None:
+    """Open connections to the GitHub API ahead of the first request"""
+    # /rate_limit does not count against the rate limit. Concurrent requests
+    # open several HTTP/1.1 connections; HTTP/2 multiplexes them onto one.
+    url = f"{settings.GITHUB_API_BASE_URL}/rate_limit"
+    results = await asyncio.gather(
+        *(client.get(url) for _ in range(settings.GITHUB_WARMUP_CONNECTIONS)),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"GitHub connection warm-up failed: {result}")
+            break
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Create and warm up the shared HTTP client"""
+    global _client
+    _client = create_http_client()
+    await warm_up(_client)
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import logging
+
+from app.config import settings
+from app.services.auth_service import AuthService
+from app.services.cache_service import CacheService
+from app.services.commit_store import CommitStore
+from app.services.job_service import job_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Janitor:
+    """
+    Periodic database maintenance
+
+    Every JANITOR_INTERVAL_MINUTES it deletes cache rows past their
+    retention period, expired sessions, commit history older than
+    COMMIT_RETENTION_DAYS and jobs finished more than JOB_RETENTION_HOURS
+    ago, then evicts cache rows beyond CACHE_MAX_ENTRIES.
+    Deleted pages are reused by SQLite, so the database file stops growing
+    once the tables are bounded.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {
+            "runs": 0,
+            "last_run_at": None,
+            "expired_cache": 0,
+            "evicted_cache": 0,
+            "expired_sessions": 0,
+            "expired_commits": 0,
+            "expired_jobs": 0,
+        }
+
+    async def run(self) -> Dict[str, int]:
+        """Run one maintenance pass and return the rows it reclaimed"""
+        cache = CacheService()
+        now = datetime.utcnow()
+        commits_before = now - timedelta(days=settings.COMMIT_RETENTION_DAYS)
+        jobs_before = now - timedelta(hours=settings.JOB_RETENTION_HOURS)
+        reclaimed = {
+            "expired_cache": await cache.clear_expired(),
+            "evicted_cache": await cache.evict(),
+            "expired_sessions": await AuthService().clear_expired_sessions(),
+            "expired_commits": await CommitStore().prune(commits_before),
+            "expired_jobs": await job_queue.prune(jobs_before),
+        }
+
+        self.stats["runs"] += 1
+        self.stats["last_run_at"] = datetime.utcnow().isoformat()
+        for name, count in reclaimed.items():
+            self.stats[name] += count
+        if any(reclaimed.values()):
+            logger.info(
+                "Janitor reclaimed "
+                + ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in reclaimed.items())
+            )
+        return reclaimed
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"Janitor run failed: {e}")
+            await asyncio.sleep(settings.JANITOR_INTERVAL_MINUTES * 60)
+
+    def start(self) -> None:
+        """Start running maintenance in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background maintenance"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+# Process-wide janitor started with the application
+janitor = Janitor()
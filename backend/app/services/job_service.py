@@ -0,0 +1,235 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import select, update
+import logging
+
+from app.config import settings
+from app.database import async_session_maker, delete_in_batches, ActivityJob
+from app.models.schemas import (
+    ActivityJobResponse, JobStatus, TimeRange, UserActivity, UserActivityRequest
+)
+from app.services.github_service import GitHubService
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+
+
+def _job_key(request: UserActivityRequest) -> str:
+    """Key shared by identical submissions"""
+    since = request.since.isoformat() if request.since else ""
+    until = request.until.isoformat() if request.until else ""
+    return f"{request.username.lower()}:{request.time_range.value}:{since}:{until}"
+
+
+def _to_response(job: ActivityJob) -> ActivityJobResponse:
+    return ActivityJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        username=job.username,
+        time_range=job.time_range,
+        since=job.since,
+        until=job.until,
+        done=job.done,
+        total=job.total,
+        result=UserActivity(**json.loads(job.result_data)) if job.result_data else None,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+
+class JobQueue:
+    """
+    Background computation of public user activity
+
+    Jobs are stored in the database and run by a bounded pool of worker
+    tasks, so a long computation does not depend on the submitting
+    connection. Submitting a request identical to a queued or running job
+    returns that job. Jobs left unfinished when the process stopped are
+    queued again on start.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._lock = asyncio.Lock()
+        # Set whenever a job changes, to wake up long-polling clients
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    async def start(self) -> None:
+        """Start the workers and queue unfinished jobs"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(settings.JOB_WORKERS)
+        ]
+
+        try:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(ActivityJob.job_id)
+                    .where(ActivityJob.status.in_(ACTIVE_STATUSES))
+                    .order_by(ActivityJob.created_at)
+                )
+                job_ids = list(result.scalars())
+        except Exception as e:
+            logger.error(f"Error loading unfinished jobs: {e}")
+            return
+
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+        if job_ids:
+            logger.info(f"Resuming {len(job_ids)} unfinished activity jobs")
+
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs resume on the next start"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queue = None
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def submit(self, request: UserActivityRequest) -> ActivityJobResponse:
+        """Queue an activity job, or return the active job for the same request"""
+        await self.start()
+        job_key = _job_key(request)
+
+        async with self._lock:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(ActivityJob).where(
+                        ActivityJob.job_key == job_key,
+                        ActivityJob.status.in_(ACTIVE_STATUSES)
+                    )
+                )
+                job = result.scalars().first()
+                if job is not None:
+                    return _to_response(job)
+
+                job = ActivityJob(
+                    job_id=uuid.uuid4().hex,
+                    job_key=job_key,
+                    status=JobStatus.QUEUED.value,
+                    username=request.username,
+                    time_range=request.time_range.value,
+                    since=request.since,
+                    until=request.until
+                )
+                session.add(job)
+                await session.commit()
+
+        self._queue.put_nowait(job.job_id)
+        return _to_response(job)
+
+    async def get(self, job_id: str) -> Optional[ActivityJobResponse]:
+        """Get a job's status, progress and result"""
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(ActivityJob).where(ActivityJob.job_id == job_id)
+            )
+            job = result.scalar_one_or_none()
+            return _to_response(job) if job is not None else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[ActivityJobResponse]:
+        """Get a job once it changes or finishes, or after timeout seconds"""
+        if timeout <= 0:
+            return await self.get(job_id)
+
+        # Registered before reading the job so an update during the read is not missed
+        changed = self._changed.setdefault(job_id, asyncio.Event())
+        job = await self.get(job_id)
+        if job is None or job.status.value not in ACTIVE_STATUSES:
+            # Nothing updates a missing or finished job, so drop the event again
+            if self._changed.get(job_id) is changed:
+                del self._changed[job_id]
+            return job
+
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return job
+        return await self.get(job_id)
+
+    async def prune(self, before: datetime) -> int:
+        """Delete finished jobs, with their results, last updated before before"""
+        try:
+            async with async_session_maker() as session:
+                return await delete_in_batches(
+                    session,
+                    ActivityJob,
+                    ActivityJob.status.notin_(ACTIVE_STATUSES),
+                    ActivityJob.updated_at < before,
+                    batch_size=settings.JANITOR_BATCH_SIZE
+                )
+        except Exception as e:
+            logger.error(f"Error pruning activity jobs: {e}")
+            return 0
+
+    async def _update(self, job_id: str, **values) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                update(ActivityJob)
+                .where(ActivityJob.job_id == job_id)
+                .values(updated_at=datetime.utcnow(), **values)
+            )
+            await session.commit()
+
+        changed = self._changed.pop(job_id, None)
+        if changed is not None:
+            changed.set()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Error running activity job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await self.get(job_id)
+        if job is None or job.status.value not in ACTIVE_STATUSES:
+            return
+
+        await self._update(job_id, status=JobStatus.RUNNING.value)
+        service = GitHubService()
+        try:
+            result = None
+            async for event in service.stream_user_activity(
+                job.username,
+                TimeRange(job.time_range),
+                since=job.since,
+                until=job.until
+            ):
+                if event["event"] == "commits":
+                    await self._update(
+                        job_id, done=event["data"]["done"], total=event["data"]["total"]
+                    )
+                elif event["event"] == "summary":
+                    result = event["data"]
+        except Exception as e:
+            logger.warning(f"Activity job {job_id} failed: {e}")
+            await self._update(job_id, status=JobStatus.FAILED.value, error=str(e))
+            return
+
+        await self._update(
+            job_id,
+            status=JobStatus.DONE.value,
+            result_data=json.dumps(result)
+        )
+
+
+# Process-wide queue started with the application
+job_queue = JobQueue()
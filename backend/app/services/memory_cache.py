@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class MemoryCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry
+
+    Entries are evicted least recently used first once either the entry count
+    or the total size exceeds its limit. Values are stored as-is, so callers
+    must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[Any, datetime, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value that has not expired, marking it recently used"""
+        item = self._entries.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        value, expires_at, _ = item
+        if expires_at <= datetime.utcnow():
+            self.delete(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, expires_at: datetime, size: int = 1) -> None:
+        """Store a value, evicting least recently used entries over the limits"""
+        self.delete(key)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        """Remove a value if present"""
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def clear(self) -> None:
+        """Remove all values and reset counters"""
+        self._entries.clear()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current usage"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
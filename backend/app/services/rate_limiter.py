@@ -0,0 +1,246 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Tuple
+import httpx
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+# Epoch time by which the current task must have sent its request
+_deadline: ContextVar[Optional[float]] = ContextVar("rate_limit_deadline", default=None)
+
+
+class RateLimitExceededError(Exception):
+    """The GitHub rate limit is used up until reset_at (epoch seconds)"""
+
+    def __init__(self, reset_at: float):
+        self.reset_at = reset_at
+        super().__init__(f"GitHub rate limit exceeded, resets in {self.retry_after}s")
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds until the limit resets"""
+        return max(int(self.reset_at - time.time()), 0)
+
+
+@dataclass
+class RateLimitState:
+    """Budget reported by GitHub for one token and resource"""
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: float = 0.0
+    # Set after a secondary rate limit; every request waits until then
+    blocked_until: float = 0.0
+    # Next send time when pacing a shrinking budget
+    next_slot: float = 0.0
+
+
+def _int_header(response: httpx.Response, name: str) -> Optional[int]:
+    try:
+        return int(response.headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Schedules GitHub requests against the rate limit of each token
+
+    Budgets are read from X-RateLimit-* headers per token scope and
+    resource (core REST, graphql). Once the remaining budget drops below
+    GITHUB_RATE_LIMIT_PACE_FRACTION of the limit, requests are spaced out
+    so it lasts until the reset. Transient 5xx responses, secondary rate
+    limits (403/429) and connection errors are retried with jittered
+    exponential backoff, honouring Retry-After. A rate limit response pauses
+    the whole token scope, and raises RateLimitExceededError once its wait is
+    past the budget or retries run out.
+
+    Waits never exceed GITHUB_RATE_LIMIT_MAX_WAIT, nor the time left under
+    deadline(); a wait that would is not started and RateLimitExceededError is
+    raised instead, so callers with their own timeout fail fast.
+    """
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], RateLimitState] = {}
+
+    def state(self, scope: str, resource: str = "core") -> RateLimitState:
+        """Get the tracked budget for a token scope and resource"""
+        return self._states.setdefault((scope, resource), RateLimitState())
+
+    def reset(self) -> None:
+        """Forget all tracked budgets"""
+        self._states.clear()
+
+    def update(self, scope: str, response: httpx.Response, resource: str = "core") -> None:
+        """Record the budget reported by a response"""
+        remaining = _int_header(response, "x-ratelimit-remaining")
+        reset_at = _int_header(response, "x-ratelimit-reset")
+        if remaining is None or reset_at is None:
+            return
+
+        reported = response.headers.get("x-ratelimit-resource")
+        state = self.state(scope, reported if isinstance(reported, str) else resource)
+        state.limit = _int_header(response, "x-ratelimit-limit")
+        state.remaining = remaining
+        state.reset_at = float(reset_at)
+
+    @contextmanager
+    def deadline(self, seconds: float) -> Iterator[None]:
+        """Limit rate limit waits of the current task to seconds from now"""
+        token = _deadline.set(time.time() + seconds)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    def _max_wait(self, now: float) -> float:
+        """Longest wait allowed for the current task"""
+        deadline = _deadline.get()
+        if deadline is None:
+            return settings.GITHUB_RATE_LIMIT_MAX_WAIT
+        return max(min(settings.GITHUB_RATE_LIMIT_MAX_WAIT, deadline - now), 0.0)
+
+    def _delay(
+        self,
+        state: RateLimitState,
+        now: float,
+        max_wait: Optional[float] = None
+    ) -> Tuple[float, Optional[float]]:
+        """
+        Seconds to wait before sending, reserving a slot when pacing
+
+        Returns the delay and the pacing interval reserved, or None when the
+        request was not counted against the budget. Raises
+        RateLimitExceededError without reserving anything if the delay would
+        exceed max_wait.
+        """
+        if max_wait is None:
+            max_wait = settings.GITHUB_RATE_LIMIT_MAX_WAIT
+        delay = max(state.blocked_until - now, 0.0)
+        if delay > max_wait:
+            raise RateLimitExceededError(state.blocked_until)
+
+        # A budget whose reset time has passed is full again
+        if state.remaining is None or state.reset_at <= now:
+            return delay, None
+
+        if state.remaining <= 0:
+            wait = state.reset_at - now
+            if wait > max_wait:
+                raise RateLimitExceededError(state.reset_at)
+            return max(delay, wait), None
+
+        interval = 0.0
+        if state.limit and state.remaining < state.limit * settings.GITHUB_RATE_LIMIT_PACE_FRACTION:
+            interval = (state.reset_at - now) / state.remaining
+            slot = max(state.next_slot, now)
+            if slot - now > max_wait:
+                raise RateLimitExceededError(slot)
+            state.next_slot = slot + interval
+            delay = max(delay, slot - now)
+
+        # Count the request against the budget until a response reports it
+        state.remaining -= 1
+        return delay, interval
+
+    def _release(self, state: RateLimitState, interval: Optional[float]) -> None:
+        """Give back a reservation whose request was never sent"""
+        if interval is None or state.remaining is None:
+            return
+        state.remaining += 1
+        state.next_slot = max(state.next_slot - interval, 0.0)
+
+    async def acquire(self, scope: str, resource: str = "core") -> None:
+        """Wait until a request may be sent for the token scope"""
+        state = self.state(scope, resource)
+        now = time.time()
+        delay, interval = self._delay(state, now, self._max_wait(now))
+        if delay > 0:
+            logger.info(f"Pacing GitHub {resource} requests, waiting {delay:.1f}s")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self._release(state, interval)
+                raise
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, settings.GITHUB_RETRY_BACKOFF * 2 ** attempt)
+
+    def retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a response, or None if it is final"""
+        status = response.status_code
+        if status in RETRYABLE_STATUS_CODES:
+            return self._backoff(attempt)
+        if status not in (403, 429):
+            return None
+
+        retry_after = _int_header(response, "retry-after")
+        if retry_after is not None:
+            return float(retry_after)
+        if _int_header(response, "x-ratelimit-remaining") == 0:
+            reset_at = _int_header(response, "x-ratelimit-reset") or 0
+            return max(reset_at - time.time(), 0.0)
+        if status == 429 or "secondary rate limit" in response.text.lower():
+            return settings.GITHUB_SECONDARY_RATE_LIMIT_WAIT + self._backoff(attempt)
+        # Any other 403 is a permission error
+        return None
+
+    async def send(
+        self,
+        scope: str,
+        request: Callable[[], Awaitable[httpx.Response]],
+        resource: str = "core"
+    ) -> httpx.Response:
+        """Send a request under the rate limit, retrying transient failures"""
+        attempt = 0
+        while True:
+            await self.acquire(scope, resource)
+            try:
+                response = await request()
+            except httpx.TransportError as e:
+                delay = self._backoff(attempt)
+                if attempt >= settings.GITHUB_MAX_RETRIES or delay > self._max_wait(time.time()):
+                    raise
+                logger.warning(f"GitHub request failed ({e!r}), retrying in {delay:.1f}s")
+            else:
+                self.update(scope, response, resource)
+                delay = self.retry_delay(response, attempt)
+                if delay is None:
+                    return response
+                out_of_budget = (
+                    attempt >= settings.GITHUB_MAX_RETRIES
+                    or delay > self._max_wait(time.time())
+                )
+                if response.status_code in (403, 429):
+                    # Rate limits apply to the whole token, so pause every
+                    # request for it, even when this one gives up
+                    resume_at = time.time() + delay
+                    state = self.state(scope, resource)
+                    state.blocked_until = max(state.blocked_until, resume_at)
+                    if _int_header(response, "x-ratelimit-remaining") == 0:
+                        state.remaining = 0
+                        state.reset_at = max(state.reset_at, resume_at)
+                    if out_of_budget:
+                        raise RateLimitExceededError(state.blocked_until)
+                elif out_of_budget:
+                    return response
+                logger.warning(
+                    f"GitHub responded {response.status_code}, retrying in {delay:.1f}s"
+                )
+                if response.status_code in (403, 429):
+                    # acquire does the waiting
+                    delay = 0
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# Process-wide limiter shared by all services, since budgets belong to tokens
+rate_limiter = RateLimiter()
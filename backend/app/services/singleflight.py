@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that compute the same result
+
+    The first caller for a key starts the computation as a task; callers that
+    arrive while it is running await the same task instead of starting their
+    own. A caller being cancelled does not cancel the shared computation.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """Whether a computation for key is currently running"""
+        return key in self._calls
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start fn for key unless it is already running, returning its task"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            logger.debug(f"Joining in-flight computation for {key}")
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once for all concurrent callers using the same key"""
+        return await asyncio.shield(self.start(key, fn))
+
+    async def cancel_all(self) -> None:
+        """Cancel every running computation, e.g. on shutdown"""
+        tasks = list(self._calls.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._calls.clear()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """Drop a finished computation so the next call starts a new one"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+
+# Process-wide instance shared by all services
+singleflight = SingleFlight()
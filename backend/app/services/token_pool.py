@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+from authlib.jose import jwt
+import logging
+
+from app.config import settings
+from app.services.http_client import get_http_client
+from app.services.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Installation tokens are renewed this long before GitHub expires them
+INSTALLATION_TOKEN_MARGIN = 300
+
+
+def token_scope(token: str) -> str:
+    """Identify a token in cache keys and rate limit state without exposing it"""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class GitHubAppAuth:
+    """Installation access tokens for a GitHub App, renewed before they expire"""
+
+    def __init__(self, app_id: str, private_key: str, installation_id: str):
+        self.app_id = app_id
+        self.private_key = private_key
+        self.installation_id = installation_id
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _app_jwt(self) -> str:
+        """Sign the short-lived JWT that authenticates as the app"""
+        now = int(time.time())
+        # Backdated to allow for clock drift, as GitHub recommends
+        payload = {"iat": now - 60, "exp": now + 540, "iss": self.app_id}
+        return jwt.encode({"alg": "RS256"}, payload, self.private_key).decode()
+
+    async def token(self) -> str:
+        """Get a valid installation token"""
+        async with self._lock:
+            if self._token and self._expires_at - time.time() > INSTALLATION_TOKEN_MARGIN:
+                return self._token
+
+            response = await get_http_client().post(
+                f"{settings.GITHUB_API_BASE_URL}/app/installations/"
+                f"{self.installation_id}/access_tokens",
+                headers={
+                    "Accept": "application/vnd.github.v3+json",
+                    "Authorization": f"Bearer {self._app_jwt()}",
+                }
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            self._token = data["token"]
+            expires_at = data["expires_at"].replace("Z", "+00:00")
+            self._expires_at = datetime.fromisoformat(expires_at).timestamp()
+            return self._token
+
+
+@dataclass
+class PooledToken:
+    """A server-side token and the requests currently using it"""
+    scope: str
+    value: Optional[str] = None
+    app: Optional[GitHubAppAuth] = None
+    in_flight: int = 0
+
+    async def get_value(self) -> str:
+        if self.app is not None:
+            return await self.app.token()
+        return self.value
+
+
+class TokenPool:
+    """
+    Server-side GitHub tokens shared by unauthenticated requests
+
+    Each request takes the least loaded token: the one with the fewest
+    requests in flight, then the most budget left. Budgets are the ones the
+    rate limiter tracks from response headers, so a token that runs out is
+    skipped until its limit resets.
+    """
+
+    def __init__(self, tokens: Optional[List[PooledToken]] = None):
+        self.tokens = tokens or []
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @classmethod
+    def from_settings(cls) -> "TokenPool":
+        """Build the pool from GITHUB_TOKENS and the optional GitHub App settings"""
+        tokens = [
+            PooledToken(scope=token_scope(token), value=token)
+            for token in (t.strip() for t in settings.GITHUB_TOKENS.split(","))
+            if token
+        ]
+        if (
+            settings.GITHUB_APP_ID
+            and settings.GITHUB_APP_PRIVATE_KEY
+            and settings.GITHUB_APP_INSTALLATION_ID
+        ):
+            app = GitHubAppAuth(
+                settings.GITHUB_APP_ID,
+                settings.GITHUB_APP_PRIVATE_KEY.replace("\\n", "\n"),
+                settings.GITHUB_APP_INSTALLATION_ID
+            )
+            tokens.append(PooledToken(scope=f"app:{app.installation_id}", app=app))
+        return cls(tokens)
+
+    def _is_available(self, token: PooledToken, resource: str, now: float) -> bool:
+        state = rate_limiter.state(token.scope, resource)
+        if state.blocked_until > now:
+            return False
+        exhausted = state.remaining is not None and state.remaining <= 0
+        return not (exhausted and state.reset_at > now)
+
+    def acquire(self, resource: str = "core") -> Optional[PooledToken]:
+        """Take the least loaded token with budget left, or None if all are exhausted"""
+        now = time.time()
+        available = [token for token in self.tokens if self._is_available(token, resource, now)]
+        if not available:
+            return None
+
+        def load(token: PooledToken):
+            remaining = rate_limiter.state(token.scope, resource).remaining
+            return token.in_flight, -(remaining if remaining is not None else float("inf"))
+
+        token = min(available, key=load)
+        token.in_flight += 1
+        return token
+
+    def release(self, token: PooledToken) -> None:
+        """Return a token taken with acquire"""
+        token.in_flight -= 1
+
+
+# Process-wide pool used by GitHubService when no user token is given
+token_pool = TokenPool.from_settings()
@@ -1,15 +1,25 @@
+import os
+import tempfile
 import pytest
 import pytest_asyncio
+import httpx
+from datetime import datetime, timedelta
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from typing import AsyncGenerator
 
 from app.main import app
 from app.database import Base, get_db
+from app.services.auth_service import clear_session_caches
+from app.services.cache_service import cancel_refreshes, memory_tier
+from app.services.job_service import job_queue
+from app.services.rate_limiter import rate_limiter
+from app.services.singleflight import singleflight
 
 
-# Test database URL
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+# Test database URL; a file rather than :memory:, so that like in production
+# every session gets its own connection and cannot roll back another's writes
+TEST_DATABASE_URL = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
 
 # Test engine
 test_engine = create_async_engine(
@@ -26,19 +36,43 @@ test_session_maker = async_sessionmaker(
 )
 
 
-@pytest_asyncio.fixture
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
-    """Create test database session"""
+# Modules that open their own database sessions
+SESSION_MAKER_MODULES = [
+    "app.services.cache_backends",
+    "app.services.commit_store",
+    "app.services.job_service",
+    "app.services.auth_service",
+]
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def test_database(monkeypatch) -> AsyncGenerator[None, None]:
+    """Point services at fresh tables in the temporary test database for every test"""
+    for module in SESSION_MAKER_MODULES:
+        monkeypatch.setattr(f"{module}.async_session_maker", test_session_maker)
+
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-    async with test_session_maker() as session:
-        yield session
+    yield
 
+    await job_queue.stop()
+    await cancel_refreshes()
+    await singleflight.cancel_all()
+    rate_limiter.reset()
+    memory_tier.clear()
+    clear_session_caches()
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest_asyncio.fixture
+async def db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Create test database session"""
+    async with test_session_maker() as session:
+        yield session
+
+
 @pytest_asyncio.fixture
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create test client"""
@@ -53,6 +87,14 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def github_client():
+    """Build an HTTP client whose requests are answered by a handler function"""
+    def factory(handler) -> AsyncClient:
+        return AsyncClient(transport=httpx.MockTransport(handler))
+    return factory
+
+
 @pytest.fixture
 def mock_github_user_response():
     """Mock GitHub user response"""
@@ -105,7 +147,8 @@ def mock_github_repos_response():
 
 @pytest.fixture
 def mock_github_commits_response():
-    """Mock GitHub commits response"""
+    """Mock GitHub commits response, dated within the last day"""
+    now = datetime.utcnow()
     return [
         {
             "sha": "abc123",
@@ -114,7 +157,7 @@ def mock_github_commits_response():
                 "author": {
                     "name": "testuser",
                     "email": "test@example.com",
-                    "date": "2024-01-01T12:00:00Z"
+                    "date": (now - timedelta(hours=2)).isoformat() + "Z"
                 }
             },
             "html_url": "https://github.com/testuser/test-repo-1/commit/abc123",
@@ -126,7 +169,7 @@ def mock_github_commits_response():
                 "author": {
                     "name": "testuser",
                     "email": "test@example.com",
-                    "date": "2024-01-02T12:00:00Z"
+                    "date": (now - timedelta(hours=1)).isoformat() + "Z"
                 }
             },
             "html_url": "https://github.com/testuser/test-repo-1/commit/def456",
@@ -1,7 +1,10 @@
 import pytest
 from datetime import datetime, timedelta
+from sqlalchemy import select
 
-from app.services.auth_service import AuthService
+from app.config import settings
+from app.database import RevokedSession, UserSession
+from app.services.auth_service import AuthService, clear_session_caches, session_cache
 
 
 class TestAuthService:
@@ -78,3 +81,116 @@ class TestAuthService:
         assert isinstance(count, int)
         assert count >= 0
 
+    @pytest.mark.asyncio
+    async def test_cached_session_skips_database(self, db_session, monkeypatch):
+        """Test a session read once is served from memory"""
+        auth = AuthService()
+        session_id = await auth.create_session("test_token_123", "testuser")
+        session_cache.clear()
+        await auth.get_session(session_id)
+
+        def no_database():
+            raise AssertionError("database accessed")
+
+        monkeypatch.setattr("app.services.auth_service.async_session_maker", no_database)
+
+        session = await auth.get_session(session_id)
+        assert session.github_username == "testuser"
+
+    @pytest.mark.asyncio
+    async def test_delete_session_clears_caches(self, db_session):
+        """Test logout drops the cached session and profile"""
+        auth = AuthService()
+        session_id = await auth.create_session("test_token_123", "testuser")
+        auth.cache_profile(await auth.get_session(session_id), {"login": "testuser"})
+
+        await auth.delete_session(session_id)
+
+        assert auth.get_profile(session_id) is None
+        assert await auth.get_session(session_id) is None
+
+
+class TestSignedSessions:
+    """Tests for stateless encrypted session tokens"""
+
+    @pytest.fixture(autouse=True)
+    def signed_mode(self, monkeypatch):
+        monkeypatch.setattr(settings, "SESSION_MODE", "signed")
+
+    @pytest.mark.asyncio
+    async def test_session_verified_without_database(self, monkeypatch):
+        """Test a signed session round-trips from the cache without touching the database"""
+        def no_database():
+            raise AssertionError("database accessed")
+
+        monkeypatch.setattr("app.services.auth_service.async_session_maker", no_database)
+        auth = AuthService()
+
+        session_id = await auth.create_session("test_token_123", "testuser")
+        session = await auth.get_session(session_id)
+
+        assert "test_token_123" not in session_id
+        assert session.github_token == "test_token_123"
+        assert session.github_username == "testuser"
+        assert session.expires_at > datetime.utcnow() + timedelta(days=6)
+
+    @pytest.mark.asyncio
+    async def test_tampered_or_foreign_token_rejected(self, monkeypatch):
+        """Test tokens that were altered or signed with another key are invalid"""
+        auth = AuthService()
+        session_id = await auth.create_session("test_token_123", "testuser")
+
+        assert await auth.get_session(session_id[:-4] + "AAAA") is None
+        assert await auth.get_session("not-a-token") is None
+
+        # A new key takes effect on restart, with empty caches
+        monkeypatch.setattr(settings, "SECRET_KEY", "another-secret")
+        clear_session_caches()
+        assert await auth.get_session(session_id) is None
+
+    @pytest.mark.asyncio
+    async def test_logout_revokes_token(self):
+        """Test a logged out token is no longer accepted"""
+        auth = AuthService()
+        session_id = await auth.create_session("test_token_123", "testuser")
+
+        assert await auth.delete_session(session_id) is True
+        assert await auth.get_session(session_id) is None
+
+    @pytest.mark.asyncio
+    async def test_uncached_token_verified_and_not_stored(self, db_session):
+        """Test a token another process issued is accepted without a session row"""
+        auth = AuthService()
+        session_id = await auth.create_session("test_token_123", "testuser")
+        clear_session_caches()
+
+        session = await auth.get_session(session_id)
+        rows = await db_session.execute(select(UserSession))
+
+        assert session.github_username == "testuser"
+        assert rows.first() is None
+
+    @pytest.mark.asyncio
+    async def test_revocation_outlives_cache(self):
+        """Test a logged out token stays rejected once the caches are cleared"""
+        auth = AuthService()
+        session_id = await auth.create_session("test_token_123", "testuser")
+        assert await auth.delete_session(session_id) is True
+        assert await auth.delete_session(session_id) is True
+
+        clear_session_caches()
+
+        assert await auth.get_session(session_id) is None
+
+    @pytest.mark.asyncio
+    async def test_expired_revocations_cleared(self, db_session):
+        """Test revocations of tokens past their expiry are deleted"""
+        db_session.add(RevokedSession(
+            session_hash="old", expires_at=datetime.utcnow() - timedelta(hours=1)
+        ))
+        await db_session.commit()
+
+        await AuthService().clear_expired_sessions()
+        rows = await db_session.execute(select(RevokedSession))
+
+        assert rows.first() is None
@@ -0,0 +1,320 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import CachedResponse
+from app.services import cache_backends, cache_codecs
+from app.services.cache_backends import (
+    CacheEntry, DatabaseCacheBackend, RedisCacheBackend, get_cache_backend
+)
+from app.services.cache_service import CacheService
+
+
+class FakeRedis:
+    """In-process stand-in for redis.asyncio.Redis"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.closed = False
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        self.ttls[key] = ex
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+        self.ttls.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakePipeline:
+    """Buffers commands until execute, like a redis pipeline"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+
+    async def execute(self):
+        self.redis.executions = getattr(self.redis, "executions", 0) + 1
+        for key, value, ex in self.commands:
+            await self.redis.set(key, value, ex=ex)
+
+
+class TestRedisCacheBackend:
+    """Tests for the Redis cache backend"""
+
+    @pytest.mark.asyncio
+    async def test_set_and_get_through_cache_service(self):
+        """Test values round-trip through Redis with their validators"""
+        redis = FakeRedis()
+        cache = CacheService(backend=RedisCacheBackend(client=redis))
+
+        await cache.set("key", {"data": [1, 2]}, etag='"v1"')
+        cache.memory.clear()
+
+        entry = await cache.get_entry("key")
+        assert entry.value == {"data": [1, 2]}
+        assert entry.etag == '"v1"'
+        assert entry.last_modified is None
+        assert not entry.is_expired
+        assert "gitpeek:cache:key" in redis.data
+
+    @pytest.mark.asyncio
+    async def test_ttl_covers_retention(self):
+        """Test keys outlive their expiry by the retention period"""
+        redis = FakeRedis()
+        backend = RedisCacheBackend(client=redis)
+        entry = CacheEntry(value=1, expires_at=datetime.utcnow() + timedelta(minutes=10))
+
+        await backend.set("key", entry, b"1")
+
+        expected = 10 * 60 + settings.CACHE_RETENTION_HOURS * 3600
+        assert expected - 5 <= redis.ttls["gitpeek:cache:key"] <= expected
+
+    @pytest.mark.asyncio
+    async def test_get_many_uses_one_round_trip(self):
+        """Test several keys are read with a single MGET"""
+        redis = FakeRedis()
+        backend = RedisCacheBackend(client=redis)
+        expires_at = datetime.utcnow() + timedelta(minutes=10)
+        await backend.set("a", CacheEntry(value="A", expires_at=expires_at), b'"A"')
+        await backend.set("b", CacheEntry(value="B", expires_at=expires_at), b'"B"')
+
+        calls = []
+        original_mget = redis.mget
+
+        async def mget(keys):
+            calls.append(keys)
+            return await original_mget(keys)
+
+        redis.mget = mget
+        entries = await backend.get_many(["a", "missing", "b"])
+
+        assert len(calls) == 1
+        assert {key: entry.value for key, entry in entries.items()} == {"a": "A", "b": "B"}
+
+    @pytest.mark.asyncio
+    async def test_set_many_uses_one_pipeline(self):
+        """Test writing several keys sends them in one pipeline"""
+        redis = FakeRedis()
+        cache = CacheService(backend=RedisCacheBackend(client=redis))
+
+        await cache.set_many({"a": 1, "b": 2})
+        cache.memory.clear()
+
+        assert redis.executions == 1
+        assert await cache.get_many(["a", "b"]) == {"a": 1, "b": 2}
+
+    @pytest.mark.asyncio
+    async def test_delete(self):
+        """Test deleting a key removes it from Redis"""
+        redis = FakeRedis()
+        cache = CacheService(backend=RedisCacheBackend(client=redis))
+        await cache.set("key", {"data": 1})
+
+        await cache.delete("key")
+
+        assert redis.data == {}
+        assert await cache.get("key") is None
+
+
+class TestDatabaseCacheBackend:
+    """Tests for writes, access tracking and eviction in the database backend"""
+
+    async def fill(self, backend, keys):
+        for key in keys:
+            entry = CacheEntry(value=key, expires_at=datetime.utcnow() + timedelta(minutes=10))
+            await backend.set(key, entry, f'"{key}"'.encode())
+
+    @pytest.mark.asyncio
+    async def test_large_payload_is_compressed(self, db_session, monkeypatch):
+        """Test payloads above the threshold are stored with the zlib codec"""
+        monkeypatch.setattr(settings, "CACHE_COMPRESS_MIN_BYTES", 100)
+        cache = CacheService(backend=DatabaseCacheBackend())
+        value = {"commits": ["x" * 20] * 50, "small": {"n": 1}}
+        await cache.set("large", value)
+        await cache.set("small", {"n": 1})
+        cache.memory.clear()
+
+        rows = {
+            row.cache_key: row
+            for row in (await db_session.execute(select(CachedResponse))).scalars()
+        }
+        assert rows["large"].codec == cache_codecs.JSON_ZLIB
+        assert len(rows["large"].payload) < len(cache_codecs.dumps(value))
+        assert rows["small"].codec == cache_codecs.JSON
+        assert await cache.get("large") == value
+        assert await cache.get("small") == {"n": 1}
+
+    @pytest.mark.asyncio
+    async def test_reads_rows_written_before_codecs(self, db_session):
+        """Test legacy rows holding JSON text are still decoded"""
+        db_session.add(CachedResponse(
+            cache_key="legacy",
+            response_data='{"n": 1}',
+            expires_at=datetime.utcnow() + timedelta(minutes=10)
+        ))
+        await db_session.commit()
+
+        entry = await DatabaseCacheBackend().get("legacy")
+
+        assert entry.value == {"n": 1}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_to_one_key(self):
+        """Test concurrent writes of a key all succeed and leave one of the values"""
+        backend = DatabaseCacheBackend()
+        expires_at = datetime.utcnow() + timedelta(minutes=5)
+
+        await asyncio.gather(*(
+            backend.set("key", CacheEntry(value=n, expires_at=expires_at), str(n).encode())
+            for n in range(5)
+        ))
+
+        entry = await backend.get("key")
+        assert entry.value in range(5)
+
+    @pytest.mark.asyncio
+    async def test_set_upserts_existing_key(self, db_session):
+        """Test writing a key again updates its row and keeps its hit count"""
+        backend = DatabaseCacheBackend(write_behind=False)
+        await self.fill(backend, ["a"])
+        backend.touch("a")
+        await backend.flush_accesses()
+
+        entry = CacheEntry(value="new", expires_at=datetime.utcnow() + timedelta(minutes=10))
+        await backend.set("a", entry, b'"new"')
+
+        rows = (await db_session.execute(select(CachedResponse))).scalars().all()
+        assert len(rows) == 1
+        assert rows[0].hit_count == 1
+        assert (await backend.get("a")).value == "new"
+
+    @pytest.mark.asyncio
+    async def test_write_behind_batches_writes(self, db_session):
+        """Test queued writes are served at once and committed together on flush"""
+        backend = DatabaseCacheBackend(write_behind=True)
+        await self.fill(backend, ["a", "b"])
+
+        assert (await backend.get("a")).value == "a"
+        assert (await db_session.execute(select(CachedResponse))).scalars().all() == []
+
+        await backend.close()
+
+        keys = {row.cache_key for row in (await db_session.execute(select(CachedResponse))).scalars()}
+        assert keys == {"a", "b"}
+
+    @pytest.mark.asyncio
+    async def test_delete_drops_queued_write(self):
+        """Test deleting a key also discards its queued write"""
+        backend = DatabaseCacheBackend(write_behind=True)
+        await self.fill(backend, ["a"])
+
+        await backend.delete("a")
+        await backend.close()
+
+        assert await backend.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_flush_accesses_records_hits(self, db_session):
+        """Test buffered hits are written to the row"""
+        backend = DatabaseCacheBackend(write_behind=False)
+        await self.fill(backend, ["a"])
+        backend.touch("a")
+        backend.touch("a")
+
+        assert await backend.flush_accesses() == 1
+
+        row = (await db_session.execute(select(CachedResponse))).scalar_one()
+        assert row.hit_count == 2
+        assert row.last_accessed_at is not None
+
+    @pytest.mark.asyncio
+    async def test_lru_evicts_least_recently_used(self):
+        """Test rows beyond the limit are evicted oldest access first"""
+        backend = DatabaseCacheBackend()
+        await self.fill(backend, ["a", "b", "c"])
+        backend.touch("a")
+
+        evicted = await backend.evict(2, "lru")
+
+        assert evicted == 1
+        assert await backend.get("a") is not None
+        assert await backend.get("b") is None
+        assert await backend.get("c") is not None
+
+    @pytest.mark.asyncio
+    async def test_lfu_evicts_least_frequently_used(self):
+        """Test rows with the fewest hits are evicted first"""
+        backend = DatabaseCacheBackend()
+        await self.fill(backend, ["a", "b", "c"])
+        for key in ["a", "a", "a", "b", "c", "c"]:
+            backend.touch(key)
+
+        evicted = await backend.evict(1, "lfu")
+
+        assert evicted == 2
+        assert await backend.get("a") is not None
+        assert await backend.get("b") is None
+
+    @pytest.mark.asyncio
+    async def test_clear_expired_deletes_in_batches(self, monkeypatch):
+        """Test expired rows are all deleted across several batches"""
+        monkeypatch.setattr(settings, "JANITOR_BATCH_SIZE", 2)
+        backend = DatabaseCacheBackend()
+        for key in ["a", "b", "c", "d", "e"]:
+            entry = CacheEntry(value=key, expires_at=datetime.utcnow() - timedelta(days=2))
+            await backend.set(key, entry, f'"{key}"'.encode())
+        await self.fill(backend, ["fresh"])
+
+        deleted = await backend.clear_expired(datetime.utcnow() - timedelta(days=1))
+
+        assert deleted == 5
+        assert await backend.get("fresh") is not None
+
+
+class TestCacheBackendSelection:
+    """Tests for choosing the cache backend from settings"""
+
+    @pytest.mark.asyncio
+    async def test_database_backend_by_default(self, monkeypatch):
+        """Test the database backend is used unless Redis is enabled"""
+        monkeypatch.setattr(cache_backends, "_backend", None)
+        monkeypatch.setattr(settings, "USE_REDIS", False)
+
+        assert isinstance(get_cache_backend(), DatabaseCacheBackend)
+
+    @pytest.mark.asyncio
+    async def test_redis_backend_when_enabled(self, monkeypatch):
+        """Test USE_REDIS with REDIS_URL selects the Redis backend"""
+        monkeypatch.setattr(cache_backends, "_backend", None)
+        monkeypatch.setattr(settings, "USE_REDIS", True)
+        monkeypatch.setattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+
+        backend = get_cache_backend()
+
+        assert isinstance(backend, RedisCacheBackend)
+        await cache_backends.close_cache_backend()
@@ -1,7 +1,9 @@
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 
-from app.services.cache_service import CacheService
+from app.config import settings
+from app.services.cache_service import CacheService, _refresh_tasks
 
 
 class TestCacheService:
@@ -80,3 +82,208 @@ class TestCacheService:
         assert isinstance(count, int)
         assert count >= 0
 
+
+    @pytest.mark.asyncio
+    async def test_get_entry_returns_expired_with_validators(self, db_session, monkeypatch):
+        """Test expired entries stay readable for revalidation"""
+        monkeypatch.setattr(settings, "CACHE_EXPIRE_MINUTES", 0)
+        cache = CacheService()
+
+        await cache.set("test_key", {"data": 1}, etag='"abc"', last_modified="yesterday")
+
+        assert await cache.get("test_key") is None
+        entry = await cache.get_entry("test_key")
+        assert entry.is_expired
+        assert entry.value == {"data": 1}
+        assert entry.etag == '"abc"'
+        assert entry.last_modified == "yesterday"
+
+    @pytest.mark.asyncio
+    async def test_clear_expired_keeps_entries_within_retention(self, db_session, monkeypatch):
+        """Test clear_expired only removes entries past the retention period"""
+        monkeypatch.setattr(settings, "CACHE_EXPIRE_MINUTES", 0)
+        cache = CacheService()
+        await cache.set("recent", {"data": 1})
+
+        assert await cache.clear_expired() == 0
+
+        cache.retention_hours = 0
+        assert await cache.clear_expired() == 1
+        assert await cache.get_entry("recent") is None
+
+    @pytest.mark.asyncio
+    async def test_hot_key_served_from_memory(self, db_session, monkeypatch):
+        """Test repeated reads of a fresh key do not touch the database"""
+        cache = CacheService()
+        await cache.set("test_key", {"data": 1})
+
+        def no_database():
+            raise AssertionError("database accessed")
+
+        monkeypatch.setattr("app.services.cache_backends.async_session_maker", no_database)
+
+        assert await cache.get("test_key") == {"data": 1}
+        assert await cache.get("test_key") == {"data": 1}
+        assert CacheService.stats()["memory"]["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_database_hit_populates_memory(self, db_session):
+        """Test a value found in the database is promoted to the memory tier"""
+        cache = CacheService()
+        await cache.set("test_key", {"data": 1})
+        cache.memory.clear()
+
+        assert await cache.get("test_key") == {"data": 1}
+        assert await cache.get("test_key") == {"data": 1}
+
+        stats = CacheService.stats()
+        assert stats["backend"]["hits"] >= 1
+        assert stats["memory"]["hits"] == 1
+        assert stats["memory"]["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_removes_memory_copy(self, db_session):
+        """Test deleting a key also drops it from memory"""
+        cache = CacheService()
+        await cache.set("test_key", {"data": 1})
+
+        await cache.delete("test_key")
+
+        assert cache.memory.get("test_key") is None
+        assert await cache.get("test_key") is None
+
+
+    @pytest.mark.asyncio
+    async def test_get_many_reads_backend_once(self, db_session, monkeypatch):
+        """Test keys missing from memory are read from the backend in one batch"""
+        cache = CacheService()
+        await cache.set_many({"a": 1, "b": 2, "c": 3})
+        cache.memory.clear()
+        await cache.get("a")
+
+        calls = []
+        get_many = cache.backend.get_many
+
+        async def spy(keys):
+            calls.append(keys)
+            return await get_many(keys)
+
+        monkeypatch.setattr(cache.backend, "get_many", spy)
+
+        assert await cache.get_many(["a", "b", "c", "missing"]) == {"a": 1, "b": 2, "c": 3}
+        assert calls == [["b", "c", "missing"]]
+
+    @pytest.mark.asyncio
+    async def test_set_many_stores_validators(self, db_session):
+        """Test values written together keep their own validators"""
+        cache = CacheService()
+
+        await cache.set_many(
+            {"a": {"data": 1}, "b": {"data": 2}},
+            validators={"a": ('"etag-a"', None)}
+        )
+        cache.memory.clear()
+
+        entries = await cache.get_entries(["a", "b"])
+        assert entries["a"].etag == '"etag-a"'
+        assert entries["b"].etag is None
+        assert entries["b"].value == {"data": 2}
+
+
+class TestCacheServiceStaleWhileRevalidate:
+    """Tests for soft/hard TTL handling in get_or_refresh"""
+
+    @pytest.mark.asyncio
+    async def test_missing_entry_computed(self, db_session):
+        """Test a missing entry is computed before returning"""
+        cache = CacheService()
+
+        async def compute(entry):
+            assert entry is None
+            await cache.set("key", {"v": 1})
+            return {"v": 1}
+
+        assert await cache.get_or_refresh("key", compute) == {"v": 1}
+        assert await cache.get("key") == {"v": 1}
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_not_recomputed(self, db_session):
+        """Test a fresh entry is returned without computing"""
+        cache = CacheService()
+        await cache.set("key", {"v": 1})
+
+        async def compute(entry):
+            raise AssertionError("should not compute")
+
+        assert await cache.get_or_refresh("key", compute) == {"v": 1}
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_and_refreshed_once(self, db_session):
+        """Test stale entries are served immediately and refreshed once in the background"""
+        cache = CacheService()
+        cache.expire_minutes = 0
+        await cache.set("key", {"v": 1})
+        cache.expire_minutes = 10
+        calls = 0
+
+        async def compute(entry):
+            nonlocal calls
+            calls += 1
+            assert entry.value == {"v": 1}
+            await asyncio.sleep(0.01)
+            await cache.set("key", {"v": 2})
+            return {"v": 2}
+
+        results = await asyncio.gather(*(cache.get_or_refresh("key", compute) for _ in range(5)))
+        assert results == [{"v": 1}] * 5
+
+        await asyncio.gather(*_refresh_tasks)
+        assert calls == 1
+        assert await cache.get_or_refresh("key", compute) == {"v": 2}
+
+    @pytest.mark.asyncio
+    async def test_entry_past_hard_ttl_computed_synchronously(self, db_session):
+        """Test entries beyond the stale window are recomputed before returning"""
+        cache = CacheService()
+        cache.expire_minutes = 0
+        cache.stale_minutes = 0
+        await cache.set("key", {"v": 1})
+
+        async def compute(entry):
+            assert entry.value == {"v": 1}
+            return {"v": 2}
+
+        assert await cache.get_or_refresh("key", compute) == {"v": 2}
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_failure_keeps_stale_value(self, db_session):
+        """Test a failed background refresh is logged and the stale value kept"""
+        cache = CacheService()
+        cache.expire_minutes = 0
+        await cache.set("key", {"v": 1})
+
+        async def compute(entry):
+            raise RuntimeError("GitHub down")
+
+        assert await cache.get_or_refresh("key", compute) == {"v": 1}
+        await asyncio.gather(*_refresh_tasks)
+        assert await cache.get_or_refresh("key", compute) == {"v": 1}
+
+    @pytest.mark.asyncio
+    async def test_entry_variant_returns_stored_entry(self, db_session):
+        """Test get_or_refresh_entry returns the entry compute stored, not a re-read"""
+        cache = CacheService()
+        stored = []
+
+        async def compute(entry):
+            assert entry is None
+            new = cache.make_entry({"v": 1})
+            await cache.put("key", new)
+            stored.append(new)
+            return new
+
+        entry = await cache.get_or_refresh_entry("key", None, compute)
+
+        assert entry is stored[0]
+        assert await cache.get_or_refresh_entry("key", entry, compute) is entry
+        assert await cache.get("key") == {"v": 1}
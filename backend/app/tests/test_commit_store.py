@@ -0,0 +1,152 @@
+import pytest
+from datetime import date, datetime, timedelta
+
+from app.models.schemas import Commit
+from app.services.commit_store import CommitStore, missing_window, parse_commit_date
+
+
+def make_commit(sha, date, repository="testuser/repo"):
+    """Build a Commit model"""
+    return Commit(
+        sha=sha,
+        message=f"Commit {sha}",
+        author="Test User",
+        date=date,
+        html_url=f"https://github.com/{repository}/commit/{sha}",
+        repository=repository
+    )
+
+
+class TestCommitStore:
+    """Tests for commit storage by day segment"""
+
+    def test_parse_commit_date_is_naive_utc(self):
+        """Test offsets are converted to naive UTC"""
+        assert parse_commit_date("2024-01-01T12:00:00Z") == datetime(2024, 1, 1, 12)
+        assert parse_commit_date("2024-01-01T14:00:00+02:00") == datetime(2024, 1, 1, 12)
+
+    @pytest.mark.asyncio
+    async def test_save_and_get_commits_in_window(self):
+        """Test stored commits are filtered by window and sorted newest first"""
+        store = CommitStore()
+        await store.save(
+            "testuser/repo", "TestUser",
+            [make_commit("a", "2024-01-02T00:00:00Z"), make_commit("b", "2024-01-05T00:00:00Z")],
+            datetime(2024, 1, 1), datetime(2024, 1, 8)
+        )
+
+        commits = await store.get_commits(
+            "testuser/repo", "testuser", datetime(2024, 1, 1), datetime(2024, 1, 8)
+        )
+        assert [c.sha for c in commits] == ["b", "a"]
+
+        later = await store.get_commits(
+            "testuser/repo", "testuser", datetime(2024, 1, 3), datetime(2024, 1, 8)
+        )
+        assert [c.sha for c in later] == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_overlapping_save_skips_known_commits(self):
+        """Test commits returned again by an overlapping fetch are stored once"""
+        store = CommitStore()
+        await store.save(
+            "testuser/repo", "testuser", [make_commit("a", "2024-01-02T00:00:00Z")],
+            datetime(2024, 1, 1), datetime(2024, 1, 8)
+        )
+        saved = await store.save(
+            "testuser/repo", "testuser",
+            [make_commit("a", "2024-01-02T00:00:00Z"), make_commit("c", "2024-01-09T00:00:00Z")],
+            datetime(2024, 1, 1), datetime(2024, 1, 10)
+        )
+
+        commits = await store.get_commits(
+            "testuser/repo", "testuser", datetime(2024, 1, 1), datetime(2024, 1, 10)
+        )
+        assert saved is True
+        assert [c.sha for c in commits] == ["c", "a"]
+
+    @pytest.mark.asyncio
+    async def test_save_marks_day_segments(self):
+        """Test whole days are complete and the last day keeps its high-water mark"""
+        store = CommitStore()
+        await store.save("testuser/repo", "testuser", [], datetime(2024, 1, 1), datetime(2024, 1, 3, 6))
+
+        segments = await store.get_segments(
+            ["testuser/repo"], "testuser", datetime(2024, 1, 1), datetime(2024, 1, 4)
+        )
+        assert segments["testuser/repo"] == {
+            date(2024, 1, 1): datetime(2024, 1, 2),
+            date(2024, 1, 2): datetime(2024, 1, 3),
+            date(2024, 1, 3): datetime(2024, 1, 3, 6),
+        }
+
+    @pytest.mark.asyncio
+    async def test_partial_day_without_segment_is_not_marked(self):
+        """Test a fetch starting mid-day does not claim the start of that day"""
+        store = CommitStore()
+        await store.save("testuser/repo", "testuser", [], datetime(2024, 1, 1, 12), datetime(2024, 1, 3))
+
+        segments = await store.get_segments(
+            ["testuser/repo"], "testuser", datetime(2024, 1, 1), datetime(2024, 1, 3)
+        )
+        assert set(segments["testuser/repo"]) == {date(2024, 1, 2)}
+
+    @pytest.mark.asyncio
+    async def test_segments_are_per_author(self):
+        """Test days stored for one author are not used for another"""
+        store = CommitStore()
+        await store.save("testuser/repo", "testuser", [], datetime(2024, 1, 1), datetime(2024, 1, 8))
+
+        assert await store.get_segments(
+            ["testuser/repo"], "other", datetime(2024, 1, 1), datetime(2024, 1, 8)
+        ) == {}
+
+
+    @pytest.mark.asyncio
+    async def test_prune_deletes_days_before_cutoff(self):
+        """Test history before the cutoff day is deleted along with its segments"""
+        store = CommitStore()
+        await store.save(
+            "testuser/repo", "testuser",
+            [make_commit("old", "2024-01-01T12:00:00Z"), make_commit("new", "2024-01-03T12:00:00Z")],
+            datetime(2024, 1, 1), datetime(2024, 1, 4)
+        )
+
+        deleted = await store.prune(datetime(2024, 1, 2, 18))
+
+        commits = await store.get_commits(
+            "testuser/repo", "testuser", datetime(2024, 1, 1), datetime(2024, 1, 4)
+        )
+        segments = await store.get_segments(
+            ["testuser/repo"], "testuser", datetime(2024, 1, 1), datetime(2024, 1, 4)
+        )
+        assert deleted == 1
+        assert [c.sha for c in commits] == ["new"]
+        assert set(segments["testuser/repo"]) == {date(2024, 1, 2), date(2024, 1, 3)}
+
+class TestMissingWindow:
+    """Tests for planning the fetch of missing days"""
+
+    def test_nothing_stored_fetches_from_day_start(self):
+        """Test the window is aligned to the start of the first day"""
+        window = missing_window({}, datetime(2024, 1, 1, 15), datetime(2024, 1, 3, 6), timedelta(0))
+
+        assert window == (datetime(2024, 1, 1), datetime(2024, 1, 3, 6))
+
+    def test_complete_days_need_no_fetch(self):
+        """Test a window inside complete days is served from the store"""
+        segments = {date(2024, 1, 1): datetime(2024, 1, 2), date(2024, 1, 2): datetime(2024, 1, 3)}
+
+        assert missing_window(
+            segments, datetime(2024, 1, 1, 8), datetime(2024, 1, 2, 20), timedelta(0)
+        ) is None
+
+    def test_open_day_resumes_from_high_water_mark(self):
+        """Test only the rest of a partially stored day is fetched"""
+        segments = {date(2024, 1, 1): datetime(2024, 1, 2), date(2024, 1, 2): datetime(2024, 1, 2, 9)}
+
+        window = missing_window(
+            segments, datetime(2024, 1, 1), datetime(2024, 1, 2, 12), timedelta(minutes=30)
+        )
+
+        assert window == (datetime(2024, 1, 2, 8, 30), datetime(2024, 1, 2, 12))
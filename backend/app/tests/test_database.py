@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import _add_missing_columns, _add_missing_indexes, _set_sqlite_pragmas
+from app.tests.conftest import test_engine
+
+
+class TestDatabase:
+    """Tests for database setup"""
+
+    @pytest.mark.asyncio
+    async def test_add_missing_columns_upgrades_old_table(self):
+        """Test columns added to a model are added to an existing table"""
+        async with test_engine.begin() as conn:
+            await conn.execute(text("DROP TABLE cached_responses"))
+            await conn.execute(text(
+                "CREATE TABLE cached_responses ("
+                "id INTEGER PRIMARY KEY, cache_key VARCHAR NOT NULL, "
+                "response_data TEXT NOT NULL, created_at DATETIME NOT NULL, "
+                "expires_at DATETIME NOT NULL)"
+            ))
+
+            await conn.run_sync(_add_missing_columns)
+
+            columns = await conn.run_sync(
+                lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns("cached_responses")}
+            )
+
+        assert {"etag", "last_modified"} <= columns
+
+    @pytest.mark.asyncio
+    async def test_add_missing_indexes_upgrades_old_table(self):
+        """Test indexes added to a model are created on an existing table"""
+        async with test_engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_cached_responses_expires_at"))
+
+            await conn.run_sync(_add_missing_indexes)
+
+            indexes = await conn.run_sync(
+                lambda sync_conn: {i["name"] for i in inspect(sync_conn).get_indexes("cached_responses")}
+            )
+
+        assert "ix_cached_responses_expires_at" in indexes
+
+    @pytest.mark.asyncio
+    async def test_sqlite_connections_use_wal(self, tmp_path):
+        """Test new SQLite connections are switched to WAL with a busy timeout"""
+        file_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        event.listen(file_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+        async with file_engine.connect() as conn:
+            journal_mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            busy_timeout = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+        await file_engine.dispose()
+
+        assert journal_mode == "wal"
+        assert busy_timeout > 0
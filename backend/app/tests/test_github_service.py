@@ -1,9 +1,16 @@
+import asyncio
+import gzip
+import json
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
-from datetime import datetime
+import httpx
+from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta
 
+from app.config import settings
+from app.services.cache_service import _refresh_tasks
 from app.services.github_service import GitHubService
-from app.models.schemas import TimeRange, Repository
+from app.services.singleflight import singleflight
+from app.models.schemas import TimeRange, Repository, UserActivity
 
 
 class TestGitHubService:
@@ -12,59 +19,57 @@ class TestGitHubService:
     @pytest.mark.asyncio
     async def test_get_user_info_success(self, mock_github_user_response):
         """Test successful user info retrieval"""
-        service = GitHubService()
+        mock_client = MagicMock()
+        service = GitHubService(client=mock_client)
 
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_github_user_response
-            mock_response.raise_for_status = MagicMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_github_user_response
+        mock_response.raise_for_status = MagicMock()
+        mock_response.headers = {}
+        mock_response.links = {}
 
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                return_value=mock_response
-            )
+        mock_client.get = AsyncMock(return_value=mock_response)
 
-            result = await service.get_user_info("testuser")
+        result = await service.get_user_info("testuser")
 
-            assert result["login"] == "testuser"
-            assert result["id"] == 12345
+        assert result["login"] == "testuser"
+        assert result["id"] == 12345
 
     @pytest.mark.asyncio
     async def test_get_user_info_not_found(self):
         """Test user not found"""
-        service = GitHubService()
+        mock_client = MagicMock()
+        service = GitHubService(client=mock_client)
 
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 404
+        mock_response = MagicMock()
+        mock_response.status_code = 404
 
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                return_value=mock_response
-            )
+        mock_client.get = AsyncMock(return_value=mock_response)
 
-            with pytest.raises(ValueError, match="User .* not found"):
-                await service.get_user_info("nonexistent")
+        with pytest.raises(ValueError, match="User .* not found"):
+            await service.get_user_info("nonexistent")
 
     @pytest.mark.asyncio
     async def test_get_user_repos_success(self, mock_github_repos_response):
         """Test successful repos retrieval"""
-        service = GitHubService()
+        mock_client = MagicMock()
+        service = GitHubService(client=mock_client)
 
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_github_repos_response
-            mock_response.raise_for_status = MagicMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_github_repos_response
+        mock_response.raise_for_status = MagicMock()
+        mock_response.headers = {}
+        mock_response.links = {}
 
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                return_value=mock_response
-            )
+        mock_client.get = AsyncMock(return_value=mock_response)
 
-            result = await service.get_user_repos("testuser")
+        result = await service.get_user_repos("testuser")
 
-            assert len(result) == 2
-            assert isinstance(result[0], Repository)
-            assert result[0].name == "test-repo-1"
+        assert len(result) == 2
+        assert isinstance(result[0], Repository)
+        assert result[0].name == "test-repo-1"
 
     @pytest.mark.asyncio
     async def test_get_time_range_dates(self):
@@ -90,47 +95,47 @@ class TestGitHubService:
     @pytest.mark.asyncio
     async def test_get_repo_commits_success(self, mock_github_commits_response):
         """Test successful commits retrieval"""
-        service = GitHubService()
+        mock_client = MagicMock()
+        service = GitHubService(client=mock_client)
 
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_github_commits_response
-            mock_response.raise_for_status = MagicMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_github_commits_response
+        mock_response.raise_for_status = MagicMock()
+        mock_response.headers = {}
+        mock_response.links = {}
 
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                return_value=mock_response
-            )
+        mock_client.get = AsyncMock(return_value=mock_response)
 
-            result = await service.get_repo_commits(
-                "testuser",
-                "test-repo",
-                datetime(2024, 1, 1),
-                datetime(2024, 1, 31),
-                author="testuser"
-            )
+        result = await service.get_repo_commits(
+            "testuser",
+            "test-repo",
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 31),
+            author="testuser"
+        )
 
-            assert len(result) == 2
-            assert result[0]["sha"] == "abc123"
+        assert len(result) == 2
+        assert result[0]["sha"] == "abc123"
 
     @pytest.mark.asyncio
     async def test_get_authenticated_user(self):
         """Test authenticated user retrieval"""
-        service = GitHubService(access_token="test_token")
+        mock_client = MagicMock()
+        service = GitHubService(access_token="test_token", client=mock_client)
 
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"login": "testuser"}
-            mock_response.raise_for_status = MagicMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"login": "testuser"}
+        mock_response.raise_for_status = MagicMock()
+        mock_response.headers = {}
+        mock_response.links = {}
 
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                return_value=mock_response
-            )
+        mock_client.get = AsyncMock(return_value=mock_response)
 
-            result = await service.get_authenticated_user()
+        result = await service.get_authenticated_user()
 
-            assert result["login"] == "testuser"
+        assert result["login"] == "testuser"
 
     @pytest.mark.asyncio
     async def test_get_authenticated_user_no_token(self):
@@ -140,3 +145,1248 @@ class TestGitHubService:
         with pytest.raises(ValueError, match="Access token required"):
             await service.get_authenticated_user()
 
+
+
+class TestGitHubServiceActivity:
+    """Tests for concurrent activity fetching"""
+
+    @pytest.mark.asyncio
+    async def test_get_user_activity_fetches_repos_concurrently(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response,
+        monkeypatch
+    ):
+        """Test per-repo commit fetches overlap but stay within the limit"""
+        monkeypatch.setattr(settings, "GITHUB_MAX_CONCURRENCY", 2)
+        repos = [
+            {**mock_github_repos_response[0], "id": i, "full_name": f"testuser/repo-{i}"}
+            for i in range(6)
+        ]
+        in_flight = 0
+        max_in_flight = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, max_in_flight
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                return httpx.Response(200, json=repos)
+
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(client=github_client(handler))
+        activity = await service.get_user_activity("testuser", TimeRange.WEEK)
+
+        assert max_in_flight == 2
+        assert activity.total_commits == 12
+        assert [c.date for c in activity.commits] == sorted(
+            (c.date for c in activity.commits), reverse=True
+        )
+        assert sum(a.count for a in activity.activity_chart) == 12
+
+    @pytest.mark.asyncio
+    async def test_get_user_activity_merge_is_deterministic(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response
+    ):
+        """Test commits with equal dates keep repository order regardless of completion order"""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            # First repo finishes last
+            if "test-repo-1" in path:
+                await asyncio.sleep(0.02)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(client=github_client(handler))
+        activity = await service.get_user_activity("testuser", TimeRange.WEEK)
+
+        assert [c.repository for c in activity.commits] == [
+            "testuser/test-repo-1",
+            "testuser/test-repo-2",
+            "testuser/test-repo-1",
+            "testuser/test-repo-2",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_user_activity_skips_slow_repo(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response,
+        monkeypatch
+    ):
+        """Test a repository exceeding the per-repo timeout is skipped"""
+        monkeypatch.setattr(settings, "GITHUB_REPO_TIMEOUT", 0.05)
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            if "test-repo-2" in path:
+                await asyncio.sleep(1)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(client=github_client(handler))
+        activity = await service.get_user_activity("testuser", TimeRange.WEEK)
+
+        assert activity.total_commits == 2
+        assert {c.repository for c in activity.commits} == {"testuser/test-repo-1"}
+
+
+def contributions_payload(aliases, repositories):
+    """Build a contributionsCollection response with the same data under each alias"""
+    collection = {
+        "totalCommitContributions": sum(
+            node["commitCount"] for nodes in repositories.values() for node in nodes
+        ),
+        "commitContributionsByRepository": [
+            {"repository": {"nameWithOwner": name}, "contributions": {"nodes": nodes}}
+            for name, nodes in repositories.items()
+        ],
+    }
+    return {"data": {"user": {alias: collection for alias in aliases}}}
+
+
+class TestGitHubServiceGraphQL:
+    """Tests for the GraphQL contributions fast path"""
+
+    @pytest.mark.asyncio
+    async def test_get_contribution_summary_single_request(self, github_client):
+        """Test a year window is fetched as aliased collections in one request"""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            body = json.loads(request.content)
+            aliases = [name[4:] for name in body["variables"] if name.startswith("from")]
+            return httpx.Response(200, json=contributions_payload(
+                [f"c{alias}" for alias in aliases],
+                {"testuser/test-repo-1": [
+                    {"occurredAt": "2024-01-01T08:00:00Z", "commitCount": 3}
+                ]}
+            ))
+
+        service = GitHubService(access_token="token", client=github_client(handler))
+        summary = await service.get_contribution_summary(
+            "testuser",
+            datetime(2024, 1, 1),
+            datetime(2024, 12, 31)
+        )
+
+        assert len(requests) == 1
+        query = json.loads(requests[0].content)["query"]
+        assert query.count("contributionsCollection") == 4
+        assert summary.total_commits == 12
+        assert summary.activity_chart[0].date == "2024-01-01"
+        assert summary.activity_chart[0].count == 12
+        assert summary.repositories == ["testuser/test-repo-1"]
+
+    @pytest.mark.asyncio
+    async def test_get_contribution_summary_requires_token(self):
+        """Test GraphQL contributions need an access token"""
+        service = GitHubService(client=MagicMock())
+
+        with pytest.raises(ValueError, match="Access token required"):
+            await service.get_contribution_summary(
+                "testuser", datetime(2024, 1, 1), datetime(2024, 1, 8)
+            )
+
+    @pytest.mark.asyncio
+    async def test_get_user_activity_uses_contributions(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response
+    ):
+        """Test the chart comes from GraphQL and inactive repos are not fetched"""
+        commit_paths = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/graphql":
+                return httpx.Response(200, json=contributions_payload(
+                    ["c0"],
+                    {"testuser/test-repo-2": [
+                        {"occurredAt": "2024-01-03T00:00:00Z", "commitCount": 7}
+                    ]}
+                ))
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/user/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            commit_paths.append(path)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(access_token="token", client=github_client(handler))
+        activity = await service.get_user_activity("testuser", TimeRange.WEEK)
+
+        assert commit_paths == ["/repos/testuser/test-repo-2/commits"]
+        assert activity.total_commits == 7
+        assert [(a.date, a.count) for a in activity.activity_chart] == [("2024-01-03", 7)]
+        assert len(activity.commits) == 2
+
+    @pytest.mark.asyncio
+    async def test_get_user_activity_falls_back_to_rest(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response
+    ):
+        """Test GraphQL errors fall back to counting REST commits"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/graphql":
+                return httpx.Response(200, json={"errors": [{"message": "Something went wrong"}]})
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/user/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(access_token="token", client=github_client(handler))
+        activity = await service.get_user_activity("testuser", TimeRange.WEEK)
+
+        assert activity.total_commits == 4
+        assert sum(a.count for a in activity.activity_chart) == 4
+
+
+def history_node(sha, date):
+    """Build a GraphQL commit history node"""
+    return {
+        "oid": sha,
+        "messageHeadline": f"Commit {sha}",
+        "authoredDate": date,
+        "url": f"https://github.com/testuser/repo/commit/{sha}",
+        "author": {"name": "Test User"},
+    }
+
+
+class TestGitHubServiceHistoryBatch:
+    """Tests for aliased GraphQL commit history batching"""
+
+    @pytest.mark.asyncio
+    async def test_fetch_history_batch_paginates_per_alias(self, github_client):
+        """Test only aliases with more pages are queried again"""
+        queries = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            variables = body["variables"]
+            queries.append(variables)
+            data = {"rateLimit": {"cost": 1, "remaining": 4999, "resetAt": None}}
+            if "owner0" in variables and variables["cursor0"] is None:
+                data["r0"] = {"defaultBranchRef": {"target": {"history": {
+                    "pageInfo": {"hasNextPage": True, "endCursor": "page2"},
+                    "nodes": [history_node("a1", "2024-01-02T00:00:00Z")],
+                }}}}
+            elif "owner0" in variables:
+                data["r0"] = {"defaultBranchRef": {"target": {"history": {
+                    "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    "nodes": [history_node("a2", "2024-01-01T00:00:00Z")],
+                }}}}
+            if "owner1" in variables:
+                # Empty repository
+                data["r1"] = {"defaultBranchRef": None}
+            if "owner2" in variables:
+                data["r2"] = {"defaultBranchRef": {"target": {"history": {
+                    "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    "nodes": [history_node("c1", "2024-01-03T00:00:00Z")],
+                }}}}
+            return httpx.Response(200, json={"data": data})
+
+        repos = [
+            Repository(id=i, name=f"repo-{i}", full_name=f"testuser/repo-{i}",
+                       html_url=f"https://github.com/testuser/repo-{i}")
+            for i in range(3)
+        ]
+        service = GitHubService(access_token="token", client=github_client(handler))
+        results = await service.fetch_history_batch(
+            repos, datetime(2024, 1, 1), datetime(2024, 1, 8), "U_123", "testuser"
+        )
+
+        assert len(queries) == 2
+        assert {"owner0", "owner1", "owner2"} <= set(queries[0])
+        assert "owner1" not in queries[1] and "owner2" not in queries[1]
+        assert queries[1]["cursor0"] == "page2"
+        assert [c.sha for c in results[0]] == ["a1", "a2"]
+        assert results[1] == []
+        assert results[2][0].repository == "testuser/repo-2"
+        assert results[2][0].message == "Commit c1"
+
+    @pytest.mark.asyncio
+    async def test_fetch_history_batch_normalises_dates_to_utc(self, github_client):
+        """Test authored dates with an offset come back as UTC like REST dates"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"data": {"r0": {"defaultBranchRef": {"target": {"history": {
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                "nodes": [history_node("a1", "2024-01-01T23:30:00-05:00")],
+            }}}}}})
+
+        repo = Repository(id=1, name="repo", full_name="testuser/repo",
+                          html_url="https://github.com/testuser/repo")
+        service = GitHubService(access_token="token", client=github_client(handler))
+        results = await service.fetch_history_batch(
+            [repo], datetime(2024, 1, 1), datetime(2024, 1, 8), "U_123", "testuser"
+        )
+
+        assert results[0][0].date == "2024-01-02T04:30:00Z"
+
+    @pytest.mark.asyncio
+    async def test_failed_alias_falls_back_to_rest(self, github_client, mock_github_commits_response):
+        """Test a repository whose alias errored is fetched through REST, not treated as empty"""
+        rest_paths = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/graphql":
+                return httpx.Response(200, json={
+                    "data": {
+                        "r0": {"defaultBranchRef": None},
+                        "r1": None,
+                    },
+                    "errors": [{"type": "RESOURCE_LIMITS_EXCEEDED", "path": ["r1"], "message": "Too big"}],
+                })
+            rest_paths.append(request.url.path)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        repos = [
+            Repository(id=i, name=f"repo-{i}", full_name=f"testuser/repo-{i}",
+                       html_url=f"https://github.com/testuser/repo-{i}")
+            for i in range(2)
+        ]
+        service = GitHubService(access_token="token", client=github_client(handler))
+
+        batch = await service.fetch_history_batch(
+            repos, datetime(2024, 1, 1), datetime(2024, 1, 8), "U_123", "testuser"
+        )
+        results = {
+            index: commits
+            async for index, repo, commits in service.iter_repos_commits(
+                repos, datetime(2024, 1, 1), datetime(2024, 1, 8),
+                author="testuser", author_id="U_123"
+            )
+        }
+
+        assert batch == [[], None]
+        assert results[0] == []
+        assert len(results[1]) == 2
+        assert rest_paths == ["/repos/testuser/repo-1/commits"]
+
+    @pytest.mark.asyncio
+    async def test_iter_repos_commits_batches_repositories(self, github_client, monkeypatch):
+        """Test repositories are packed into GraphQL queries by batch size"""
+        monkeypatch.setattr(settings, "GITHUB_GRAPHQL_BATCH_SIZE", 2)
+        graphql_calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal graphql_calls
+            graphql_calls += 1
+            variables = json.loads(request.content)["variables"]
+            data = {"rateLimit": {"cost": 1, "remaining": 4999, "resetAt": None}}
+            for name in variables:
+                if name.startswith("owner"):
+                    i = name[5:]
+                    data[f"r{i}"] = {"defaultBranchRef": {"target": {"history": {
+                        "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        "nodes": [history_node(variables[f"name{i}"], "2024-01-01T00:00:00Z")],
+                    }}}}
+            return httpx.Response(200, json={"data": data})
+
+        repos = [
+            Repository(id=i, name=f"repo-{i}", full_name=f"testuser/repo-{i}",
+                       html_url=f"https://github.com/testuser/repo-{i}")
+            for i in range(5)
+        ]
+        service = GitHubService(access_token="token", client=github_client(handler))
+        results = {
+            index: commits
+            async for index, repo, commits in service.iter_repos_commits(
+                repos, datetime(2024, 1, 1), datetime(2024, 1, 8),
+                author="testuser", author_id="U_123"
+            )
+        }
+
+        assert graphql_calls == 3
+        assert [results[i][0].sha for i in range(5)] == [f"repo-{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_iter_repos_commits_low_budget_switches_to_rest(
+        self,
+        github_client,
+        mock_github_commits_response,
+        monkeypatch
+    ):
+        """Test a nearly exhausted GraphQL budget sends later batches through REST"""
+        monkeypatch.setattr(settings, "GITHUB_GRAPHQL_BATCH_SIZE", 1)
+        monkeypatch.setattr(settings, "GITHUB_MAX_CONCURRENCY", 1)
+        graphql_calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal graphql_calls
+            if request.url.path == "/graphql":
+                graphql_calls += 1
+                return httpx.Response(200, json={"data": {
+                    "rateLimit": {"cost": 1, "remaining": 5, "resetAt": None},
+                    "r0": {"defaultBranchRef": None},
+                }})
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        repos = [
+            Repository(id=i, name=f"repo-{i}", full_name=f"testuser/repo-{i}",
+                       html_url=f"https://github.com/testuser/repo-{i}")
+            for i in range(3)
+        ]
+        service = GitHubService(access_token="token", client=github_client(handler))
+        results = [
+            item async for item in service.iter_repos_commits(
+                repos, datetime(2024, 1, 1), datetime(2024, 1, 8),
+                author="testuser", author_id="U_123"
+            )
+        ]
+
+        assert graphql_calls == 1
+        assert sorted(len(commits) for _, _, commits in results) == [0, 2, 2]
+
+
+class TestGitHubServicePagination:
+    """Tests for Link header driven pagination"""
+
+    @pytest.mark.asyncio
+    async def test_get_user_repos_fetches_remaining_pages_concurrently(
+        self,
+        github_client,
+        mock_github_repos_response
+    ):
+        """Test pages after the first are fetched together and kept in order"""
+        pages_requested = []
+        in_flight = 0
+        max_in_flight = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, max_in_flight
+            page = int(request.url.params["page"])
+            pages_requested.append(page)
+            size = 100 if page < 4 else 10
+            repos = [
+                {**mock_github_repos_response[0], "id": page * 1000 + i,
+                 "full_name": f"testuser/p{page}-{i}"}
+                for i in range(size)
+            ]
+            headers = {}
+            if page == 1:
+                headers["Link"] = (
+                    '<https://api.github.com/user/1/repos?per_page=100&page=2>; rel="next", '
+                    '<https://api.github.com/user/1/repos?per_page=100&page=4>; rel="last"'
+                )
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            # Later pages answer first
+            await asyncio.sleep(0.01 * (5 - page))
+            in_flight -= 1
+            return httpx.Response(200, json=repos, headers=headers)
+
+        service = GitHubService(client=github_client(handler))
+        repos = await service.get_user_repos("testuser")
+
+        assert sorted(pages_requested) == [1, 2, 3, 4]
+        assert max_in_flight == 3
+        assert len(repos) == 310
+        assert repos[0].full_name == "testuser/p1-0"
+        assert repos[100].full_name == "testuser/p2-0"
+        assert repos[-1].full_name == "testuser/p4-9"
+
+    @pytest.mark.asyncio
+    async def test_cached_pages_are_read_and_written_in_batches(self, github_client, monkeypatch):
+        """Test the cache entries of concurrent pages use one batched read and write"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params["page"])
+            headers = {"ETag": f'"page-{page}"'}
+            if page == 1:
+                headers["Link"] = '<https://api.github.com/things?page=3>; rel="last"'
+            return httpx.Response(200, json=[page] * (100 if page < 3 else 5), headers=headers)
+
+        service = GitHubService(client=github_client(handler))
+        set_many_calls = []
+        set_many = service.cache.set_many
+
+        async def spy(values, **kwargs):
+            set_many_calls.append(sorted(values))
+            return await set_many(values, **kwargs)
+
+        monkeypatch.setattr(service.cache, "set_many", spy)
+
+        items = await service.get_all_pages("https://api.github.com/things", {}, cache_key="things")
+
+        assert len(items) == 205
+        assert set_many_calls == [["things:page2", "things:page3"]]
+        entry = await service.cache.get_entry("things:page3")
+        assert entry.etag == '"page-3"'
+
+    @pytest.mark.asyncio
+    async def test_get_all_pages_without_link_header_walks_serially(self, github_client):
+        """Test pagination still works when no Link header is returned"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params["page"])
+            return httpx.Response(200, json=[page] * (100 if page < 3 else 5))
+
+        service = GitHubService(client=github_client(handler))
+        items = await service.get_all_pages("https://api.github.com/things", {})
+
+        assert len(items) == 205
+        assert items[-1] == 3
+
+    @pytest.mark.asyncio
+    async def test_get_repo_commits_empty_repository(self, github_client):
+        """Test an empty repository returns no commits"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(409, json={"message": "Git Repository is empty."})
+
+        service = GitHubService(client=github_client(handler))
+        commits = await service.get_repo_commits(
+            "testuser", "empty", datetime(2024, 1, 1), datetime(2024, 1, 8)
+        )
+
+        assert commits == []
+
+
+class TestGitHubServiceRevalidation:
+    """Tests for ETag/Last-Modified revalidation"""
+
+    @pytest.mark.asyncio
+    async def test_expired_user_info_revalidated_with_etag(
+        self,
+        github_client,
+        mock_github_user_response,
+        monkeypatch
+    ):
+        """Test an expired entry is revalidated and a 304 reuses the cached body"""
+        monkeypatch.setattr(settings, "CACHE_EXPIRE_MINUTES", 0)
+        seen_headers = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen_headers.append(dict(request.headers))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                json=mock_github_user_response,
+                headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+            )
+
+        service = GitHubService(client=github_client(handler))
+        first = await service.get_user_info("testuser")
+        second = await service.get_user_info("testuser")
+
+        assert first == second == mock_github_user_response
+        assert "if-none-match" not in seen_headers[0]
+        assert seen_headers[1]["if-none-match"] == '"v1"'
+        assert seen_headers[1]["if-modified-since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    @pytest.mark.asyncio
+    async def test_changed_resource_replaces_cached_copy(
+        self,
+        github_client,
+        mock_github_user_response,
+        monkeypatch
+    ):
+        """Test a 200 on revalidation stores the new body and validator"""
+        monkeypatch.setattr(settings, "CACHE_EXPIRE_MINUTES", 0)
+        version = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal version
+            version += 1
+            return httpx.Response(
+                200,
+                json={**mock_github_user_response, "followers": version},
+                headers={"ETag": f'"v{version}"'}
+            )
+
+        service = GitHubService(client=github_client(handler))
+        await service.get_user_info("testuser")
+        updated = await service.get_user_info("testuser")
+        entry = await service.cache.get_entry("user:testuser")
+
+        assert updated["followers"] == 2
+        assert entry.etag == '"v2"'
+
+    @pytest.mark.asyncio
+    async def test_fresh_entry_skips_request(self, github_client, mock_github_user_response):
+        """Test a fresh cached response is served without contacting GitHub"""
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(200, json=mock_github_user_response, headers={"ETag": '"v1"'})
+
+        service = GitHubService(client=github_client(handler))
+        await service.get_user_info("testuser")
+        await service.get_user_info("testuser")
+
+        assert calls == 1
+
+
+class TestGitHubServiceCoalescing:
+    """Tests for request coalescing"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_activity_requests_share_one_fetch(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response
+    ):
+        """Test concurrent requests for one user, in any case, run one computation"""
+        paths = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            paths.append(request.url.path)
+            await asyncio.sleep(0.01)
+            if request.url.path.startswith("/users/") and request.url.path.endswith("/repos"):
+                return httpx.Response(200, json=mock_github_repos_response)
+            if request.url.path.startswith("/users/"):
+                return httpx.Response(200, json=mock_github_user_response)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        client = github_client(handler)
+        usernames = ["testuser", "TestUser", "TESTUSER"] * 10
+        results = await asyncio.gather(*(
+            GitHubService(client=client).get_user_activity(name, TimeRange.WEEK)
+            for name in usernames
+        ))
+
+        assert len(paths) == 4
+        assert all(result.total_commits == 4 for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cache_keys_are_case_insensitive_and_hide_tokens(self):
+        """Test cache keys lowercase usernames and never contain the token"""
+        service = GitHubService(access_token="secret_token", client=MagicMock())
+
+        key = service._cache_key("user_activity", "TestUser", "week", service.token_scope)
+
+        assert key.startswith("user_activity:testuser:week:")
+        assert "secret_token" not in key
+
+
+class TestGitHubServiceStaleWhileRevalidate:
+    """Tests for serving stale activity while refreshing"""
+
+    @pytest.mark.asyncio
+    async def test_stale_activity_served_while_refreshing(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response,
+        monkeypatch
+    ):
+        """Test an expired activity is returned at once and refreshed in the background"""
+        monkeypatch.setattr(settings, "CACHE_EXPIRE_MINUTES", 0)
+        commits = list(mock_github_commits_response)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            return httpx.Response(200, json=commits)
+
+        service = GitHubService(client=github_client(handler))
+        first = await service.get_user_activity("testuser", TimeRange.WEEK)
+
+        commits.append({**commits[0], "sha": "new123"})
+        monkeypatch.setattr(settings, "CACHE_EXPIRE_MINUTES", 10)
+        stale = await service.get_user_activity("testuser", TimeRange.WEEK)
+        while _refresh_tasks:
+            await asyncio.gather(*_refresh_tasks)
+        refreshed = await GitHubService(client=github_client(handler)).get_user_activity(
+            "testuser", TimeRange.WEEK
+        )
+
+        assert first.total_commits == stale.total_commits == 4
+        assert refreshed.total_commits == 6
+
+    @pytest.mark.asyncio
+    async def test_cached_repositories_keep_aliased_fields(
+        self,
+        github_client,
+        mock_github_repos_response
+    ):
+        """Test stars and forks survive a cache round trip"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=mock_github_repos_response)
+
+        client = github_client(handler)
+        await GitHubService(client=client).get_user_repos("testuser")
+        cached = await GitHubService(client=client).get_user_repos("testuser")
+
+        assert cached[0].stars == 10
+        assert cached[0].forks == 5
+
+
+class TestGitHubServiceIncrementalSync:
+    """Tests for syncing commits from stored day segments"""
+
+    @staticmethod
+    def commit_payload(sha, date):
+        return {
+            "sha": sha,
+            "commit": {"message": f"Commit {sha}", "author": {"name": "testuser", "date": date}},
+            "html_url": f"https://github.com/testuser/repo/commit/{sha}",
+        }
+
+    @pytest.mark.asyncio
+    async def test_refresh_fetches_only_after_high_water_mark(self, github_client, monkeypatch):
+        """Test a later refresh requests the delta and merges it with stored commits"""
+        monkeypatch.setattr(settings, "GITHUB_SYNC_OVERLAP_MINUTES", 60)
+        requested_since = []
+        responses = [
+            [self.commit_payload("old", "2024-01-02T00:00:00Z")],
+            [self.commit_payload("new", "2024-01-08T12:30:00Z")],
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested_since.append(request.url.params["since"])
+            return httpx.Response(200, json=responses[len(requested_since) - 1])
+
+        repo = Repository(id=1, name="repo", full_name="testuser/repo",
+                          html_url="https://github.com/testuser/repo")
+        service = GitHubService(client=github_client(handler))
+
+        async def collect(until):
+            return [
+                commits
+                async for _, _, commits in service.iter_synced_commits(
+                    [repo], datetime(2024, 1, 1), until, author="testuser"
+                )
+            ][0]
+
+        first = await collect(datetime(2024, 1, 8, 12))
+        second = await collect(datetime(2024, 1, 9))
+
+        assert requested_since == ["2024-01-01T00:00:00Z", "2024-01-08T11:00:00Z"]
+        assert [c.sha for c in first] == ["old"]
+        assert [c.sha for c in second] == ["new", "old"]
+
+    @pytest.mark.asyncio
+    async def test_stored_window_is_served_without_requests(self, github_client):
+        """Test a window inside the stored history makes no GitHub calls"""
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(200, json=[self.commit_payload("a", "2024-01-03T00:00:00Z")])
+
+        repo = Repository(id=1, name="repo", full_name="testuser/repo",
+                          html_url="https://github.com/testuser/repo")
+        service = GitHubService(client=github_client(handler))
+
+        async for _ in service.iter_synced_commits(
+            [repo], datetime(2024, 1, 1), datetime(2024, 1, 8), author="testuser"
+        ):
+            pass
+        results = [
+            commits
+            async for _, _, commits in service.iter_synced_commits(
+                [repo], datetime(2024, 1, 2), datetime(2024, 1, 5), author="testuser"
+            )
+        ]
+
+        assert calls == 1
+        assert [c.sha for c in results[0]] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_historical_window_assembled_from_stored_days(
+        self, github_client, mock_github_user_response, mock_github_repos_response
+    ):
+        """Test a window inside already stored days makes no commit requests"""
+        commit_requests = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal commit_requests
+            if request.url.path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if request.url.path == "/users/testuser/repos":
+                return httpx.Response(200, json=mock_github_repos_response[:1])
+            commit_requests += 1
+            return httpx.Response(200, json=[
+                self.commit_payload("a", "2024-01-02T10:00:00Z"),
+                self.commit_payload("b", "2024-01-05T10:00:00Z"),
+            ])
+
+        client = github_client(handler)
+        week = await GitHubService(client=client).get_user_activity(
+            "testuser", TimeRange.WEEK, since=datetime(2024, 1, 1), until=datetime(2024, 1, 8)
+        )
+        days = await GitHubService(client=client).get_user_activity(
+            "testuser", TimeRange.WEEK, since=datetime(2024, 1, 4), until=datetime(2024, 1, 6)
+        )
+
+        assert commit_requests == 1
+        assert week.total_commits == 2
+        assert week.since == datetime(2024, 1, 1)
+        assert [c.sha for c in days.commits] == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_future_since_without_until_rejected(self, github_client):
+        """Test a window starting in the future is rejected before any request"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise AssertionError("GitHub should not be called")
+
+        service = GitHubService(client=github_client(handler))
+
+        with pytest.raises(ValueError, match="in the past"):
+            await service.get_user_activity(
+                "testuser", TimeRange.WEEK, since=datetime.utcnow() + timedelta(days=1)
+            )
+
+class TestGitHubServiceRollUp:
+    """Tests for slicing narrower time ranges from wider cached ranges"""
+
+    @staticmethod
+    def handler_for(user, repos, calls):
+        now = datetime.utcnow()
+        commits = [
+            {
+                "sha": sha,
+                "commit": {"message": sha, "author": {
+                    "name": "testuser", "date": (now - timedelta(days=days)).isoformat() + "Z"
+                }},
+                "html_url": f"https://github.com/testuser/repo/commit/{sha}",
+            }
+            for sha, days in [("recent", 2), ("older", 20)]
+        ]
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            await asyncio.sleep(0.01)
+            if request.url.path == "/users/testuser":
+                return httpx.Response(200, json=user)
+            if request.url.path == "/users/testuser/repos":
+                return httpx.Response(200, json=repos[:1])
+            return httpx.Response(200, json=commits)
+
+        return handler
+
+    @pytest.mark.asyncio
+    async def test_narrower_range_sliced_from_cached_wider_range(
+        self, github_client, mock_github_user_response, mock_github_repos_response
+    ):
+        """Test a week view is derived from a cached month without GitHub calls"""
+        calls = []
+        client = github_client(self.handler_for(mock_github_user_response, mock_github_repos_response, calls))
+
+        month = await GitHubService(client=client).get_user_activity("testuser", TimeRange.MONTH)
+        calls_after_month = len(calls)
+        week = await GitHubService(client=client).get_user_activity("testuser", TimeRange.WEEK)
+
+        assert len(calls) == calls_after_month
+        assert month.total_commits == 2
+        assert week.time_range == TimeRange.WEEK
+        assert [c.sha for c in week.commits] == ["recent"]
+        assert week.total_commits == sum(day.count for day in week.activity_chart) == 1
+
+    @pytest.mark.asyncio
+    async def test_narrower_range_waits_for_wider_range_in_flight(
+        self, github_client, mock_github_user_response, mock_github_repos_response
+    ):
+        """Test concurrent year and week requests share one fan-out"""
+        calls = []
+        client = github_client(self.handler_for(mock_github_user_response, mock_github_repos_response, calls))
+
+        service = GitHubService(client=client)
+        year_key = service._cache_key("user_activity", "testuser", "year", service.token_scope)
+        year_task = asyncio.create_task(service.get_user_activity("testuser", TimeRange.YEAR))
+        while not singleflight.in_flight(year_key):
+            await asyncio.sleep(0)
+        week = await GitHubService(client=client).get_user_activity("testuser", TimeRange.WEEK)
+        year = await year_task
+
+        assert calls.count("/users/testuser/repos") == 1
+        assert year.total_commits == 2
+        assert [c.sha for c in week.commits] == ["recent"]
+
+    @staticmethod
+    def activity(commit_times, total_commits=None):
+        """Week activity with commits at the given times and a chart by day"""
+        days = {}
+        for when in commit_times:
+            day = when.strftime("%Y-%m-%d")
+            days[day] = days.get(day, 0) + 1
+        return {
+            "username": "testuser",
+            "total_commits": len(commit_times) if total_commits is None else total_commits,
+            "commits": [
+                {"sha": str(i), "date": when.isoformat() + "Z"}
+                for i, when in enumerate(commit_times)
+            ],
+            "activity_chart": [{"date": day, "count": count} for day, count in sorted(days.items())],
+            "time_range": "week",
+        }
+
+    def test_slice_counts_listed_commits_exactly(self):
+        """Test a complete commit list is counted from the exact start, not the start day"""
+        now = datetime.utcnow()
+        activity = self.activity([now - timedelta(hours=h) for h in (1, 23, 24.5)])
+
+        day = GitHubService(client=MagicMock())._slice_activity(activity, TimeRange.DAY)
+
+        assert day["total_commits"] == len(day["commits"]) == 2
+        assert datetime.fromisoformat(day["since"]) > now - timedelta(hours=24, minutes=1)
+
+    def test_slice_of_truncated_list_covers_whole_start_day(self):
+        """Test a capped commit list is sliced from midnight of the start day, like the chart"""
+        now = datetime.utcnow()
+        start_day = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        before_start = start_day + (now - timedelta(days=1) - start_day) / 2
+        activity = self.activity(
+            [now - timedelta(hours=1), before_start, now - timedelta(days=3)], total_commits=150
+        )
+
+        day = GitHubService(client=MagicMock())._slice_activity(activity, TimeRange.DAY)
+
+        assert day["since"] == start_day.isoformat()
+        assert [c["sha"] for c in day["commits"]] == ["0", "1"]
+        assert day["total_commits"] == sum(d["count"] for d in day["activity_chart"]) == 2
+
+
+class TestGitHubServiceRepoScheduling:
+    """Tests for pruning and ordering repositories before fetching commits"""
+
+    @staticmethod
+    def repo(i, **fields):
+        return Repository(id=i, name=f"repo-{i}", full_name=f"testuser/repo-{i}",
+                          html_url=f"https://github.com/testuser/repo-{i}", **fields)
+
+    def test_skips_inactive_and_empty_repos(self):
+        """Test repos pushed before the window and empty repos are not fetched"""
+        service = GitHubService(client=MagicMock())
+        repos = [
+            self.repo(0, pushed_at="2024-01-02T00:00:00Z", size=10),
+            self.repo(1, pushed_at="2023-06-01T00:00:00Z", size=10),
+            self.repo(2, pushed_at="2024-01-05T00:00:00Z", size=0),
+            self.repo(3, pushed_at="2024-01-06T00:00:00Z", size=10, fork=True),
+            self.repo(4),
+        ]
+
+        scheduled = service._schedule_repos(repos, datetime(2024, 1, 1))
+
+        assert [repo.id for repo in scheduled] == [3, 0, 4]
+
+    def test_budget_limits_scheduled_repos(self, monkeypatch):
+        """Test only the most recently pushed repos fit in the budget"""
+        monkeypatch.setattr(settings, "GITHUB_REPO_BUDGET", 2)
+        service = GitHubService(client=MagicMock())
+        repos = [self.repo(i, pushed_at=f"2024-01-0{i + 1}T00:00:00Z") for i in range(5)]
+
+        scheduled = service._schedule_repos(repos, datetime(2024, 1, 1))
+
+        assert [repo.id for repo in scheduled] == [4, 3]
+
+    @pytest.mark.asyncio
+    async def test_repository_activity_fields_are_parsed(self, github_client):
+        """Test pushed_at, fork, size and archived survive the repo cache"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json=[{
+                "id": 1, "name": "repo", "full_name": "testuser/repo",
+                "html_url": "https://github.com/testuser/repo",
+                "pushed_at": "2024-01-02T00:00:00Z", "fork": True, "size": 42, "archived": True,
+            }])
+
+        client = github_client(handler)
+        await GitHubService(client=client).get_user_repos("testuser")
+        repo = (await GitHubService(client=client).get_user_repos("testuser"))[0]
+
+        assert (repo.pushed_at, repo.fork, repo.size, repo.archived) == (
+            "2024-01-02T00:00:00Z", True, 42, True
+        )
+
+
+class TestGitHubServicePartialResults:
+    """Tests for reporting repositories that could not be fetched"""
+
+    @pytest.mark.asyncio
+    async def test_failed_repository_marks_activity_partial(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response,
+        monkeypatch
+    ):
+        """Test a repo failing after retries is listed instead of silently dropped"""
+        monkeypatch.setattr(settings, "GITHUB_RETRY_BACKOFF", 0)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            if "test-repo-2" in path:
+                return httpx.Response(502)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(client=github_client(handler))
+        activity = await service.get_user_activity("testuser", TimeRange.WEEK)
+
+        assert activity.partial is True
+        assert activity.missing_repositories == ["testuser/test-repo-2"]
+        assert activity.total_commits == 2
+
+        entry = await service.cache.get_entry(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope)
+        )
+        assert entry.expires_at < datetime.utcnow() + timedelta(minutes=2)
+
+
+class TestGitHubServiceStreaming:
+    """Tests for streaming activity as it is fetched"""
+
+    @pytest.mark.asyncio
+    async def test_stream_emits_progress_then_summary(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response
+    ):
+        """Test user and repos come first, then per-repo commits, then the cached summary"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(client=github_client(handler))
+        events = [event async for event in service.stream_user_activity("testuser", TimeRange.WEEK)]
+        names = [event["event"] for event in events]
+
+        assert names[:2] == ["user", "repositories"]
+        assert names[-1] == "summary"
+        progress = [event["data"] for event in events if event["event"] == "commits"]
+        assert [p["done"] for p in progress] == [1, 2]
+        assert all(p["total"] == 2 for p in progress)
+        assert "chart" in names
+
+        cached = await service.cache.get(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope)
+        )
+        assert cached == events[-1]["data"]
+
+    @pytest.mark.asyncio
+    async def test_cached_activity_streams_summary_only(self, github_client):
+        """Test a cached result is sent as a single summary event"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise AssertionError("GitHub should not be called")
+
+        service = GitHubService(client=github_client(handler))
+        activity = {"username": "testuser", "total_commits": 0}
+        await service.cache.set(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope),
+            activity
+        )
+
+        events = [event async for event in service.stream_user_activity("testuser", TimeRange.WEEK)]
+
+        assert events == [{"event": "summary", "data": activity}]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stream_joins_running_computation(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response
+    ):
+        """Test a second stream joins the one in progress and gets its summary"""
+        repo_calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal repo_calls
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                repo_calls += 1
+                return httpx.Response(200, json=mock_github_repos_response)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(client=github_client(handler))
+        first = service.stream_user_activity("testuser", TimeRange.WEEK)
+        first_events = [await first.__anext__()]
+
+        second = asyncio.create_task(
+            GitHubService(client=github_client(handler)).stream_user_activity(
+                "testuser", TimeRange.WEEK
+            ).__anext__()
+        )
+        first_events += [event async for event in first]
+
+        assert await second == first_events[-1]
+        assert first_events[-1]["event"] == "summary"
+        assert repo_calls == 1
+
+
+class TestGitHubServiceCachedJson:
+    """Tests for serving cached activity without re-serializing it"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_returns_cached_entry(self, github_client, monkeypatch):
+        """Test a fresh entry is returned as cached, without validating a model"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise AssertionError("GitHub should not be called")
+
+        service = GitHubService(client=github_client(handler))
+        activity = {"username": "testuser", "total_commits": 0}
+        await service.cache.set(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope),
+            activity
+        )
+
+        def no_validation(*args, **kwargs):
+            raise AssertionError("model validated")
+
+        monkeypatch.setattr("app.services.github_service.UserActivity", no_validation)
+
+        entry = await service.get_user_activity_entry("testuser", TimeRange.WEEK)
+
+        assert json.loads(entry.encoded()) == activity
+        assert not entry.is_expired
+        assert entry.created_at is not None
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_reads_key_once(self, github_client, monkeypatch):
+        """Test the activity key is read in a single batch with the wider ranges"""
+        service = GitHubService(client=github_client(lambda request: httpx.Response(500)))
+        await service.cache.set(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope),
+            {"username": "testuser"}
+        )
+        reads = []
+        get_entries = service.cache.get_entries
+
+        async def counting_get_entries(keys):
+            reads.append(keys)
+            return await get_entries(keys)
+
+        async def no_get_entry(key):
+            raise AssertionError(f"{key} read again")
+
+        monkeypatch.setattr(service.cache, "get_entries", counting_get_entries)
+        monkeypatch.setattr(service.cache, "get_entry", no_get_entry)
+
+        entry = await service.get_user_activity_entry("testuser", TimeRange.WEEK)
+
+        assert entry.value == {"username": "testuser"}
+        assert len(reads) == 1
+
+    @pytest.mark.asyncio
+    async def test_gzip_and_digest_are_computed_once_per_cached_copy(self, github_client):
+        """Test the gzip body and hash are kept with the cached entry"""
+        service = GitHubService(client=github_client(lambda request: httpx.Response(500)))
+        await service.cache.set(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope),
+            {"username": "testuser"}
+        )
+
+        first = await service.get_user_activity_entry("testuser", TimeRange.WEEK)
+        second = await service.get_user_activity_entry("testuser", TimeRange.WEEK)
+
+        assert first.gzip_encoded() is second.gzip_encoded()
+        assert first.hexdigest() is second.hexdigest()
+        assert json.loads(gzip.decompress(first.gzip_encoded())) == {"username": "testuser"}
+
+    @pytest.mark.asyncio
+    async def test_cache_miss_returns_the_new_entry(
+        self,
+        github_client,
+        mock_github_user_response,
+        mock_github_repos_response,
+        mock_github_commits_response
+    ):
+        """Test a miss computes activity and returns the entry it was cached under"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/users/testuser":
+                return httpx.Response(200, json=mock_github_user_response)
+            if path == "/users/testuser/repos":
+                return httpx.Response(200, json=mock_github_repos_response)
+            return httpx.Response(200, json=mock_github_commits_response)
+
+        service = GitHubService(client=github_client(handler))
+        entry = await service.get_user_activity_entry("testuser", TimeRange.WEEK)
+
+        activity = UserActivity(**json.loads(entry.encoded()))
+        assert activity.username == "testuser"
+        assert activity.total_commits == 4
+        assert not entry.is_expired
+        cached = await service.cache.get_entry(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope)
+        )
+        assert entry is cached
+
+    @pytest.mark.asyncio
+    async def test_user_info_entry_has_cached_expiry(self, github_client, mock_github_user_response):
+        """Test user info is returned without its pagination, expiring with its cached copy"""
+        service = GitHubService(
+            client=github_client(lambda request: httpx.Response(200, json=mock_github_user_response))
+        )
+
+        entry = await service.get_user_info_entry("testuser")
+        cached = await service.cache.get_entry(service._cache_key("user", "testuser"))
+
+        assert entry.value == mock_github_user_response
+        assert entry.expires_at == cached.expires_at
+        assert entry.created_at == cached.created_at
+
+    @pytest.mark.asyncio
+    async def test_user_info_miss_returns_stored_entry_without_rereading(
+        self, github_client, mock_github_user_response, monkeypatch
+    ):
+        """Test a miss reads the cache once and returns the entry it stored"""
+        service = GitHubService(
+            client=github_client(lambda request: httpx.Response(200, json=mock_github_user_response))
+        )
+        reads = []
+        get_entry = service.cache.get_entry
+
+        async def counting_get_entry(key):
+            reads.append(key)
+            return await get_entry(key)
+
+        monkeypatch.setattr(service.cache, "get_entry", counting_get_entry)
+
+        entry = await service.get_user_info_entry("testuser")
+        cached = await get_entry(service._cache_key("user", "testuser"))
+
+        assert reads == [service._cache_key("user", "testuser")]
+        assert entry.value == mock_github_user_response
+        assert not entry.is_expired
+        assert entry.created_at == cached.created_at
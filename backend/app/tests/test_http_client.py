@@ -0,0 +1,59 @@
+import pytest
+import httpx
+
+from app.services import http_client
+from app.services.github_service import GitHubService
+
+
+class TestHttpClient:
+    """Tests for the shared HTTP client"""
+
+    @pytest.mark.asyncio
+    async def test_get_http_client_is_shared(self):
+        """Test that services share one pooled client"""
+        await http_client.close_http_client()
+
+        client = http_client.get_http_client()
+
+        assert http_client.get_http_client() is client
+        assert GitHubService().client is client
+        assert GitHubService(access_token="token").client is client
+
+        await http_client.close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_closed_client_is_recreated(self):
+        """Test that a closed client is replaced lazily"""
+        client = http_client.get_http_client()
+        await http_client.close_http_client()
+
+        new_client = http_client.get_http_client()
+
+        assert new_client is not client
+        assert not new_client.is_closed
+
+        await http_client.close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_hits_rate_limit_endpoint(self):
+        """Test warm-up requests go to the free rate limit endpoint"""
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url.path)
+            return httpx.Response(200, json={})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await http_client.warm_up(client)
+
+        assert requested
+        assert all(path == "/rate_limit" for path in requested)
+
+    @pytest.mark.asyncio
+    async def test_warm_up_failure_is_not_fatal(self):
+        """Test warm-up swallows connection errors"""
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("unreachable", request=request)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await http_client.warm_up(client)
@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.database import ActivityJob, StoredCommit, UserSession
+from app.services.cache_service import CacheService
+from app.services.janitor import Janitor
+
+
+class TestJanitor:
+    """Tests for periodic database maintenance"""
+
+    @pytest.mark.asyncio
+    async def test_run_reclaims_expired_rows(self, db_session, monkeypatch):
+        """Test expired cache rows, sessions, commits and jobs are deleted and reported"""
+        monkeypatch.setattr(settings, "CACHE_MAX_ENTRIES", 1)
+        cache = CacheService()
+        await cache.set("old", {"v": 1}, expire_minutes=-(settings.CACHE_RETENTION_HOURS + 1) * 60)
+        await cache.set("a", {"v": 2})
+        await cache.set("b", {"v": 3})
+        db_session.add(UserSession(
+            session_id="expired",
+            github_token="token",
+            github_username="testuser",
+            expires_at=datetime.utcnow() - timedelta(hours=1)
+        ))
+        db_session.add(StoredCommit(
+            repository="testuser/repo",
+            author="testuser",
+            sha="abc123",
+            committed_at=datetime.utcnow() - timedelta(days=settings.COMMIT_RETENTION_DAYS + 2),
+            commit_data="{}"
+        ))
+        finished_at = datetime.utcnow() - timedelta(hours=settings.JOB_RETENTION_HOURS + 1)
+        db_session.add(ActivityJob(
+            job_id="finished",
+            job_key="testuser:week::",
+            status="done",
+            username="testuser",
+            time_range="week",
+            result_data="{}",
+            created_at=finished_at,
+            updated_at=finished_at
+        ))
+        await db_session.commit()
+
+        janitor = Janitor()
+        reclaimed = await janitor.run()
+
+        assert reclaimed == {
+            "expired_cache": 1,
+            "evicted_cache": 1,
+            "expired_sessions": 1,
+            "expired_commits": 1,
+            "expired_jobs": 1,
+        }
+        assert janitor.stats["runs"] == 1
+        assert janitor.stats["expired_sessions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self):
+        """Test the background task runs a pass and stops cleanly"""
+        janitor = Janitor()
+        janitor.start()
+        await janitor.stop()
+
+        assert janitor._task is None
@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.database import ActivityJob
+from app.models.schemas import JobStatus, TimeRange, UserActivityRequest
+from app.services.job_service import JobQueue
+
+
+ACTIVITY = {
+    "username": "testuser",
+    "total_commits": 2,
+    "repositories": [],
+    "commits": [],
+    "activity_chart": [],
+    "time_range": "week",
+}
+
+
+def fake_stream(release: asyncio.Event = None, error: Exception = None):
+    """Stand-in for GitHubService.stream_user_activity"""
+    async def stream(self, username, time_range, since=None, until=None):
+        if release is not None:
+            await release.wait()
+        if error is not None:
+            raise error
+        yield {"event": "commits", "data": {"repository": "testuser/a", "commits": [], "done": 1, "total": 2}}
+        yield {"event": "commits", "data": {"repository": "testuser/b", "commits": [], "done": 2, "total": 2}}
+        yield {"event": "summary", "data": ACTIVITY}
+    return stream
+
+
+class TestJobQueue:
+    """Tests for background activity jobs"""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_to_completion(self):
+        """Test a submitted job records progress and its result"""
+        queue = JobQueue()
+        with patch("app.services.github_service.GitHubService.stream_user_activity", fake_stream()):
+            job = await queue.submit(UserActivityRequest(username="testuser"))
+            await queue.join()
+        job = await queue.get(job.job_id)
+        await queue.stop()
+
+        assert job.status == JobStatus.DONE
+        assert (job.done, job.total) == (2, 2)
+        assert job.result.total_commits == 2
+        assert job.error is None
+
+    @pytest.mark.asyncio
+    async def test_identical_submissions_share_a_job(self):
+        """Test submitting the same request twice while active returns one job"""
+        queue = JobQueue()
+        release = asyncio.Event()
+        with patch("app.services.github_service.GitHubService.stream_user_activity", fake_stream(release)):
+            first = await queue.submit(UserActivityRequest(username="TestUser"))
+            second = await queue.submit(UserActivityRequest(username="testuser"))
+            other = await queue.submit(
+                UserActivityRequest(username="testuser", time_range=TimeRange.MONTH)
+            )
+            release.set()
+            await queue.join()
+        await queue.stop()
+
+        assert first.job_id == second.job_id
+        assert other.job_id != first.job_id
+
+    @pytest.mark.asyncio
+    async def test_failed_job_records_error(self):
+        """Test an error during computation fails the job with its message"""
+        queue = JobQueue()
+        stream = fake_stream(error=ValueError("User nobody not found"))
+        with patch("app.services.github_service.GitHubService.stream_user_activity", stream):
+            job = await queue.submit(UserActivityRequest(username="nobody"))
+            await queue.join()
+        job = await queue.get(job.job_id)
+        await queue.stop()
+
+        assert job.status == JobStatus.FAILED
+        assert job.error == "User nobody not found"
+        assert job.result is None
+
+    @pytest.mark.asyncio
+    async def test_unfinished_jobs_resume_on_start(self, db_session):
+        """Test jobs stored as queued or running are run again after a restart"""
+        db_session.add(ActivityJob(
+            job_id="abc", job_key="testuser:week::", status="running",
+            username="testuser", time_range="week"
+        ))
+        await db_session.commit()
+
+        queue = JobQueue()
+        with patch("app.services.github_service.GitHubService.stream_user_activity", fake_stream()):
+            await queue.start()
+            await queue.join()
+        job = await queue.get("abc")
+        await queue.stop()
+
+        assert job.status == JobStatus.DONE
+        assert job.result.username == "testuser"
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_without_changes(self):
+        """Test long polling returns the unchanged job after the timeout"""
+        queue = JobQueue()
+        release = asyncio.Event()
+        with patch("app.services.github_service.GitHubService.stream_user_activity", fake_stream(release)):
+            job = await queue.submit(UserActivityRequest(username="testuser"))
+            await asyncio.sleep(0.01)
+            polled = await queue.wait(job.job_id, 0.05)
+            release.set()
+            await queue.join()
+        await queue.stop()
+
+        assert polled.status == JobStatus.RUNNING
+        assert polled.done == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self):
+        """Test an unknown job ID returns None"""
+        queue = JobQueue()
+
+        assert await queue.wait("missing", 1) is None
+        assert queue._changed == {}
+
+    @pytest.mark.asyncio
+    async def test_prune_deletes_old_finished_jobs(self, db_session):
+        """Test finished jobs past the cutoff are deleted and active ones kept"""
+        old = datetime.utcnow() - timedelta(days=2)
+        for job_id, status in [("done", "done"), ("failed", "failed"), ("queued", "queued")]:
+            db_session.add(ActivityJob(
+                job_id=job_id, job_key=f"testuser:{job_id}", status=status,
+                username="testuser", time_range="week", created_at=old, updated_at=old
+            ))
+        await db_session.commit()
+
+        queue = JobQueue()
+        pruned = await queue.prune(datetime.utcnow() - timedelta(days=1))
+
+        assert pruned == 2
+        assert await queue.get("done") is None
+        assert (await queue.get("queued")).status == JobStatus.QUEUED
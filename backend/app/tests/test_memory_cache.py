@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from app.services.memory_cache import MemoryCache
+
+
+def in_minutes(minutes: int) -> datetime:
+    return datetime.utcnow() + timedelta(minutes=minutes)
+
+
+class TestMemoryCache:
+    """Tests for MemoryCache"""
+
+    def test_set_and_get(self):
+        """Test values are returned until they expire"""
+        cache = MemoryCache(max_entries=10, max_bytes=1000)
+
+        cache.set("fresh", {"a": 1}, in_minutes(5))
+        cache.set("expired", {"b": 2}, in_minutes(-1))
+
+        assert cache.get("fresh") == {"a": 1}
+        assert cache.get("expired") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used_by_count(self):
+        """Test the entry limit evicts the least recently used key"""
+        cache = MemoryCache(max_entries=2, max_bytes=1000)
+
+        cache.set("a", 1, in_minutes(5))
+        cache.set("b", 2, in_minutes(5))
+        cache.get("a")
+        cache.set("c", 3, in_minutes(5))
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_evicts_by_size(self):
+        """Test the byte limit evicts entries and rejects oversized values"""
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+
+        cache.set("a", "a", in_minutes(5), size=60)
+        cache.set("b", "b", in_minutes(5), size=60)
+        cache.set("huge", "huge", in_minutes(5), size=500)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == "b"
+        assert cache.get("huge") is None
+        assert cache.stats()["bytes"] == 60
+
+    def test_overwrite_and_delete_track_size(self):
+        """Test replacing and deleting values keeps the size accurate"""
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+
+        cache.set("a", 1, in_minutes(5), size=30)
+        cache.set("a", 2, in_minutes(5), size=40)
+        assert cache.stats()["bytes"] == 40
+
+        cache.delete("a")
+        assert cache.stats()["bytes"] == 0
+        assert cache.get("a") is None
@@ -0,0 +1,233 @@
+import asyncio
+import time
+import pytest
+import httpx
+
+from app.config import settings
+from app.services.rate_limiter import RateLimiter, RateLimitExceededError
+
+
+def budget_headers(remaining, limit=5000, reset_in=3600, resource="core"):
+    """Build X-RateLimit-* response headers"""
+    return {
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(int(time.time()) + reset_in),
+        "x-ratelimit-resource": resource,
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Retry without sleeping"""
+    monkeypatch.setattr(settings, "GITHUB_RETRY_BACKOFF", 0)
+
+
+class TestRateLimiter:
+    """Tests for the rate limit aware request scheduler"""
+
+    def test_update_tracks_budget_per_scope_and_resource(self):
+        """Test budgets from headers are kept per token and resource"""
+        limiter = RateLimiter()
+
+        limiter.update("token-a", httpx.Response(200, headers=budget_headers(42)))
+        limiter.update("token-a", httpx.Response(200, headers=budget_headers(7, resource="graphql")))
+
+        assert limiter.state("token-a").remaining == 42
+        assert limiter.state("token-a", "graphql").remaining == 7
+        assert limiter.state("token-b").remaining is None
+
+    def test_low_budget_is_paced(self):
+        """Test requests are spread over the time left once the budget runs low"""
+        limiter = RateLimiter()
+        limiter.update("token", httpx.Response(200, headers=budget_headers(10, limit=5000, reset_in=100)))
+        state = limiter.state("token")
+        now = time.time()
+
+        first, _ = limiter._delay(state, now)
+        second, _ = limiter._delay(state, now)
+
+        assert first == 0
+        assert second == pytest.approx(10, abs=1)
+        assert state.remaining == 8
+
+    def test_exhausted_budget_raises_until_reset(self):
+        """Test an empty budget resetting later than the max wait fails fast"""
+        limiter = RateLimiter()
+        limiter.update("token", httpx.Response(200, headers=budget_headers(0, reset_in=3600)))
+
+        with pytest.raises(RateLimitExceededError) as exc_info:
+            limiter._delay(limiter.state("token"), time.time())
+
+        assert 3500 < exc_info.value.retry_after <= 3600
+
+    def test_expired_budget_is_ignored(self):
+        """Test a budget past its reset time no longer delays requests"""
+        limiter = RateLimiter()
+        limiter.update("token", httpx.Response(200, headers=budget_headers(0, reset_in=-10)))
+
+        assert limiter._delay(limiter.state("token"), time.time()) == (0, None)
+
+    def test_wait_past_deadline_raises_without_reserving(self):
+        """Test a paced wait longer than the deadline fails fast"""
+        limiter = RateLimiter()
+        limiter.update("token", httpx.Response(200, headers=budget_headers(10, limit=5000, reset_in=100)))
+        state = limiter.state("token")
+        now = time.time()
+        limiter._delay(state, now)
+
+        with limiter.deadline(5):
+            with pytest.raises(RateLimitExceededError):
+                limiter._delay(state, now, limiter._max_wait(now))
+
+        assert state.remaining == 9
+        assert state.next_slot == pytest.approx(now + 10, abs=1)
+
+    @pytest.mark.asyncio
+    async def test_blocked_scope_fails_fast_under_deadline(self):
+        """Test a secondary rate limit pause longer than the deadline is not waited out"""
+        limiter = RateLimiter()
+        limiter.state("token").blocked_until = time.time() + 60
+
+        async def request():
+            return httpx.Response(200)
+
+        with limiter.deadline(1):
+            with pytest.raises(RateLimitExceededError):
+                await asyncio.wait_for(limiter.send("token", request), timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_wait_releases_reservation(self):
+        """Test a waiter cancelled while paced gives its slot back"""
+        limiter = RateLimiter()
+        limiter.update("token", httpx.Response(200, headers=budget_headers(10, limit=5000, reset_in=100)))
+        state = limiter.state("token")
+        await limiter.acquire("token")
+        slot = state.next_slot
+
+        waiter = asyncio.create_task(limiter.acquire("token"))
+        await asyncio.sleep(0)
+        assert state.remaining == 8
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert state.remaining == 9
+        assert state.next_slot == pytest.approx(slot)
+
+    @pytest.mark.asyncio
+    async def test_send_retries_server_errors(self):
+        """Test transient 5xx responses are retried"""
+        limiter = RateLimiter()
+        statuses = [502, 503, 200]
+
+        async def request():
+            return httpx.Response(statuses.pop(0))
+
+        response = await limiter.send("token", request)
+
+        assert response.status_code == 200
+        assert statuses == []
+
+    @pytest.mark.asyncio
+    async def test_send_gives_up_after_max_retries(self, monkeypatch):
+        """Test the last error response is returned once retries run out"""
+        monkeypatch.setattr(settings, "GITHUB_MAX_RETRIES", 2)
+        limiter = RateLimiter()
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            return httpx.Response(500)
+
+        response = await limiter.send("token", request)
+
+        assert response.status_code == 500
+        assert calls == 3
+
+    @pytest.mark.asyncio
+    async def test_secondary_rate_limit_blocks_scope(self):
+        """Test a Retry-After 403 is retried and pauses the whole token"""
+        limiter = RateLimiter()
+        responses = [
+            httpx.Response(403, headers={"retry-after": "0"}, text="secondary rate limit"),
+            httpx.Response(200),
+        ]
+
+        async def request():
+            return responses.pop(0)
+
+        response = await limiter.send("token", request)
+
+        assert response.status_code == 200
+        assert limiter.state("token").blocked_until > 0
+
+    @pytest.mark.asyncio
+    async def test_long_retry_after_blocks_scope_and_raises(self):
+        """Test a rate limit wait past the max wait raises and still pauses the token"""
+        limiter = RateLimiter()
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            return httpx.Response(429, headers={"retry-after": "300"})
+
+        with pytest.raises(RateLimitExceededError) as exc_info:
+            await limiter.send("token", request)
+        assert 290 < exc_info.value.retry_after <= 300
+        assert limiter.state("token").blocked_until > time.time() + 290
+
+        with pytest.raises(RateLimitExceededError):
+            await limiter.send("token", request)
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_exhausted_budget_response_raises(self):
+        """Test a 403 reporting an empty budget records it and raises"""
+        limiter = RateLimiter()
+
+        async def request():
+            return httpx.Response(403, headers=budget_headers(0, reset_in=3600))
+
+        with pytest.raises(RateLimitExceededError):
+            await limiter.send("token", request)
+
+        state = limiter.state("token")
+        assert state.remaining == 0
+        assert state.reset_at > time.time() + 3500
+
+    @pytest.mark.asyncio
+    async def test_permission_error_is_not_retried(self):
+        """Test a plain 403 is returned at once"""
+        limiter = RateLimiter()
+        calls = 0
+
+        async def request():
+            nonlocal calls
+            calls += 1
+            return httpx.Response(403, text="Resource not accessible")
+
+        response = await limiter.send("token", request)
+
+        assert response.status_code == 403
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_connection_errors_are_retried(self):
+        """Test transport errors are retried before being raised"""
+        limiter = RateLimiter()
+        attempts = 0
+
+        async def request():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise httpx.ConnectError("reset")
+            return httpx.Response(200)
+
+        response = await limiter.send("token", request)
+
+        assert response.status_code == 200
+        assert attempts == 2
@@ -1,8 +1,25 @@
+import hashlib
+import json
 import pytest
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock, AsyncMock
 from httpx import AsyncClient
 
+from app.config import settings
 from app.models.schemas import TimeRange
+from app.services.cache_backends import CacheEntry
+from app.services.github_service import GitHubService
+from app.services.job_service import job_queue
+
+
+def cache_entry(value, age_minutes=0, ttl_minutes=60) -> CacheEntry:
+    """A fresh cache entry created age_minutes ago"""
+    created_at = datetime.utcnow() - timedelta(minutes=age_minutes)
+    return CacheEntry(
+        value=value,
+        expires_at=created_at + timedelta(minutes=ttl_minutes),
+        created_at=created_at
+    )
 
 
 class TestPublicRoutes:
@@ -27,6 +44,16 @@ class TestPublicRoutes:
         data = response.json()
         assert data["status"] == "healthy"
 
+    @pytest.mark.asyncio
+    async def test_cache_stats(self, client: AsyncClient):
+        """Test cache stats endpoint"""
+        response = await client.get("/health/cache")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data) == {"memory", "backend", "janitor"}
+        assert "hits" in data["memory"]
+
     @pytest.mark.asyncio
     async def test_get_user_info_success(
         self,
@@ -34,19 +61,24 @@ class TestPublicRoutes:
         mock_github_user_response
     ):
         """Test successful user info retrieval"""
-        with patch("app.services.github_service.GitHubService.get_user_info") as mock:
-            mock.return_value = mock_github_user_response
+        with patch("app.services.github_service.GitHubService.get_user_info_entry") as mock:
+            mock.return_value = CacheEntry(
+                value=mock_github_user_response,
+                expires_at=datetime.utcnow() + timedelta(minutes=5),
+                created_at=datetime.utcnow()
+            )
 
             response = await client.get("/api/public/user/testuser")
 
             assert response.status_code == 200
             data = response.json()
             assert data["login"] == "testuser"
+            assert response.headers["etag"].startswith('"')
 
     @pytest.mark.asyncio
     async def test_get_user_info_not_found(self, client: AsyncClient):
         """Test user not found"""
-        with patch("app.services.github_service.GitHubService.get_user_info") as mock:
+        with patch("app.services.github_service.GitHubService.get_user_info_entry") as mock:
             mock.side_effect = ValueError("User not found")
 
             response = await client.get("/api/public/user/nonexistent")
@@ -66,9 +98,8 @@ class TestPublicRoutes:
             "time_range": "week"
         }
 
-        with patch("app.services.github_service.GitHubService.get_user_activity") as mock:
-            mock.return_value = MagicMock(**mock_activity)
-            mock.return_value.model_dump = MagicMock(return_value=mock_activity)
+        with patch("app.services.github_service.GitHubService.get_user_activity_entry") as mock:
+            mock.return_value = cache_entry(mock_activity)
 
             response = await client.get(
                 "/api/public/search/testuser",
@@ -76,6 +107,203 @@ class TestPublicRoutes:
             )
 
             assert response.status_code == 200
+            assert response.json() == mock_activity
+
+    @pytest.mark.asyncio
+    async def test_search_user_with_window(self, client: AsyncClient):
+        """Test since/until are passed through as naive UTC"""
+        with patch("app.services.github_service.GitHubService.get_user_activity_entry") as mock:
+            mock.return_value = cache_entry({})
+
+            await client.get(
+                "/api/public/search/testuser",
+                params={"since": "2024-01-01T02:00:00+02:00", "until": "2024-01-08T00:00:00Z"}
+            )
+
+            assert mock.call_args.kwargs["since"] == datetime(2024, 1, 1)
+            assert mock.call_args.kwargs["until"] == datetime(2024, 1, 8)
+
+    @pytest.mark.asyncio
+    async def test_search_user_gzip(self, client: AsyncClient, monkeypatch):
+        """Test the body is gzip-encoded when accepted, with its own ETag"""
+        monkeypatch.setattr(settings, "RESPONSE_GZIP_MIN_BYTES", 0)
+        entry = cache_entry({"username": "testuser"})
+
+        with patch("app.services.github_service.GitHubService.get_user_activity_entry") as mock:
+            mock.return_value = entry
+
+            plain = await client.get(
+                "/api/public/search/testuser",
+                headers={"Accept-Encoding": "identity"}
+            )
+            response = await client.get(
+                "/api/public/search/testuser",
+                headers={"Accept-Encoding": "gzip"}
+            )
+
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.json() == {"username": "testuser"}
+            assert response.headers["etag"] != plain.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_search_user_caching_headers(self, client: AsyncClient):
+        """Test the ETag hashes the body and max-age/Age follow the cache entry"""
+        entry = cache_entry({"username": "testuser"}, age_minutes=5, ttl_minutes=60)
+
+        with patch("app.services.github_service.GitHubService.get_user_activity_entry") as mock:
+            mock.return_value = entry
+
+            response = await client.get("/api/public/search/testuser")
+
+            assert response.headers["etag"] == f'"{hashlib.sha256(response.content).hexdigest()}"'
+            assert response.headers["cache-control"] == "public, max-age=3600"
+            assert 300 <= int(response.headers["age"]) < 310
+
+    @pytest.mark.asyncio
+    async def test_search_user_not_modified(self, client: AsyncClient):
+        """Test a matching If-None-Match gets 304 without a body"""
+        entry = cache_entry({"username": "testuser"})
+
+        with patch("app.services.github_service.GitHubService.get_user_activity_entry") as mock:
+            mock.return_value = entry
+            etag = (await client.get("/api/public/search/testuser")).headers["etag"]
+
+            response = await client.get(
+                "/api/public/search/testuser",
+                headers={"If-None-Match": f'"other", W/{etag}'}
+            )
+            changed = await client.get(
+                "/api/public/search/testuser",
+                headers={"If-None-Match": '"other"'}
+            )
+
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["etag"] == etag
+            assert "max-age" in response.headers["cache-control"]
+            assert changed.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_not_modified_from_cache_skips_github(self, client: AsyncClient):
+        """Test a client holding the cached activity is answered from the cache alone"""
+        service = GitHubService()
+        await service.cache.set(
+            service._cache_key("user_activity", "testuser", "week", service.token_scope),
+            {"username": "testuser", "total_commits": 0}
+        )
+
+        with patch(
+            "app.services.github_service.GitHubService._fetch_user_activity",
+            side_effect=AssertionError("GitHub should not be called")
+        ):
+            etag = (await client.get("/api/public/search/testuser")).headers["etag"]
+            response = await client.get(
+                "/api/public/search/testuser",
+                headers={"If-None-Match": etag}
+            )
+
+        assert response.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_uncached_response_is_not_cacheable(self, client: AsyncClient):
+        """Test a response without a fresh cache entry gets max-age=0 and no Age"""
+        with patch("app.services.github_service.GitHubService.get_user_activity_entry") as mock:
+            mock.return_value = CacheEntry(value={}, expires_at=datetime.utcnow())
+
+            response = await client.get("/api/public/search/testuser")
+
+            assert response.headers["cache-control"] == "public, max-age=0"
+            assert "age" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_search_user_rejects_inverted_window(self, client: AsyncClient):
+        """Test since must be before until"""
+        response = await client.get(
+            "/api/public/search/testuser",
+            params={"since": "2024-01-08T00:00:00", "until": "2024-01-01T00:00:00"}
+        )
+
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_search_user_rejects_future_since(self, client: AsyncClient):
+        """Test since must be in the past when until defaults to now"""
+        since = (datetime.utcnow() + timedelta(days=1)).isoformat()
+        with patch("app.services.github_service.GitHubService.get_user_activity_entry") as mock:
+            response = await client.get("/api/public/search/testuser", params={"since": since})
+
+        assert response.status_code == 422
+        assert "since must be in the past" in response.text
+        mock.assert_not_called()
+
+
+    @pytest.mark.asyncio
+    async def test_stream_user_activity_ndjson(self, client: AsyncClient):
+        """Test activity events are streamed one JSON object per line"""
+        async def events(*args, **kwargs):
+            yield {"event": "user", "data": {"username": "testuser"}}
+            yield {"event": "summary", "data": {"total_commits": 1}}
+
+        with patch("app.services.github_service.GitHubService.stream_user_activity", events):
+            response = await client.get("/api/public/stream/testuser")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["event"] for line in lines] == ["user", "summary"]
+
+    @pytest.mark.asyncio
+    async def test_stream_user_activity_sse(self, client: AsyncClient):
+        """Test event-stream clients get server-sent events"""
+        async def events(*args, **kwargs):
+            yield {"event": "summary", "data": {"total_commits": 1}}
+
+        with patch("app.services.github_service.GitHubService.stream_user_activity", events):
+            response = await client.get(
+                "/api/public/stream/testuser",
+                headers={"Accept": "text/event-stream"}
+            )
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == 'event: summary\ndata: {"total_commits": 1}\n\n'
+
+    @pytest.mark.asyncio
+    async def test_stream_user_activity_not_found(self, client: AsyncClient):
+        """Test a failure before the first event is an HTTP error"""
+        async def events(*args, **kwargs):
+            raise ValueError("User not found")
+            yield
+
+        with patch("app.services.github_service.GitHubService.stream_user_activity", events):
+            response = await client.get("/api/public/stream/nonexistent")
+
+        assert response.status_code == 404
+
+
+    @pytest.mark.asyncio
+    async def test_submit_activity_job(self, client: AsyncClient):
+        """Test submitting a job returns it at once with 202"""
+        async def events(*args, **kwargs):
+            yield {"event": "summary", "data": {}}
+
+        with patch("app.services.github_service.GitHubService.stream_user_activity", events):
+            response = await client.post(
+                "/api/public/jobs",
+                json={"username": "testuser", "time_range": "week"}
+            )
+            await job_queue.join()
+
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "queued"
+        assert data["job_id"]
+
+    @pytest.mark.asyncio
+    async def test_get_activity_job_not_found(self, client: AsyncClient):
+        """Test an unknown job ID is a 404"""
+        response = await client.get("/api/public/jobs/missing")
+
+        assert response.status_code == 404
 
 
 class TestAuthRoutes:
@@ -117,7 +345,9 @@ class TestAuthRoutes:
     async def test_get_current_user(self, client: AsyncClient):
         """Test getting current user"""
         mock_session = MagicMock()
+        mock_session.session_id = "test_session_id"
         mock_session.github_token = "test_token"
+        mock_session.expires_at = datetime.utcnow() + timedelta(hours=1)
 
         with patch("app.services.auth_service.AuthService.get_session") as mock_get:
             with patch("app.services.github_service.GitHubService.get_authenticated_user") as mock_user:
@@ -128,10 +358,16 @@ class TestAuthRoutes:
                     "/api/auth/me",
                     headers={"Authorization": "Bearer test_session_id"}
                 )
+                second = await client.get(
+                    "/api/auth/me",
+                    headers={"Authorization": "Bearer test_session_id"}
+                )
 
                 assert response.status_code == 200
                 data = response.json()
                 assert data["login"] == "testuser"
+                assert second.json() == data
+                assert mock_user.call_count == 1
 
     @pytest.mark.asyncio
     async def test_get_current_user_invalid_session(self, client: AsyncClient):
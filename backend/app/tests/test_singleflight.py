@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_computation(self):
+        """Test callers with the same key await one computation"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": 42}
+
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(10)))
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert not flight.in_flight("key")
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Test computations for different keys are not coalesced"""
+        flight = SingleFlight()
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(
+            flight.do("a", lambda: compute("a")),
+            flight.do("b", lambda: compute("b"))
+        )
+
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_callers(self):
+        """Test a failed computation raises for every waiting caller"""
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(flight.do("key", compute) for _ in range(3)),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert not flight.in_flight("key")
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_computation(self):
+        """Test other callers still get the result when the first one is cancelled"""
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+
+    @pytest.mark.asyncio
+    async def test_later_call_recomputes(self):
+        """Test a call after completion starts a new computation"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("key", compute) == 1
+        assert await flight.do("key", compute) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancel_all_stops_running_computations(self):
+        """Test cancel_all cancels and forgets in-flight computations"""
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(10)
+
+        caller = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0)
+        await flight.cancel_all()
+
+        assert not flight.in_flight("key")
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+    @pytest.mark.asyncio
+    async def test_start_registers_computation_for_callers(self):
+        """Test a computation started without awaiting is joined by do"""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "shared"
+
+        task = flight.start("key", compute)
+        assert flight.in_flight("key")
+        caller = asyncio.create_task(flight.do("key", compute))
+        release.set()
+
+        assert await caller == "shared"
+        assert await task == "shared"
+        assert not flight.in_flight("key")
@@ -0,0 +1,146 @@
+import time
+import pytest
+import httpx
+from unittest.mock import MagicMock
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.config import settings
+from app.services import github_service, token_pool as token_pool_module
+from app.services.github_service import GitHubService
+from app.services.rate_limiter import rate_limiter
+from app.services.token_pool import GitHubAppAuth, PooledToken, TokenPool, token_scope
+
+
+def exhaust(scope, reset_in=3600):
+    """Mark a token scope as having no budget left"""
+    state = rate_limiter.state(scope)
+    state.remaining = 0
+    state.reset_at = time.time() + reset_in
+
+
+class TestTokenPool:
+    """Tests for the server-side token pool"""
+
+    def test_from_settings_parses_tokens(self, monkeypatch):
+        """Test GITHUB_TOKENS is split on commas"""
+        monkeypatch.setattr(settings, "GITHUB_TOKENS", "token-a, token-b,")
+
+        pool = TokenPool.from_settings()
+
+        assert [token.value for token in pool.tokens] == ["token-a", "token-b"]
+        assert pool.tokens[0].scope == token_scope("token-a")
+
+    def test_acquire_prefers_least_loaded_token(self):
+        """Test tokens with fewer requests in flight, then more budget, are picked"""
+        pool = TokenPool([PooledToken(scope="a", value="a"), PooledToken(scope="b", value="b")])
+        rate_limiter.state("a").remaining = 100
+        rate_limiter.state("a").reset_at = time.time() + 3600
+        rate_limiter.state("b").remaining = 4000
+        rate_limiter.state("b").reset_at = time.time() + 3600
+
+        first = pool.acquire()
+        second = pool.acquire()
+        pool.release(first)
+
+        assert (first.scope, second.scope) == ("b", "a")
+        assert pool.acquire().scope == "b"
+
+    def test_exhausted_tokens_are_quarantined_until_reset(self):
+        """Test a token without budget is skipped until its reset time"""
+        pool = TokenPool([PooledToken(scope="a", value="a")])
+
+        exhaust("a")
+        assert pool.acquire() is None
+
+        exhaust("a", reset_in=-1)
+        assert pool.acquire().scope == "a"
+
+    @pytest.mark.asyncio
+    async def test_app_installation_token_is_cached(self, github_client, monkeypatch):
+        """Test the installation token is requested once with a signed app JWT"""
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode()
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(201, json={"token": "ghs_install", "expires_at": "2999-01-01T00:00:00Z"})
+
+        client = github_client(handler)
+        monkeypatch.setattr(token_pool_module, "get_http_client", lambda: client)
+        app = GitHubAppAuth("123", pem, "456")
+
+        assert await app.token() == "ghs_install"
+        assert await app.token() == "ghs_install"
+        assert len(requests) == 1
+        assert requests[0].url.path == "/app/installations/456/access_tokens"
+        assert requests[0].headers["authorization"].startswith("Bearer ey")
+
+
+class TestGitHubServiceTokenPool:
+    """Tests for public requests using pooled tokens"""
+
+    @pytest.mark.asyncio
+    async def test_public_requests_use_pooled_tokens(
+        self, github_client, mock_github_user_response, monkeypatch
+    ):
+        """Test unauthenticated requests carry a pooled token and fall back when all are exhausted"""
+        pool = TokenPool([PooledToken(scope=token_scope("pooled"), value="pooled")])
+        monkeypatch.setattr(github_service, "token_pool", pool)
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.headers.get("authorization"))
+            return httpx.Response(200, json=mock_github_user_response)
+
+        service = GitHubService(client=github_client(handler))
+        await service._get_json(f"{settings.GITHUB_API_BASE_URL}/users/testuser")
+        exhaust(token_scope("pooled"))
+        await service._get_json(f"{settings.GITHUB_API_BASE_URL}/users/testuser")
+
+        assert seen == ["token pooled", None]
+        assert service.token_scope == "public"
+        assert pool.tokens[0].in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_token_reported_exhausted_fails_over(
+        self, github_client, mock_github_user_response, monkeypatch
+    ):
+        """Test a pooled token GitHub reports as exhausted is skipped for the next one"""
+        pool = TokenPool([
+            PooledToken(scope=token_scope("tokA"), value="tokA"),
+            PooledToken(scope=token_scope("tokB"), value="tokB"),
+        ])
+        monkeypatch.setattr(github_service, "token_pool", pool)
+        for scope, remaining in [(token_scope("tokA"), 4000), (token_scope("tokB"), 100)]:
+            rate_limiter.state(scope).remaining = remaining
+            rate_limiter.state(scope).reset_at = time.time() + 3600
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.headers.get("authorization"))
+            if request.headers.get("authorization") == "token tokA":
+                return httpx.Response(403, headers={
+                    "x-ratelimit-limit": "5000",
+                    "x-ratelimit-remaining": "0",
+                    "x-ratelimit-reset": str(int(time.time()) + 3600),
+                })
+            return httpx.Response(200, json=mock_github_user_response)
+
+        service = GitHubService(client=github_client(handler))
+        user = await service.get_user_info("testuser")
+
+        assert user["login"] == mock_github_user_response["login"]
+        assert seen == ["token tokA", "token tokB"]
+        assert pool.acquire().scope == token_scope("tokB")
+
+    def test_pool_enables_graphql_without_user_token(self, monkeypatch):
+        """Test public services can use GraphQL when the pool has tokens"""
+        monkeypatch.setattr(github_service, "token_pool", TokenPool([PooledToken(scope="a", value="a")]))
+
+        assert GitHubService(client=MagicMock()).authenticated is True